@@ -1,12 +1,72 @@
-from flask import Flask, jsonify, render_template, request
-from services.google_sheets_service import get_tickets_data
-from services.etl_service import compute_kpis
-from services.model_predict_service import predict_sla_risk
-from services.openai_service import clasificar_ticket,analizar_ticket_completo
+from flask import Flask, jsonify, render_template, request, Response, stream_with_context, g
+import click
+import json
+from services.google_sheets_service import (
+    get_tickets_frame, get_tickets_snapshot, get_tickets_kpis, buscar_ticket, filtrar_por_estado,
+    consultar_tickets, stream_tickets, tickets_cache
+)
+from services.etl_service import mayusculas_categoria, valores_filtro, resumen_especialistas, serie_atendidos
+from services.analitica_service import analitica_tickets
+from services.model_predict_service import predict_sla_risk, entrenar_modelo, recargar_modelo, info_modelo, MODELO_SLA_PATH
+from services.openai_service import (
+    clasificar_ticket, analizar_ticket_completo, referencias_cache,
+    MODELO_OPENAI, VERSION_PROMPT_CLASIFICACION, VERSION_PROMPT_RESPUESTA,
+)
+from services.openai_async_service import analizar_ticket, analizar_ticket_eventos, iterar
+from services.snapshot_cache import estadisticas_caches
+from services.clasificador_local_service import (
+    entrenar_clasificador, recargar_clasificador, info_clasificador, CLASIFICADOR_PATH
+)
+from services.llm_cache_service import llm_cache, clave_cache
+from services.jobs_service import cola_trabajos, ColaLlena
+from services.batch_service import seleccionar_tickets, clasificar_lote, ruta_checkpoint
+from services.http_service import (
+    etag_para, comprimir_respuesta, stream_registros, codificacion_aceptada, comprimir_stream, evento_sse
+)
+from services import metrics_service as metricas
 import pandas as pd
+import os
+import base64
+import time
+from datetime import date, timedelta
 
 app = Flask(__name__)
 
+# Pipeline de IA async (cliente compartido, timeouts y reintentos); "0" usa el flujo síncrono
+OPENAI_ASYNC = os.getenv("OPENAI_ASYNC", "1") == "1"
+# Tamaño máximo de página en /api/tickets
+API_TICKETS_MAX_LIMITE = int(os.getenv("API_TICKETS_MAX_LIMITE", "1000"))
+
+# Arranque en frío: se sirve el último snapshot del espejo en disco mientras se descargan las hojas;
+# sin espejo, las tres hojas empiezan a descargarse ya (en paralelo) antes de la primera petición
+tickets_cache.precalentar(cargar=True)
+referencias_cache.precalentar(cargar=True)
+
+
+@app.before_request
+def iniciar_medicion():
+    g.inicio = time.perf_counter()
+    metricas.iniciar_peticion()
+
+
+# Se registra antes que `comprimir`, así que corre después (mide el tamaño ya comprimido)
+@app.after_request
+def registrar_metricas(response):
+    duracion = time.perf_counter() - g.get("inicio", time.perf_counter())
+    ruta = request.url_rule.rule if request.url_rule else "sin_ruta"
+    metricas.peticiones_segundos.observar(duracion, ruta=ruta, metodo=request.method,
+                                          estado=str(response.status_code))
+    if not response.is_streamed:
+        metricas.respuesta_bytes.observar(response.calculate_content_length() or 0, ruta=ruta)
+    if metricas.SERVER_TIMING or request.headers.get("X-Server-Timing") == "1":
+        response.headers["Server-Timing"] = metricas.cabecera_server_timing(metricas.tramos_peticion(), duracion)
+    return response
+
+
+@app.after_request
+def comprimir(response):
+    return comprimir_respuesta(request, response)
+
 # ============================================================
 # HOME PRINCIPAL CON BIENVENIDA
 # ============================================================
@@ -20,17 +80,14 @@ def home():
 # ============================================================
 @app.route('/dashboard')
 def dashboard():
-    # === 1️⃣ Obtener los datos crudos ===
-    data = get_tickets_data()  # Retorna lista o DataFrame con tus registros
+    # === 1️⃣ KPIs materializados del snapshot (no se recorren los datos crudos) ===
+    kpis_raw = _kpis_resumen()  # Ejemplo: {'Cerrado': 2508, 'Atendido': 1306, ...}
 
-    # === 2️⃣ Calcular los KPI ===
-    kpis_raw = compute_kpis(data)  # Ejemplo: {'Cerrado': 2508, 'Atendido': 1306, ...}
-
-    # === 3️⃣ Normalizar las claves ===
+    # === 2️⃣ Normalizar las claves ===
     # Convierte todo a minúsculas y reemplaza espacios por guiones bajos
     kpis = {k.lower().replace(" ", "_"): v for k, v in kpis_raw.items()}
     kpis = dict(kpis)  # <-- 🔹 fuerza a tipo dict
-    # === 5️⃣ Enviar al frontend ===
+    # === 3️⃣ Enviar al frontend ===
     return render_template('dashboard.html', kpis=kpis)
 
 
@@ -46,54 +103,186 @@ def dashboard_especialistas():
 # ============================================================
 @app.route("/api/tickets-completo")
 def api_tickets_completo():
-    data = get_tickets_data()
-    df = pd.DataFrame(data)
-
-    # Normalización básica
-    df["DIRECCION"] = df["DIRECCION"].fillna("SIN DATO").str.upper()
-    df["AREA"] = df["AREA"].fillna("SIN DATO").str.upper()
-    df["TIPO REQUERIMIENTO"] = df["TIPO REQUERIMIENTO"].fillna("SIN DATO").str.upper()
-    df["FECHA_FINAL_ATENCION"] = pd.to_datetime(
-        df["FECHA_FINAL_ATENCION"], 
-        format="%d/%m/%Y", 
-        errors="coerce"
-    )
+    """
+    Todos los tickets normalizados. Se serializa en streaming por lotes
+    (?formato=ndjson para una fila por línea); ?stream=0 conserva la
+    serialización anterior en un solo bloque.
+    """
+    data = get_tickets_frame()
+    if isinstance(data, dict):
+        return jsonify(data), 502
+
+    formato = _formato_stream()
+    if formato is None:
+        return jsonify({"error": "formato debe ser json o ndjson"}), 400
+    if request.args.get("stream") == "0":
+        return _tickets_completo_en_bloque(data)
+    return _respuesta_stream(stream_registros(data, transformar=_normalizar_completo, formato=formato), formato)
+
+
+def _normalizar_completo(df):
+    # Copia superficial: las columnas no modificadas se comparten con el snapshot
+    df = df.copy(deep=False)
+
+    # Normalización básica (sobre las categorías, no fila por fila)
+    for col in ["DIRECCION", "AREA", "TIPO REQUERIMIENTO"]:
+        df[col] = mayusculas_categoria(df[col])
+
+    # Convertir fechas a string (por JSON); ya vienen parseadas en el snapshot
+    df["FECHA_FINAL_ATENCION"] = df["FECHA_FINAL_ATENCION"].dt.strftime("%Y-%m-%d")
+    return df
 
 
-    # Convertir fechas a string (por JSON)
-    df["FECHA_FINAL_ATENCION"] = df["FECHA_FINAL_ATENCION"].dt.strftime("%Y-%m-%d")
+def _tickets_completo_en_bloque(data):
+    return _normalizar_completo(data).to_json(orient="records", force_ascii=False)
+
+
+def _formato_stream():
+    formato = request.args.get("formato", "json").lower()
+    return formato if formato in ("json", "ndjson") else None
+
 
-    return df.to_json(orient="records", force_ascii=False)
+def _respuesta_stream(partes, formato, etag=None):
+    """Response en streaming (chunked), comprimida en gzip al vuelo si el cliente lo acepta."""
+    mimetype = "application/x-ndjson" if formato == "ndjson" else "application/json"
+    encoding = codificacion_aceptada(request)
+    if encoding:
+        partes = comprimir_stream(partes)
+    response = Response(stream_with_context(partes), mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
 
 
 
+# ============================================================
+# API - AGREGADOS DEL DASHBOARD DE ESPECIALISTAS (server-side)
+# ============================================================
+def _lista_param(nombre):
+    """
+    Parámetro multivalor (?area=A&area=B) normalizado a tupla. No se separa
+    por comas: hay áreas que la contienen ("MONITOREO, SEGUIMIENTO Y ...").
+    """
+    valores = (v.strip().upper() for v in request.args.getlist(nombre))
+    return tuple(sorted({v for v in valores if v}))
+
+
+@app.route("/api/especialistas/filtros")
+def api_especialistas_filtros():
+    df = get_tickets_frame()
+    if isinstance(df, dict):
+        return jsonify(df), 502
+    return jsonify(valores_filtro(df, _lista_param("direccion"), _lista_param("area")))
+
+
+@app.route("/api/especialistas/resumen")
+def api_especialistas_resumen():
+    """
+    Tabla por especialista (filtrada por direccion/area/tipo) y serie diaria
+    de tickets atendidos entre `inicio` y `fin` (YYYY-MM-DD, por defecto
+    los últimos 7 días).
+    """
+    df = get_tickets_frame()
+    if isinstance(df, dict):
+        return jsonify(df), 502
+
+    hoy = date.today()
+    try:
+        inicio = date.fromisoformat(request.args.get("inicio") or (hoy - timedelta(days=7)).isoformat())
+        fin = date.fromisoformat(request.args.get("fin") or hoy.isoformat())
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas, use el formato YYYY-MM-DD."}), 400
+
+    tabla = resumen_especialistas(df, _lista_param("direccion"), _lista_param("area"), _lista_param("tipo"))
+    return jsonify({
+        **tabla,
+        "serie": serie_atendidos(df, inicio.isoformat(), fin.isoformat()),
+    })
+
+
+# ============================================================
+# API - ANALÍTICA DE SLA Y CARGA (por especialista y área)
+# ============================================================
+def _analitica():
+    """
+    Analítica del snapshot filtrada por direccion/area/tipo; `hoy`
+    (YYYY-MM-DD, por defecto hoy) fija la antigüedad del backlog.
+    Devuelve (resultado, None) o (None, respuesta de error).
+    """
+    try:
+        snapshot = get_tickets_snapshot()
+    except Exception as e:
+        return None, (jsonify({"error": f"No se pudo leer la hoja: {e}"}), 502)
+    try:
+        hoy = date.fromisoformat(request.args.get("hoy") or date.today().isoformat())
+    except ValueError:
+        return None, (jsonify({"error": "Fecha inválida, use el formato YYYY-MM-DD."}), 400)
+    return analitica_tickets(snapshot, hoy.isoformat(), _lista_param("direccion"), _lista_param("area"),
+                             _lista_param("tipo")), None
+
+
+@app.route("/api/analitica/sla")
+def api_analitica_sla():
+    """Distribución y percentiles del tiempo de resolución, SLA por prioridad y antigüedad del backlog."""
+    resultado, error = _analitica()
+    if error:
+        return error
+    return jsonify({k: resultado[k] for k in
+                    ("hoy", "tickets", "resumen", "distribucion_resolucion", "tramos_antiguedad", "por_prioridad")})
+
+
+@app.route("/api/analitica/carga")
+def api_analitica_carga():
+    """Backlog, antigüedad y tiempos de resolución por especialista (DNI) y por área."""
+    resultado, error = _analitica()
+    if error:
+        return error
+    return jsonify({k: resultado[k] for k in ("hoy", "tickets", "tramos_antiguedad", "por_especialista", "por_area")})
+
+
 # ============================================================
 # DASHBOARD + IA (análisis inteligente)
 # ============================================================
 @app.route('/dashboard-ai')
 def dashboard_ai():
-    data = get_tickets_data()
-    kpis_raw = compute_kpis(data)  # Ejemplo: {'Cerrado': 2508, 'Atendido': 1306, ...}
+    kpis_raw = _kpis_resumen()  # Ejemplo: {'Cerrado': 2508, 'Atendido': 1306, ...}
     kpis = {k.lower().replace(" ", "_"): v for k, v in kpis_raw.items()}
     kpis = dict(kpis)  # <-- 🔹 fuerza a tipo dict
     print(kpis)
-    return render_template('dashboard_ai.html', kpis=kpis, data=data)
+    return render_template('dashboard_ai.html', kpis=kpis)
 
 
 # ============================================================
 # API: Tickets, KPIs y Predicción
 # ============================================================
 
+def _kpis_resumen():
+    kpis = get_tickets_kpis()
+    return kpis if isinstance(kpis, dict) else kpis.resumen()
+
+
 @app.route('/api/kpis')
 def api_kpis():
-    data = get_tickets_data()
-    kpis = compute_kpis(data)
-    return jsonify(kpis)
+    return jsonify(_kpis_resumen())
+
+
+@app.route('/api/kpis/detalle')
+def api_kpis_detalle():
+    """KPIs por ESTADO, desglose por DIRECCION y AREA, y ventanas de 7/30 días."""
+    kpis = get_tickets_kpis()
+    if isinstance(kpis, dict):
+        return jsonify(kpis), 502
+    return jsonify(kpis.detalle())
 
 
 @app.route('/api/predict')
 def api_predict():
-    data = get_tickets_data()
+    data = get_tickets_frame()
+    if isinstance(data, dict):
+        return jsonify(data), 502
     predictions = predict_sla_risk(data)
     return jsonify(predictions)
 
@@ -110,12 +299,28 @@ def api_ai_clasificar():
 
 
 
+def _analizar_ticket(ticket, descripcion):
+    """Análisis IA completo de un ticket en el formato de /api/ai-ticket."""
+    analizar = analizar_ticket if OPENAI_ASYNC else analizar_ticket_completo
+    resultado = analizar(
+        descripcion_ticket=descripcion,
+        datos_usuario=ticket
+    )
+    return {
+        "ticket": ticket.get("TICKET"),
+        "descripcion": descripcion,
+        "clasificacion": resultado.get("clasificacion"),
+        "especialista": resultado.get("especialista"),
+        "tdr": resultado.get("tdr"),
+        "respuesta": resultado.get("respuesta")
+    }
+
+
 @app.route('/api/ai-ticket/<ticket_id>', methods=['GET'])
 def api_ai_ticket(ticket_id):
     try:
-        # Obtener todos los tickets del sistema
-        data = get_tickets_data()
-        ticket = next((t for t in data if str(t.get("TICKET", "")) == str(ticket_id)), None)
+        # Buscar el ticket en el índice del snapshot (O(1))
+        ticket = buscar_ticket(ticket_id)
 
         if not ticket:
             return jsonify({"error": f"No se encontró el ticket {ticket_id}"}), 404
@@ -124,27 +329,15 @@ def api_ai_ticket(ticket_id):
         if not descripcion:
             return jsonify({"error": "El ticket no contiene descripción."}), 400
 
-  
-
         # Analizar el ticket (IA + asignación + TDR + respuesta)
-        resultado = analizar_ticket_completo(
-            descripcion_ticket=descripcion,
-            datos_usuario=ticket
-        )
+        resultado = _analizar_ticket(ticket, descripcion)
 
         print("===== 🧠 RESULTADO COMPLETO DEL ANÁLISIS =====")
         print(resultado)
         print("=============================================")
 
         # Retornar el JSON unificado al dashboard
-        return jsonify({
-            "ticket": ticket.get("TICKET"),
-            "descripcion": descripcion,
-            "clasificacion": resultado.get("clasificacion"),
-            "especialista": resultado.get("especialista"),
-            "tdr": resultado.get("tdr"),
-            "respuesta": resultado.get("respuesta")
-        })
+        return jsonify(resultado)
 
     except Exception as e:
         print(f"❌ Error en api_ai_ticket: {e}")
@@ -161,9 +354,8 @@ def api_ai_ticket_post():
         if not ticket_id:
             return jsonify({"error": "Falta el campo 'ticket_id' en el cuerpo del request."}), 400
 
-        # 2️⃣ Buscar el ticket en la hoja de datos
-        tickets = get_tickets_data()
-        ticket = next((t for t in tickets if str(t.get("TICKET", "")) == str(ticket_id)), None)
+        # 2️⃣ Buscar el ticket en el índice del snapshot (O(1))
+        ticket = buscar_ticket(ticket_id)
 
         if not ticket:
             return jsonify({"error": f"No se encontró el ticket {ticket_id}"}), 404
@@ -174,36 +366,397 @@ def api_ai_ticket_post():
         
         print("🟢 Analizando ticket:", ticket_id)
 
-        # 3️⃣ Ejecutar el análisis IA completo
-        resultado = analizar_ticket_completo(
-            descripcion_ticket=descripcion,
-            datos_usuario=ticket
-        )
-        #print("🟢 Resultado :", resultado)
-        # 4️⃣ Retornar el JSON unificado
-        return jsonify({
-            "ticket": ticket.get("TICKET"),
-            "descripcion": descripcion,
-            "clasificacion": resultado.get("clasificacion"),
-            "especialista": resultado.get("especialista"),
-            "tdr": resultado.get("tdr"),
-            "respuesta": resultado.get("respuesta")
-        })
+        # 3️⃣ Ejecutar el análisis IA completo y 4️⃣ retornar el JSON unificado
+        return jsonify(_analizar_ticket(ticket, descripcion))
 
     except Exception as e:
         print(f"❌ Error en api_ai_ticket_post: {e}")
         return jsonify({"error": "Ocurrió un error interno en el servidor."}), 500
 
 
+# ============================================================
+# API: Análisis IA en segundo plano (trabajos)
+# ============================================================
+@app.route('/api/ai-ticket/trabajos', methods=['POST'])
+def api_ai_ticket_trabajo():
+    """
+    Encola el análisis IA de un ticket y responde de inmediato (202) con el
+    id del trabajo. Si el mismo ticket ya se está analizando se devuelve
+    ese trabajo; con la cola llena responde 429 (Retry-After).
+    Consultar con GET /api/trabajos/<id> (o .../resultado).
+    """
+    data = request.get_json(silent=True) or {}
+    ticket_id = data.get("ticket_id")
+    if not ticket_id:
+        return jsonify({"error": "Falta el campo 'ticket_id' en el cuerpo del request."}), 400
+
+    try:
+        ticket = buscar_ticket(ticket_id)
+    except Exception as e:
+        return jsonify({"error": f"No se pudo leer la hoja: {e}"}), 502
+    if not ticket:
+        return jsonify({"error": f"No se encontró el ticket {ticket_id}"}), 404
+    descripcion = ticket.get("DESCRIPCION", "")
+    if not descripcion:
+        return jsonify({"error": "El ticket no contiene descripción."}), 400
+
+    # Misma clave = mismo ticket con la misma descripción (y mismo modelo y prompts)
+    clave = clave_cache("ai-ticket", MODELO_OPENAI, f"{VERSION_PROMPT_CLASIFICACION}-{VERSION_PROMPT_RESPUESTA}",
+                        str(ticket.get("TICKET")), descripcion)
+    try:
+        trabajo, nuevo = cola_trabajos.encolar("ai-ticket", clave, _analizar_ticket, ticket, descripcion)
+    except ColaLlena as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "5"}
+
+    trabajo["deduplicado"] = not nuevo
+    trabajo["url_estado"] = f"/api/trabajos/{trabajo['id']}"
+    trabajo["url_resultado"] = f"/api/trabajos/{trabajo['id']}/resultado"
+    return jsonify(trabajo), 202, {"Location": trabajo["url_estado"]}
+
+
+@app.route('/api/trabajos/<trabajo_id>')
+def api_trabajo(trabajo_id):
+    """Estado del trabajo (en_cola, en_proceso, completado, error); incluye el resultado al terminar."""
+    trabajo = cola_trabajos.obtener(trabajo_id)
+    if trabajo is None:
+        return jsonify({"error": f"No existe el trabajo {trabajo_id}"}), 404
+    return jsonify(trabajo)
+
+
+@app.route('/api/trabajos/<trabajo_id>/resultado')
+def api_trabajo_resultado(trabajo_id):
+    """Resultado del trabajo (200); 202 con Retry-After mientras sigue pendiente."""
+    trabajo = cola_trabajos.obtener(trabajo_id)
+    if trabajo is None:
+        return jsonify({"error": f"No existe el trabajo {trabajo_id}"}), 404
+    if trabajo["estado"] == "completado":
+        return jsonify(trabajo["resultado"])
+    if trabajo["estado"] == "error":
+        return jsonify({"error": trabajo.get("error")}), 500
+    return jsonify({"estado": trabajo["estado"], "posicion": trabajo.get("posicion")}), 202, {"Retry-After": "1"}
+
+
+@app.route('/api/ai-ticket/<ticket_id>/stream', methods=['GET'])
+def api_ai_ticket_stream(ticket_id):
+    """
+    Análisis del ticket por Server-Sent Events: "ticket" de inmediato, luego
+    "clasificacion", "especialista" y "tdr" apenas están listos, los
+    fragmentos de la respuesta sugerida ("respuesta_delta") a medida que
+    llegan del LLM, "respuesta" con el texto final y "fin".
+    """
+    try:
+        ticket = buscar_ticket(ticket_id)
+    except Exception as e:
+        return jsonify({"error": f"No se pudo leer la hoja: {e}"}), 502
+    if not ticket:
+        return jsonify({"error": f"No se encontró el ticket {ticket_id}"}), 404
+    descripcion = ticket.get("DESCRIPCION", "")
+    if not descripcion:
+        return jsonify({"error": "El ticket no contiene descripción."}), 400
+
+    def eventos():
+        yield evento_sse("ticket", {"ticket": ticket.get("TICKET"), "descripcion": descripcion})
+        try:
+            for evento, datos in iterar(analizar_ticket_eventos(descripcion, ticket)):
+                yield evento_sse(evento, datos)
+        except Exception as e:
+            print(f"❌ Error en api_ai_ticket_stream: {e}")
+            yield evento_sse("error", {"error": "Ocurrió un error interno en el servidor."})
+        yield evento_sse("fin", {})
+
+    return Response(stream_with_context(eventos()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ============================================================
+# API: Clasificación por lotes (NDJSON)
+# ============================================================
+@app.route('/api/ai-clasificar/lote', methods=['POST'])
+def api_ai_clasificar_lote():
+    """
+    Body: {"ticket_ids": [...]} o {"filtros": {"ESTADO": "Pendiente", ...}},
+    opcionales "modo" (clasificar|completo), "trabajadores", "limite" y
+    "checkpoint" (nombre del lote para poder reanudarlo).
+    Responde una línea JSON por ticket a medida que se completan.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        limite = int(body["limite"]) if body.get("limite") is not None else None
+        trabajadores = int(body.get("trabajadores", 4))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limite y trabajadores deben ser números enteros."}), 400
+    if (limite is not None and limite < 1) or trabajadores < 1:
+        return jsonify({"error": "limite y trabajadores deben ser mayores que cero."}), 400
+    try:
+        tickets = seleccionar_tickets(body.get("ticket_ids"), body.get("filtros"), limite)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"No se pudo leer la hoja: {e}"}), 502
+
+    checkpoint = ruta_checkpoint(body["checkpoint"]) if body.get("checkpoint") else None
+    try:
+        lote = clasificar_lote(
+            tickets,
+            modo=body.get("modo", "clasificar"),
+            trabajadores=trabajadores,
+            checkpoint=checkpoint,
+        )
+        primero = next(lote)  # valida parámetros y carga las referencias antes de transmitir
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error iniciando el lote: {e}")
+        return jsonify({"error": f"No se pudieron leer las hojas de referencia: {e}"}), 502
+
+    def generar():
+        yield json.dumps(primero, ensure_ascii=False) + "\n"
+        for registro in lote:
+            yield json.dumps(registro, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generar()), mimetype="application/x-ndjson")
+
+
+@app.cli.command("clasificar-lote")
+@click.option("--ids", help="Ids de ticket separados por coma.")
+@click.option("--estado", help="Filtrar por ESTADO.")
+@click.option("--direccion", help="Filtrar por DIRECCION.")
+@click.option("--area", help="Filtrar por AREA.")
+@click.option("--modo", type=click.Choice(["clasificar", "completo"]), default="clasificar")
+@click.option("--trabajadores", type=int, default=4)
+@click.option("--limite", type=int, default=None)
+@click.option("--checkpoint", help="Nombre del lote (permite reanudar tras una caída).")
+@click.option("--salida", type=click.File("a", encoding="utf-8"), default="-", help="Archivo NDJSON de salida.")
+def cli_clasificar_lote(ids, estado, direccion, area, modo, trabajadores, limite, checkpoint, salida):
+    """Clasifica tickets históricos en lote y escribe NDJSON."""
+    filtros = {k: v for k, v in {"ESTADO": estado, "DIRECCION": direccion, "AREA": area}.items() if v}
+    tickets = seleccionar_tickets(ids.split(",") if ids else None, filtros, limite)
+    click.echo(f"🟢 {len(tickets)} tickets seleccionados", err=True)
+    for registro in clasificar_lote(tickets, modo=modo, trabajadores=trabajadores,
+                                    checkpoint=ruta_checkpoint(checkpoint) if checkpoint else None):
+        salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        salida.flush()
+
+
+@app.cli.command("entrenar-sla")
+@click.option("--csv", "ruta_csv", help="CSV de tickets (por defecto, la hoja configurada en SHEET_URL).")
+@click.option("--salida", default=MODELO_SLA_PATH, show_default=True, help="Ruta del artefacto joblib.")
+def cli_entrenar_sla(ruta_csv, salida):
+    """Entrena el modelo de riesgo SLA y guarda el artefacto."""
+    df = pd.read_csv(ruta_csv) if ruta_csv else get_tickets_frame()
+    if isinstance(df, dict):
+        raise click.ClickException(df["error"])
+    metricas = entrenar_modelo(df, salida)
+    click.echo(f"🟢 Modelo guardado en {salida}: {json.dumps(metricas)}")
+    recargar_modelo(salida)
+
+
+@app.cli.command("entrenar-clasificador")
+@click.option("--csv", "ruta_csv", help="CSV de tickets clasificados (por defecto, la hoja configurada en SHEET_URL).")
+@click.option("--salida", default=CLASIFICADOR_PATH, show_default=True, help="Ruta del artefacto joblib.")
+def cli_entrenar_clasificador(ruta_csv, salida):
+    """Entrena el clasificador local (TF-IDF + regresión logística) que evita llamadas al LLM."""
+    df = pd.read_csv(ruta_csv, dtype=str) if ruta_csv else get_tickets_frame()
+    if isinstance(df, dict):
+        raise click.ClickException(df["error"])
+    metricas = entrenar_clasificador(df, salida)
+    click.echo(f"🟢 Clasificador guardado en {salida}: {json.dumps(metricas, ensure_ascii=False)}")
+    recargar_clasificador(salida)
+
+
 @app.route('/api/tickets')
 def api_tickets():
-    data = get_tickets_data()
-    estado = request.args.get("estado")
+    """
+    Sin parámetros de paginación devuelve la lista completa (compatibilidad),
+    serializada en streaming (?formato=ndjson, o ?stream=0 para la versión en bloque).
+    Con offset/limit, cursor, fields, sort o q devuelve una página:
+      - offset, limit (máx. API_TICKETS_MAX_LIMITE) o cursor (de "siguiente")
+      - fields=TICKET,ESTADO,...  proyección de columnas
+      - sort=COLUMNA | sort=-COLUMNA  orden ascendente / descendente
+      - q=texto  búsqueda libre
+    Con `draw` responde en el formato server-side de DataTables.
+    """
+    try:
+        snapshot = get_tickets_snapshot()
+    except Exception as e:
+        return jsonify({"error": f"No se pudo leer la hoja: {e}"}), 502
+
+    # Mismo snapshot + mismos parámetros = misma respuesta
+    etag = etag_para(snapshot.hash, sorted(request.args.items(multi=True)))
+    if request.if_none_match.contains_weak(etag):
+        return "", 304, {"ETag": f'W/"{etag}"'}
+
+    args = request.args
+    paginado = any(k in args for k in ("draw", "offset", "limit", "cursor", "fields", "sort", "q"))
+    estado = args.get("estado")
+
+    if not paginado:
+        formato = _formato_stream()
+        if formato is None:
+            return jsonify({"error": "formato debe ser json o ndjson"}), 400
+        if args.get("stream") == "0":
+            data = filtrar_por_estado(estado, snapshot) if estado else snapshot.registros
+            response = jsonify(data)
+            response.set_etag(etag, weak=True)
+            return response
+        return _respuesta_stream(stream_tickets(estado, formato, snapshot), formato, etag)
+
+    try:
+        pagina = _parametros_pagina(args, snapshot)
+        draw = int(args["draw"]) if "draw" in args else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    registros, total, filtrados = consultar_tickets(estado=estado, snapshot=snapshot, **pagina)
+
+    if draw is not None:
+        cuerpo = {
+            "draw": draw,
+            "recordsTotal": total,
+            "recordsFiltered": filtrados,
+            "data": registros,
+        }
+    else:
+        fin = pagina["offset"] + len(registros)
+        cuerpo = {
+            "data": registros,
+            "total": total,
+            "filtrados": filtrados,
+            "offset": pagina["offset"],
+            "limite": pagina["limite"],
+            "siguiente": _cursor(snapshot, fin) if fin < filtrados else None,
+        }
+    response = jsonify(cuerpo)
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def _cursor(snapshot, offset):
+    crudo = f"{snapshot.hash[:12]}:{offset}".encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def _parametros_pagina(args, snapshot):
+    """Traduce parámetros propios o de DataTables a argumentos de consultar_tickets."""
+    if "draw" in args:
+        offset = int(args.get("start", 0))
+        limite = int(args.get("length", 25))
+        busqueda = args.get("search[value]", "")
+        orden, descendente = None, False
+        if "order[0][column]" in args:
+            orden = args.get(f"columns[{args.get('order[0][column]')}][data]")
+            descendente = args.get("order[0][dir]", "asc") == "desc"
+    else:
+        offset = int(args.get("offset", 0))
+        limite = int(args.get("limit", 100))
+        busqueda = args.get("q", "")
+        orden = args.get("sort")
+        descendente = bool(orden) and orden.startswith("-")
+        orden = orden.lstrip("-") if orden else None
+
+    if args.get("cursor"):
+        try:
+            crudo = base64.urlsafe_b64decode(args["cursor"] + "=" * (-len(args["cursor"]) % 4)).decode()
+            version, offset = crudo.rsplit(":", 1)
+            offset = int(offset)
+        except Exception:
+            raise ValueError("Cursor inválido.")
+        if version != snapshot.hash[:12]:
+            raise ValueError("El cursor corresponde a otra versión de los datos; reinicie la paginación.")
+
+    if limite < 0:
+        limite = API_TICKETS_MAX_LIMITE  # DataTables usa -1 para "todos"
+    campos = [c.strip() for c in args.get("fields", "").split(",") if c.strip()] or None
+    return {
+        "busqueda": busqueda or None,
+        "orden": orden,
+        "descendente": descendente,
+        "offset": max(offset, 0),
+        "limite": min(max(limite, 1), API_TICKETS_MAX_LIMITE),
+        "campos": campos,
+    }
 
-    if estado:
-        data = [d for d in data if str(d.get("ESTADO", "")).lower() == estado.lower()]
 
-    return jsonify(data)
+# ============================================================
+# API: Estado de la cache de datos
+# ============================================================
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    stats = estadisticas_caches()
+    stats["llm"] = llm_cache.estadisticas()
+    stats["modelo_sla"] = info_modelo()
+    stats["clasificador_local"] = info_clasificador()
+    stats["trabajos"] = cola_trabajos.estadisticas()
+    return jsonify(stats)
+
+
+# ============================================================
+# MÉTRICAS (Prometheus) Y PERFILADO
+# ============================================================
+@metricas.registrar_recolector
+def _metricas_caches():
+    caches = estadisticas_caches()
+    llm = llm_cache.estadisticas()
+    familias = []
+    for campo, tipo, ayuda in (
+        ("hits", "counter", "Lecturas servidas desde el snapshot vigente."),
+        ("stale_hits", "counter", "Lecturas servidas desde un snapshot vencido mientras se refresca."),
+        ("misses", "counter", "Lecturas que tuvieron que esperar una carga."),
+        ("errores", "counter", "Cargas fallidas."),
+        ("hit_ratio", "gauge", "Proporción de lecturas sin espera."),
+        ("edad_segundos", "gauge", "Edad del snapshot vigente."),
+    ):
+        nombre = f"cache_{campo}" + ("_total" if tipo == "counter" else "")
+        familias.append((nombre, tipo, ayuda, [({"cache": n}, e.get(campo)) for n, e in caches.items()]))
+    if llm.get("activa") and "error" not in llm:
+        familias += [
+            ("llm_cache_hits_total", "counter", "Aciertos de la cache LLM (todos los workers).", [({}, llm["hits"])]),
+            ("llm_cache_misses_total", "counter", "Fallos de la cache LLM (todos los workers).", [({}, llm["misses"])]),
+            ("llm_cache_hit_ratio", "gauge", "Proporción de aciertos de la cache LLM.", [({}, llm["hit_ratio"])]),
+            ("llm_cache_llamadas_ahorradas_total", "counter", "Llamadas al LLM evitadas por la cache.",
+             [({}, llm["llamadas_ahorradas"])]),
+            ("llm_cache_entradas", "gauge", "Entradas en la cache LLM.", [({}, llm["entradas"])]),
+        ]
+    trabajos = cola_trabajos.estadisticas()
+    if "error" not in trabajos:
+        familias.append(("trabajos_por_estado", "gauge", "Trabajos en la cola por estado (todos los workers).",
+                         [({"estado": e}, n) for e, n in trabajos["por_estado"].items()]))
+    return familias
+
+
+@app.route('/metrics')
+def metrics():
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/debug/perfil')
+def debug_perfil():
+    """
+    Inicia un perfilado por muestreo de este worker durante ?segundos=N
+    (máx. 60) en segundo plano y responde 202 de inmediato: la petición no
+    ocupa un hilo de gunicorn mientras dura. Las pilas, en formato
+    "collapsed" (flamegraph.pl / speedscope), se piden a /debug/perfil/resultado.
+    Solo con PERFILADOR_HABILITADO=1.
+    """
+    if not metricas.PERFILADOR_HABILITADO:
+        return jsonify({"error": "Perfilador deshabilitado (PERFILADOR_HABILITADO=1)"}), 404
+    segundos = min(max(request.args.get("segundos", 10, type=float), 0.1), 60)
+    if not metricas.perfilador.iniciar(segundos):
+        return jsonify({"error": "Ya hay un perfilado en curso"}), 409
+    return jsonify({"estado": "en_curso", "segundos": segundos, "resultado": "/debug/perfil/resultado"}), 202
+
+
+@app.route('/debug/perfil/resultado')
+def debug_perfil_resultado():
+    """Pilas del último perfilado; 202 mientras sigue en curso."""
+    if not metricas.PERFILADOR_HABILITADO:
+        return jsonify({"error": "Perfilador deshabilitado (PERFILADOR_HABILITADO=1)"}), 404
+    perfilador = metricas.perfilador
+    if perfilador.activo:
+        return jsonify({"estado": "en_curso", "restante": perfilador.restante}), 202
+    if not perfilador.terminado:
+        return jsonify({"error": "No hay ningún perfilado; inícielo con /debug/perfil"}), 404
+    return Response(perfilador.collapsed(), mimetype="text/plain")
 
 
 # ============================================================
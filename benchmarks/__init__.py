@@ -0,0 +1,5 @@
+"""
+Benchmarks del dashboard. Se ejecutan como módulos, por ejemplo:
+
+    python -m benchmarks.bench_memoria_snapshot --filas 100000
+"""
@@ -0,0 +1,91 @@
+"""
+Analítica de SLA y carga (services.analitica_service) frente al mismo
+cálculo con groupby de pandas por petición: vista numérica (una vez por
+snapshot), consulta en frío sin filtros y con filtros y consulta
+memorizada. Las rutas /api/analitica/* se miden en benchmarks.suite.
+
+    python -m benchmarks.bench_analitica --filas 1000000 --objetivo-ms 100
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sinteticos import AREAS, DIRECCIONES, generar_tickets
+from services.analitica_service import analitica_tickets
+from services.google_sheets_service import TicketsSnapshot, _tipar_columnas
+from services.sheet_sync_service import DiffFilas
+from services.model_predict_service import SLA_DIAS
+
+HOY = "2026-01-01"
+
+
+def _con_pandas(df, hoy):
+    """Mismo resultado por especialista con groupby/quantile sobre el DataFrame (sin vista previa)."""
+    registro = pd.to_datetime(df["FECHA DE REGISTRO"], format="%d/%m/%Y", errors="coerce")
+    cerrado = df["ESTADO"].astype(str).str.upper().str.contains("ATENDIDO|CERRADO")
+    duracion = (df["FECHA_FINAL_ATENCION"] - registro).dt.days
+    sla = df["PRIORIDAD"].astype(str).str.upper().map(SLA_DIAS)
+    tabla = pd.DataFrame({"dni": df["DNI_ESPECIALISTA FUNCIONAL"], "duracion": duracion,
+                          "dentro": duracion <= sla, "edad": (pd.Timestamp(hoy) - registro).dt.days,
+                          "vencido": (pd.Timestamp(hoy) - registro).dt.days > sla})
+    resueltos = tabla[cerrado & (duracion >= 0)].groupby("dni")
+    abiertos = tabla[~cerrado].groupby("dni")
+    return pd.concat([
+        resueltos["duracion"].quantile([0.5, 0.9]).unstack(),
+        resueltos["duracion"].mean(), resueltos["dentro"].mean(),
+        abiertos.size(), abiertos["vencido"].sum(), abiertos["edad"].max(),
+    ], axis=1)
+
+
+def _tiempos_ms(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {"mediana_ms": round(statistics.median(tiempos), 2), "max_ms": round(max(tiempos), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--objetivo-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    df = _tipar_columnas(generar_tickets(args.filas))
+    snapshot = TicketsSnapshot(df=df, diff=DiffFilas(completo=True), hash="bench")
+    sin_memo = analitica_tickets.__wrapped__.__wrapped__  # medido -> memo_por_snapshot -> función
+
+    inicio = time.perf_counter()
+    snapshot.vista_analitica
+    vista_ms = (time.perf_counter() - inicio) * 1000
+
+    rng = np.random.default_rng(0)
+    filtros = [((rng.choice(DIRECCIONES),), tuple(rng.choice(AREAS, 2, replace=False)), ())
+               for _ in range(args.repeticiones)]
+    resultados = {
+        "pandas_groupby_por_peticion": _tiempos_ms(lambda: _con_pandas(df, HOY), max(args.repeticiones // 2, 1)),
+        "consulta_en_frio": _tiempos_ms(lambda: sin_memo(snapshot, HOY), args.repeticiones),
+        "consulta_en_frio_con_filtros": _tiempos_ms(
+            lambda: sin_memo(snapshot, HOY, *filtros[int(rng.integers(len(filtros)))]), args.repeticiones),
+    }
+    analitica_tickets(snapshot, HOY)
+    resultados["consulta_memorizada"] = _tiempos_ms(lambda: analitica_tickets(snapshot, HOY), 100)
+
+    consultas = [v["max_ms"] for k, v in resultados.items() if k.startswith("consulta_en_frio")]
+    print(json.dumps({
+        "filas": args.filas,
+        "vista_por_snapshot_ms": round(vista_ms, 1),
+        "resultados": resultados,
+        "objetivo_ms": args.objetivo_ms,
+        "consultas_dentro_objetivo": max(consultas) <= args.objetivo_ms,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
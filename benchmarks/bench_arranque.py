@@ -0,0 +1,107 @@
+"""
+Arranque de un worker sin espejo local: tiempo de importar la app (y si
+quedó importado openai), primera respuesta de /api/kpis (hoja de tickets)
+y primera clasificación IA (hojas de referencia + cliente de OpenAI),
+pedidas apenas termina el import y también tras una pausa (--espera: el
+worker ya arrancó pero aún no recibió tráfico).
+
+    python -m benchmarks.bench_arranque --filas 100000 --latencia 0.5 --espera 3 --repeticiones 3
+
+Las hojas se sirven por HTTP local con latencia por descarga (simula el
+export de Google Sheets) y OpenAI es el fake local. Cada arranque corre
+en un subproceso nuevo; se reporta la mediana.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.servidor_hojas import ServidorHojas
+from benchmarks.sinteticos import escribir_hojas
+
+DESCRIPCION = "No puedo acceder al curso 12, el sistema muestra un error al guardar."
+
+
+def _arrancar(espera):
+    """Subproceso: importa la app, espera y pide /api/kpis y luego una clasificación IA."""
+    inicio = time.perf_counter()
+    from app import app
+    importada = time.perf_counter()
+    openai_importado = "openai" in sys.modules
+    time.sleep(espera)
+    cliente = app.test_client()
+    listo = time.perf_counter()
+    kpis = cliente.get("/api/kpis")
+    primera_kpis = time.perf_counter()
+    ia = cliente.post("/api/ai-clasificar", json={"descripcion": DESCRIPCION})
+    primera_ia = time.perf_counter()
+    print(json.dumps({
+        "import_app_s": importada - inicio,
+        "primera_kpis_s": primera_kpis - listo,
+        "primera_ia_s": primera_ia - primera_kpis,
+        "total_s": (importada - inicio) + (primera_ia - listo),
+        "openai_importado_tras_import": openai_importado,
+        "status": [kpis.status_code, ia.status_code],
+        "ia_con_error": "error" in (ia.get_json() or {}),
+    }))
+
+
+def _medir(entorno, repeticiones, espera):
+    muestras = []
+    for _ in range(repeticiones):
+        proceso = subprocess.run([sys.executable, "-m", "benchmarks.bench_arranque", "--arrancar",
+                                  "--espera", str(espera)],
+                                 env={**os.environ, **entorno}, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            return {"error": proceso.stderr.strip().splitlines()[-1:]}
+        muestras.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+    resultado = {k: round(statistics.median(m[k] for m in muestras), 3) for k in muestras[0] if k.endswith("_s")}
+    resultado.update({k: v for k, v in muestras[-1].items() if not k.endswith("_s")})
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--latencia", type=float, default=0.5, help="segundos por descarga de hoja")
+    parser.add_argument("--espera", type=float, default=3.0, help="pausa entre el import y la primera petición (s)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--arrancar", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.arrancar:
+        return _arrancar(args.espera)
+
+    tmp = tempfile.mkdtemp()
+    escribir_hojas(tmp, args.filas)
+    hojas = ServidorHojas(tmp, latencia=args.latencia).iniciar()
+    openai_fake = FakeOpenAIServer(0, 0.0).iniciar()
+    entorno = {
+        "SHEET_URL": hojas.url("tickets.csv"),
+        "SHEET_URL_ASIGNACION": hojas.url("asignacion.csv"),
+        "SHEET_URL_TDR": hojas.url("tdr.csv"),
+        "OPENAI_BASE_URL": openai_fake.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "SNAPSHOT_DIR": "",
+        "CLASIFICADOR_PATH": "",
+        "MODELO_SLA_PATH": os.path.join(tmp, "sin_modelo.joblib"),
+        "JOBS_DB_PATH": os.path.join(tmp, "trabajos.sqlite3"),
+    }
+    print(json.dumps({
+        "filas": args.filas,
+        "latencia_hojas_s": args.latencia,
+        "repeticiones": args.repeticiones,
+        "resultados": {
+            "primera petición al terminar el import": _medir(entorno, args.repeticiones, 0),
+            f"primera petición {args.espera:g} s después del import": _medir(entorno, args.repeticiones, args.espera),
+        },
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Arranque en frío con y sin el espejo local de las hojas (Arrow IPC en
+SNAPSHOT_DIR): tiempo de importar la app y de la primera respuesta de
+/api/kpis, también con la fuente caída (se sirve el snapshot del espejo).
+
+    python -m benchmarks.bench_arranque_espejo --filas 200000 --latencia 1.0
+
+Las hojas se sirven por HTTP local con latencia configurable (simula el
+export de Google Sheets). Cada arranque corre en un subproceso nuevo.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.servidor_hojas import ServidorHojas
+from benchmarks.sinteticos import escribir_hojas
+
+
+def _arrancar():
+    """Subproceso: importa la app y pide /api/kpis una vez."""
+    inicio = time.perf_counter()
+    from app import app
+    from services.snapshot_cache import estadisticas_caches
+    importada = time.perf_counter()
+    resp = app.test_client().get("/api/kpis")
+    primera = time.perf_counter()
+    stats = estadisticas_caches()["tickets"]
+    print(json.dumps({
+        "import_app_s": round(importada - inicio, 3),
+        "primera_respuesta_s": round(primera - importada, 3),
+        "total_s": round(primera - inicio, 3),
+        "status": resp.status_code,
+        "con_datos": "error" not in (resp.get_json() or {}),
+        "precargas": stats["precargas"],
+    }))
+
+
+def _medir(entorno):
+    proceso = subprocess.run([sys.executable, "-m", "benchmarks.bench_arranque_espejo", "--arrancar"],
+                             env={**os.environ, **entorno}, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        return {"error": proceso.stderr.strip().splitlines()[-1:]}
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--latencia", type=float, default=1.0, help="segundos por descarga de hoja")
+    parser.add_argument("--arrancar", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.arrancar:
+        return _arrancar()
+
+    tmp = tempfile.mkdtemp()
+    escribir_hojas(tmp, args.filas)
+    hojas = ServidorHojas(tmp, latencia=args.latencia).iniciar()
+    entorno = {
+        "SHEET_URL": hojas.url("tickets.csv"),
+        "SHEET_URL_ASIGNACION": hojas.url("asignacion.csv"),
+        "SHEET_URL_TDR": hojas.url("tdr.csv"),
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "MODELO_SLA_PATH": os.path.join(tmp, "sin_modelo.joblib"),
+    }
+    espejo = os.path.join(tmp, "espejo")
+
+    resultados = {
+        "sin espejo (descarga + parseo)": _medir({**entorno, "SNAPSHOT_DIR": ""}),
+        "primer arranque (escribe el espejo)": _medir({**entorno, "SNAPSHOT_DIR": espejo}),
+        "con espejo": _medir({**entorno, "SNAPSHOT_DIR": espejo}),
+    }
+    hojas.shutdown()
+    hojas.server_close()
+    resultados["con espejo, fuente caída"] = _medir({**entorno, "SNAPSHOT_DIR": espejo})
+    resultados["sin espejo, fuente caída"] = _medir({**entorno, "SNAPSHOT_DIR": ""})
+
+    tamanos = {n: os.path.getsize(os.path.join(espejo, n)) for n in sorted(os.listdir(espejo))}
+    print(json.dumps({"filas": args.filas, "latencia_s": args.latencia, "bytes_espejo": tamanos,
+                      "resultados": resultados}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
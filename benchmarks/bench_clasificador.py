@@ -0,0 +1,153 @@
+"""
+Clasificador local (TF-IDF + regresión logística) frente al LLM en
+clasificar_ticket: latencia de predicción, fracción de tickets resueltos
+sin LLM, exactitud y latencia total ahorrada contra el fake de OpenAI.
+
+    python -m benchmarks.bench_clasificador --filas 20000 --consultas 300 --latencia 0.3
+
+Los tickets sintéticos tienen descripciones que dependen de sus etiquetas
+(con una fracción de textos genéricos, ambiguos), como un histórico ya
+clasificado por el equipo.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.sinteticos import AREAS, EQUIPOS, PRIORIDADES, REQUERIMIENTOS_POR_TIPO, TIPOS, escribir_hojas
+
+_CONTEXTO_TIPO = {
+    "Acceso a plataforma": ["no puedo ingresar", "mi usuario está bloqueado", "olvidé mi contraseña"],
+    "Certificados": ["no aparece mi certificado", "el certificado tiene mi nombre mal", "no puedo descargar la constancia"],
+    "Aula virtual": ["el aula virtual no carga", "no veo los foros del aula", "no se guardan mis tareas"],
+    "Reportes": ["el reporte de avance está vacío", "no cuadran las notas del reporte", "el reporte no exporta"],
+    "Matrícula": ["no figuro matriculado", "quiero anular mi matrícula", "me matricularon en otro grupo"],
+}
+_VERBOS = ["desde el celular", "desde la computadora", "en la mañana", "en la noche", "desde ayer"]
+_OBJETOS = ["en el curso", "en el módulo", "en la unidad", "en la evaluación"]
+_PRIORIDAD = {"Alta": "es urgente, vence el plazo hoy", "Media": "", "Baja": "cuando puedan revisarlo"}
+_GENERICOS = ["tengo un problema, ayuda por favor", "no funciona", "consulta sobre el sistema", "buenas tardes, tengo una duda"]
+
+
+def generar_historico(n, ambiguos=0.25, semilla=0):
+    """
+    Tickets clasificados con descripción coherente con TIPO / REQUERIMIENTO /
+    ÁREA TI / PRIORIDAD. El AREA del solicitante no depende del texto.
+    """
+    rng = np.random.default_rng(semilla)
+    tipo = rng.integers(0, len(TIPOS), n)
+    req = rng.integers(1, REQUERIMIENTOS_POR_TIPO + 1, n)
+    # Cada tipo lo atiende casi siempre el mismo equipo TI
+    equipo = np.where(rng.random(n) < 0.95, tipo % len(EQUIPOS), rng.integers(0, len(EQUIPOS), n))
+    prioridad = rng.choice(PRIORIDADES, n)
+    contexto = rng.integers(0, 3, n)
+    generico = rng.random(n) < ambiguos
+    descripciones = []
+    for i in range(n):
+        if generico[i]:
+            descripciones.append(_GENERICOS[rng.integers(0, len(_GENERICOS))] + f" {rng.integers(1, 500)}")
+            continue
+        r = req[i] - 1
+        descripciones.append(
+            f"{_CONTEXTO_TIPO[TIPOS[tipo[i]]][contexto[i]]} {_VERBOS[r % 5]} {_OBJETOS[r // 5]} "
+            f"{rng.integers(1, 500)}, {_PRIORIDAD[prioridad[i]]}".strip(" ,")
+        )
+    return pd.DataFrame({
+        "DESCRIPCION": descripciones,
+        "TIPO REQUERIMIENTO": np.array(TIPOS)[tipo],
+        "REQUERIMIENTO": [f"Requerimiento {r}" for r in req],
+        "ÁREA TI": np.array(EQUIPOS)[equipo],
+        "PRIORIDAD": prioridad,
+        "AREA": rng.choice(AREAS, n),
+    })
+
+
+def _percentiles_us(tiempos):
+    tiempos = sorted(tiempos)
+    return {"p50_us": round(statistics.median(tiempos) * 1e6, 1),
+            "p99_us": round(tiempos[int(0.99 * (len(tiempos) - 1))] * 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=20_000)
+    parser.add_argument("--consultas", type=int, default=300)
+    parser.add_argument("--latencia", type=float, default=0.3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    escribir_hojas(tmp, 100)
+    openai_fake = FakeOpenAIServer(0, args.latencia).iniciar()
+    os.environ.update({
+        "SHEET_URL": os.path.join(tmp, "tickets.csv"),
+        "SHEET_URL_ASIGNACION": os.path.join(tmp, "asignacion.csv"),
+        "SHEET_URL_TDR": os.path.join(tmp, "tdr.csv"),
+        "OPENAI_BASE_URL": openai_fake.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "SNAPSHOT_DIR": "",
+        "CLASIFICADOR_PATH": os.path.join(tmp, "clasificador.joblib"),
+    })
+
+    from services import clasificador_local_service as local
+    from services.openai_service import clasificar_ticket, obtener_referencias
+
+    historico = generar_historico(args.filas + args.consultas)
+    entrenamiento, consultas = historico.iloc[:args.filas], historico.iloc[args.filas:]
+    inicio = time.perf_counter()
+    metricas = local.entrenar_clasificador(entrenamiento, local.CLASIFICADOR_PATH)
+    entrenamiento_s = time.perf_counter() - inicio
+    clasificador = local.recargar_clasificador(local.CLASIFICADOR_PATH)
+
+    tiempos = []
+    for texto in consultas["DESCRIPCION"]:
+        inicio = time.perf_counter()
+        clasificador.predecir(texto)
+        tiempos.append(time.perf_counter() - inicio)
+
+    referencias = obtener_referencias()
+
+    def recorrer():
+        llamadas = openai_fake.llamadas
+        aciertos, locales, inicio = 0, 0, time.perf_counter()
+        for fila in consultas.itertuples(index=False):
+            resultado = clasificar_ticket(fila.DESCRIPCION, referencias)
+            if resultado.get("origen") == "clasificador_local":
+                locales += 1
+                aciertos += (resultado["tipo_requerimiento"], resultado["requerimiento"],
+                             resultado["area_asignada"], resultado["prioridad"]) == (
+                    fila[1], fila[2], fila[3], fila[4])
+        total = time.perf_counter() - inicio
+        return {
+            "llamadas_llm": openai_fake.llamadas - llamadas,
+            "ms_por_clasificacion": round(total / len(consultas) * 1000, 2),
+            "resueltos_local": locales,
+            "exactitud_resueltos_local": round(aciertos / locales, 4) if locales else None,
+        }
+
+    local.recargar_clasificador("")
+    solo_llm = recorrer()
+    local.recargar_clasificador(local.CLASIFICADOR_PATH)
+    con_local = recorrer()
+
+    print(json.dumps({
+        "filas_entrenamiento": args.filas,
+        "consultas": args.consultas,
+        "latencia_llm_s": args.latencia,
+        "entrenamiento_s": round(entrenamiento_s, 2),
+        "metricas_validacion": metricas,
+        "prediccion": _percentiles_us(tiempos),
+        "solo_llm": solo_llm,
+        "con_clasificador_local": con_local,
+        "fraccion_llamadas_evitadas": round(1 - con_local["llamadas_llm"] / max(solo_llm["llamadas_llm"], 1), 4),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
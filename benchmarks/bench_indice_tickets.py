@@ -0,0 +1,54 @@
+"""
+Microbenchmark de búsqueda de tickets: escaneo lineal anterior
+(`next(... str(t.get("TICKET")) == ...)`) frente a los índices del snapshot.
+
+    python -m benchmarks.bench_indice_tickets --filas 10000 100000 1000000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.sinteticos import generar_tickets
+from services.google_sheets_service import TicketsSnapshot, _tipar_columnas
+from services.sheet_sync_service import DiffFilas
+
+
+def _cronometrar(fn, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def medir(n):
+    df = _tipar_columnas(generar_tickets(n))
+    snapshot = TicketsSnapshot(df=df, diff=DiffFilas(completo=True), hash="")
+    registros = snapshot.registros
+    objetivo = str(n - 1)  # peor caso para el escaneo lineal
+
+    inicio = time.perf_counter()
+    snapshot.construir_indices()
+    construccion = time.perf_counter() - inicio
+
+    lineal = _cronometrar(lambda: next((t for t in registros if str(t.get("TICKET", "")) == objetivo), None), 3)
+    indexado = _cronometrar(lambda: snapshot.filas([snapshot.indice_ticket[objetivo]]), 1000)
+    filtro_lineal = _cronometrar(lambda: [d for d in registros if str(d.get("ESTADO", "")).lower() == "cerrado"], 3)
+    filtro_indexado = _cronometrar(lambda: snapshot.filas(snapshot.indice_estado["cerrado"]), 3)
+
+    return {
+        "filas": n,
+        "construccion_indices_ms": round(construccion * 1e3, 2),
+        "busqueda_ticket_us": {"lineal": round(lineal * 1e6, 1), "indice": round(indexado * 1e6, 1)},
+        "filtro_estado_ms": {"lineal": round(filtro_lineal * 1e3, 2), "indice": round(filtro_indexado * 1e3, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    print(json.dumps([medir(n) for n in args.filas], indent=2))
+
+
+if __name__ == "__main__":
+    main()
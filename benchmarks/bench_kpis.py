@@ -0,0 +1,63 @@
+"""
+Compara compute_kpis por petición con los KPIs materializados por
+snapshot, y el recálculo completo con la actualización incremental a
+partir del diff de filas.
+
+    python -m benchmarks.bench_kpis --filas 100000 --cambios 0.01
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.sinteticos import ESTADOS, generar_tickets
+from services.etl_service import compute_kpis, materializar_kpis
+from services.google_sheets_service import TicketsSnapshot, _tipar_columnas
+from services.sheet_sync_service import diff_por_clave
+
+
+def _ms(fn, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = fn()
+    return resultado, round((time.perf_counter() - inicio) / repeticiones * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--cambios", type=float, default=0.01, help="fracción de filas modificadas")
+    args = parser.parse_args()
+
+    base = generar_tickets(args.filas)
+    nuevo = base.copy()
+    rng = np.random.default_rng(1)
+    cambiadas = rng.choice(args.filas, int(args.filas * args.cambios), replace=False)
+    nuevo.loc[cambiadas, "ESTADO"] = rng.choice(ESTADOS, len(cambiadas))
+    df_base, df_nuevo = _tipar_columnas(base), _tipar_columnas(nuevo)
+
+    anterior = TicketsSnapshot(df=df_base, diff=diff_por_clave(None, df_base), hash="a").construir_indices()
+    anterior.kpis
+    snapshot = TicketsSnapshot(df=df_nuevo, diff=diff_por_clave(df_base, df_nuevo), hash="b").construir_indices()
+
+    _, por_peticion = _ms(lambda: compute_kpis(df_nuevo), 20)
+    completo, ms_completo = _ms(lambda: materializar_kpis(df_nuevo), 5)
+    _, ms_incremental = _ms(lambda: snapshot.heredar_kpis(anterior))
+    _, ms_resumen = _ms(lambda: snapshot.kpis.resumen(), 1000)
+    _, ms_detalle = _ms(lambda: snapshot.kpis.detalle(), 100)
+
+    print(json.dumps({
+        "filas": args.filas,
+        "filas_cambiadas": len(cambiadas),
+        "compute_kpis_por_peticion_ms": por_peticion,
+        "materializar_completo_ms": ms_completo,
+        "actualizacion_incremental_ms": ms_incremental,
+        "incremental_igual_a_completo": snapshot.kpis.incremental and snapshot.kpis.detalle() == completo.detalle(),
+        "resumen_materializado_ms": ms_resumen,
+        "detalle_materializado_ms": ms_detalle,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compara el pipeline síncrono de analizar_ticket_completo con el pipeline
+async (cliente compartido + semáforo) contra el fake de OpenAI local.
+
+    python -m benchmarks.bench_llm_async --peticiones 32 --hilos 4 --latencia 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+_ASIGNACION = """CATEGORIA_REQUERIMIENTO,REQUERIMIENTO,EQUIPO,DNI_ENCARGO_PROCESO,Encargdo del proceso,Rol del proceso,DNI_COORDINADOR_PROCESO,coordinador del proceso
+Aula virtual,Crear aula,Plataforma,01234567,Ana Perez,Gestor,07654321,Luis Diaz
+"""
+_TDR = """DNI,CONTRATISTA,Actividades,DENOMINACIÓN,ENTREGABLE,PRODUCTOS
+01234567,Ana Perez,Gestionar aulas,Especialista funcional TI,Informe mensual,Informe 1
+"""
+
+
+def _resumen(latencias, total):
+    latencias = sorted(latencias)
+    return {
+        "p50_s": round(statistics.median(latencias), 3),
+        "p95_s": round(latencias[int(0.95 * (len(latencias) - 1))], 3),
+        "req_por_s": round(len(latencias) / total, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--peticiones", type=int, default=32)
+    parser.add_argument("--hilos", type=int, default=4, help="hilos de worker disponibles para el flujo síncrono")
+    parser.add_argument("--latencia", type=float, default=0.3)
+    args = parser.parse_args()
+
+    servidor = FakeOpenAIServer(0, args.latencia).iniciar()
+    tmp = tempfile.mkdtemp()
+    for nombre, contenido in (("asignacion.csv", _ASIGNACION), ("tdr.csv", _TDR)):
+        with open(os.path.join(tmp, nombre), "w", encoding="utf-8") as f:
+            f.write(contenido)
+    os.environ.update({
+        "OPENAI_BASE_URL": servidor.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "SHEET_URL_ASIGNACION": os.path.join(tmp, "asignacion.csv"),
+        "SHEET_URL_TDR": os.path.join(tmp, "tdr.csv"),
+    })
+
+    from services import openai_service
+    from services import openai_async_service
+
+    openai_service.obtener_referencias()  # precalentar la cache de referencias
+    descripcion = "No puedo crear un aula virtual nueva, el sistema muestra error al guardar."
+
+    # Todas las peticiones "llegan" a la vez: la latencia incluye la espera en cola
+    def sync_una():
+        openai_service.analizar_ticket_completo(descripcion, {"TICKET": "1"})
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(args.hilos) as pool:
+        lat_sync = list(pool.map(lambda _: sync_una(), range(args.peticiones)))
+    total_sync = time.perf_counter() - inicio
+
+    async def async_una():
+        await openai_async_service.analizar_ticket_completo_async(descripcion, {"TICKET": "1"})
+        return time.perf_counter() - inicio
+
+    async def todas():
+        return await asyncio.gather(*(async_una() for _ in range(args.peticiones)))
+
+    inicio = time.perf_counter()
+    lat_async = openai_async_service.ejecutar(todas())
+    total_async = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "peticiones": args.peticiones,
+        "latencia_llm_s": args.latencia,
+        "sync": {"hilos": args.hilos, **_resumen(lat_sync, total_sync)},
+        "async": {"max_concurrencia": openai_async_service.OPENAI_MAX_CONCURRENCIA, **_resumen(lat_async, total_async)},
+        "llamadas_llm": servidor.llamadas,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
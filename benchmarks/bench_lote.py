@@ -0,0 +1,56 @@
+"""
+Throughput de la clasificación por lotes contra el fake de OpenAI local,
+variando el número de trabajadores (cache LLM desactivada).
+
+    python -m benchmarks.bench_lote --tickets 60 --trabajadores 1 4 8 --latencia 0.2
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.sinteticos import generar_csv_tickets
+
+_ASIGNACION = """CATEGORIA_REQUERIMIENTO,REQUERIMIENTO,EQUIPO,DNI_ENCARGO_PROCESO,Encargdo del proceso,Rol del proceso,DNI_COORDINADOR_PROCESO,coordinador del proceso
+Aula virtual,Crear aula,Plataforma,01234567,Ana Perez,Gestor,07654321,Luis Diaz
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=60)
+    parser.add_argument("--trabajadores", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latencia", type=float, default=0.2)
+    parser.add_argument("--llamadas-por-segundo", type=float, default=1000)
+    args = parser.parse_args()
+
+    servidor = FakeOpenAIServer(0, args.latencia).iniciar()
+    tmp = tempfile.mkdtemp()
+    with open(os.path.join(tmp, "asignacion.csv"), "w") as f:
+        f.write(_ASIGNACION)
+    with open(os.path.join(tmp, "tdr.csv"), "w", encoding="utf-8") as f:
+        f.write("DNI,CONTRATISTA,Actividades,DENOMINACIÓN,ENTREGABLE,PRODUCTOS\n"
+                "01234567,Ana Perez,Gestionar aulas,Especialista funcional TI,Informe mensual,Informe 1\n")
+    os.environ.update({
+        "OPENAI_BASE_URL": servidor.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "SHEET_URL": generar_csv_tickets(args.tickets, os.path.join(tmp, "tickets.csv")),
+        "SHEET_URL_ASIGNACION": os.path.join(tmp, "asignacion.csv"),
+        "SHEET_URL_TDR": os.path.join(tmp, "tdr.csv"),
+        "LOTE_MAX_TRABAJADORES": str(max(args.trabajadores)),
+    })
+
+    from services.batch_service import seleccionar_tickets, clasificar_lote
+
+    tickets = seleccionar_tickets(limite=args.tickets)
+    resultados = []
+    for n in args.trabajadores:
+        *_, resumen = clasificar_lote(tickets, trabajadores=n, llamadas_por_segundo=args.llamadas_por_segundo)
+        resultados.append({"trabajadores": n, **resumen["resumen"]})
+    print(json.dumps({"latencia_llm_s": args.latencia, "resultados": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
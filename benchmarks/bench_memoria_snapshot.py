@@ -0,0 +1,57 @@
+"""
+Compara memoria y tiempo de la representación lista-de-dicts anterior
+frente al snapshot columnar tipado que comparten hoy todas las rutas.
+
+    python -m benchmarks.bench_memoria_snapshot --filas 100000
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.sinteticos import generar_tickets
+from services.etl_service import compute_kpis
+from services.google_sheets_service import _parsear_tickets
+
+
+def _medir(fn):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = fn()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    retenido = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, {"segundos": round(segundos, 4), "mb_retenidos": round(retenido / 2**20, 2), "mb_pico": round(pico / 2**20, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    contenido = generar_tickets(args.filas).to_csv(index=False).encode()
+
+    def lista_de_dicts():
+        df = pd.read_csv(io.BytesIO(contenido), dtype={"DOCUMENTO": str, "DNI_ESPECIALISTA FUNCIONAL": str}).fillna("")
+        return df.to_dict(orient="records")
+
+    registros, m_lista = _medir(lista_de_dicts)
+    df, m_columnar = _medir(lambda: _parsear_tickets(contenido))
+
+    # Costo por consumidor: antes cada uno reconstruía un DataFrame
+    _, kpis_lista = _medir(lambda: compute_kpis(registros))
+    _, kpis_columnar = _medir(lambda: compute_kpis(df))
+
+    print(json.dumps({
+        "filas": args.filas,
+        "carga": {"lista_de_dicts": m_lista, "columnar": m_columnar},
+        "compute_kpis": {"lista_de_dicts": kpis_lista, "columnar": kpis_columnar},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
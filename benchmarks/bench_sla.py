@@ -0,0 +1,72 @@
+"""
+Entrena el modelo de riesgo SLA con tickets sintéticos y compara la
+predicción anterior (iterrows + aleatorio) con la predicción vectorizada
+en lote, en frío y con el resultado ya memorizado para el snapshot.
+
+    python -m benchmarks.bench_sla --filas 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.sinteticos import generar_tickets
+from services import model_predict_service
+from services.google_sheets_service import _tipar_columnas
+
+
+def _prediccion_anterior(df):
+    resultados = []
+    for _, row in df.iterrows():
+        riesgo = random.uniform(0, 1)
+        resultados.append({
+            "TICKET": row.get("TICKET", ""),
+            "PRIORIDAD": row.get("PRIORIDAD", ""),
+            "riesgo_sla": round(riesgo, 2),
+            "alerta": "ALTA" if riesgo > 0.7 else "MEDIA" if riesgo > 0.4 else "BAJA"
+        })
+    return resultados
+
+
+def _cronometrar(fn, *args):
+    inicio = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - inicio
+
+
+def _resultado(filas, segundos):
+    return {"segundos": round(segundos, 4), "filas_por_s": round(filas / segundos) if segundos else None}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = _tipar_columnas(generar_tickets(args.filas))
+    ruta = os.path.join(tempfile.mkdtemp(), "sla_riesgo.joblib")
+
+    inicio = time.perf_counter()
+    metricas = model_predict_service.entrenar_modelo(df, ruta)
+    entrenamiento = time.perf_counter() - inicio
+    model_predict_service.recargar_modelo(ruta)
+
+    anterior = _cronometrar(_prediccion_anterior, df)
+    frio = _cronometrar(model_predict_service.predict_sla_risk, df)
+    memo = _cronometrar(model_predict_service.predict_sla_risk, df)
+    solo_modelo = _cronometrar(model_predict_service.riesgo_sla, df)
+
+    print(json.dumps({
+        "filas": args.filas,
+        "entrenamiento": {"segundos": round(entrenamiento, 2), **metricas},
+        "anterior_iterrows": _resultado(args.filas, anterior),
+        "vectorizado_predict_proba": _resultado(args.filas, solo_modelo),
+        "vectorizado_con_serializacion": _resultado(args.filas, frio),
+        "memorizado_por_snapshot": _resultado(args.filas, memo),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+POST /api/ai-ticket (respuesta en bloque) frente a GET
+/api/ai-ticket/<id>/stream (Server-Sent Events): tiempo hasta el primer
+contenido, hasta la clasificación, hasta el primer fragmento de la
+respuesta sugerida y total, contra el fake de OpenAI (que también
+simula stream=True).
+
+    python -m benchmarks.bench_sse --latencia 1.0 --repeticiones 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.sinteticos import escribir_hojas
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _servir(puerto):
+    from werkzeug.serving import run_simple
+    from app import app
+    run_simple("127.0.0.1", puerto, app, threaded=True)
+
+
+def _bloque(base, ticket):
+    inicio = time.perf_counter()
+    resp = requests.post(base + "/api/ai-ticket", json={"ticket_id": ticket}, timeout=120)
+    resp.raise_for_status()
+    total = time.perf_counter() - inicio
+    return {"primer_contenido_s": total, "clasificacion_s": total, "primer_token_s": total, "total_s": total}
+
+
+def _sse(base, ticket):
+    inicio = time.perf_counter()
+    tiempos, evento = {}, None
+    with requests.get(f"{base}/api/ai-ticket/{ticket}/stream", stream=True, timeout=120) as resp:
+        for linea in resp.iter_lines(decode_unicode=True):
+            if linea.startswith("event: "):
+                evento = linea[len("event: "):]
+                tiempos.setdefault(evento, time.perf_counter() - inicio)
+    return {
+        "primer_contenido_s": tiempos.get("ticket"),
+        "clasificacion_s": tiempos.get("clasificacion"),
+        "primer_token_s": tiempos.get("respuesta_delta", tiempos.get("respuesta")),
+        "total_s": tiempos.get("fin"),
+    }
+
+
+def _mediana(muestras):
+    return {k: round(statistics.median(m[k] for m in muestras), 3) for k in muestras[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latencia", type=float, default=1.0)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--servir", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.servir:
+        return _servir(args.servir)
+
+    tmp = tempfile.mkdtemp()
+    escribir_hojas(tmp, 1000)
+    openai_fake = FakeOpenAIServer(0, args.latencia).iniciar()
+    entorno = {
+        **os.environ,
+        "SHEET_URL": os.path.join(tmp, "tickets.csv"),
+        "SHEET_URL_ASIGNACION": os.path.join(tmp, "asignacion.csv"),
+        "SHEET_URL_TDR": os.path.join(tmp, "tdr.csv"),
+        "OPENAI_BASE_URL": openai_fake.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "SNAPSHOT_DIR": "",
+        "CLASIFICADOR_PATH": "",
+    }
+
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_sse", "--servir", str(puerto)],
+                               env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{puerto}"
+    try:
+        for _ in range(200):
+            try:
+                requests.get(base + "/api/kpis", timeout=60)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        # Tickets distintos por repetición: sin aciertos de la cache LLM entre variantes
+        resultados = {
+            "POST /api/ai-ticket (bloque)": _mediana([_bloque(base, str(i + 1)) for i in range(args.repeticiones)]),
+            "GET /api/ai-ticket/<id>/stream (SSE)": _mediana(
+                [_sse(base, str(100 + i)) for i in range(args.repeticiones)]),
+        }
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+    print(json.dumps({"latencia_llm_s": args.latencia, "resultados": resultados}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compara la serialización en bloque anterior (to_json / jsonify) con la
+serialización en streaming (orjson por lotes) de /api/tickets-completo y
+/api/tickets: tiempo hasta el primer byte, tiempo total y pico de RSS del
+proceso servidor durante la petición.
+
+    python -m benchmarks.bench_streaming_json --filas 200000
+
+Cada variante corre en un servidor Flask propio (subproceso) para que los
+picos de memoria no se mezclen. El pico se mide con VmHWM de /proc (Linux),
+reiniciado después de cargar el snapshot.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.sinteticos import generar_csv_tickets
+
+VARIANTES = [
+    ("tickets-completo en bloque", "/api/tickets-completo?stream=0"),
+    ("tickets-completo streaming", "/api/tickets-completo"),
+    ("tickets-completo ndjson", "/api/tickets-completo?formato=ndjson"),
+    ("tickets en bloque", "/api/tickets?stream=0"),
+    ("tickets streaming", "/api/tickets"),
+]
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _memoria_kb(pid, campo):
+    with open(f"/proc/{pid}/status") as f:
+        for linea in f:
+            if linea.startswith(campo + ":"):
+                return int(linea.split()[1])
+    return 0
+
+
+def _servir(puerto):
+    from werkzeug.serving import run_simple
+    from app import app
+    run_simple("127.0.0.1", puerto, app, threaded=True)
+
+
+def _medir(csv, ruta):
+    puerto = _puerto_libre()
+    entorno = {**os.environ, "SHEET_URL": csv, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake")}
+    proceso = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_streaming_json", "--servir", str(puerto)],
+                               env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{puerto}"
+    try:
+        for _ in range(200):
+            try:
+                requests.get(base + "/api/kpis", timeout=120)  # carga el snapshot
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        with open(f"/proc/{proceso.pid}/clear_refs", "w") as f:
+            f.write("5")  # reinicia VmHWM al RSS actual
+        rss_base = _memoria_kb(proceso.pid, "VmRSS")
+
+        inicio = time.perf_counter()
+        resp = requests.get(base + ruta, stream=True, headers={"Accept-Encoding": "identity"}, timeout=300)
+        bytes_total, primer_byte = 0, None
+        for parte in resp.iter_content(64 * 1024):
+            if primer_byte is None:
+                primer_byte = time.perf_counter() - inicio
+            bytes_total += len(parte)
+        total = time.perf_counter() - inicio
+        pico = _memoria_kb(proceso.pid, "VmHWM")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return {
+        "ttfb_s": round(primer_byte or total, 3),
+        "total_s": round(total, 3),
+        "mb_respuesta": round(bytes_total / 2**20, 2),
+        "mb_pico_sobre_base": round((pico - rss_base) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--servir", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.servir:
+        return _servir(args.servir)
+
+    csv = generar_csv_tickets(args.filas, os.path.join(tempfile.mkdtemp(), "tickets.csv"))
+    resultados = {nombre: _medir(csv, ruta) for nombre, ruta in VARIANTES}
+    print(json.dumps({"filas": args.filas, "resultados": resultados}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
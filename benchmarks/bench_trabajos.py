@@ -0,0 +1,161 @@
+"""
+Latencia del dashboard mientras hay análisis IA pendientes: N clientes
+piden análisis de tickets a la vez y otro cliente mide /api/kpis y
+/api/tickets?estado= durante la carga.
+
+  - sincrono: POST /api/ai-ticket (cada petición ocupa un worker de gunicorn)
+  - trabajos: POST /api/ai-ticket/trabajos + consulta de /api/trabajos/<id>/resultado
+
+    python -m benchmarks.bench_trabajos --concurrentes 16 --latencia 1.0
+
+Se levanta gunicorn con la configuración de render.yaml anterior (1 worker
+sync) y con la actual (gthread); además se verifica la deduplicación (el
+mismo ticket enviado varias veces) y el backpressure (429 con la cola llena).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.sinteticos import escribir_hojas
+
+CONFIGURACIONES = {
+    "sync 1 worker": ["--workers", "1"],
+    "gthread 1x8": ["--workers", "1", "--worker-class", "gthread", "--threads", "8"],
+}
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _gunicorn(puerto, opciones, entorno):
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{puerto}", "--timeout", "120", *opciones, "app:app"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{puerto}"
+    for _ in range(300):
+        try:
+            requests.get(base + "/api/kpis", timeout=60)
+            return proceso, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError("gunicorn no arrancó")
+
+
+def _sincrono(base, ticket):
+    requests.post(base + "/api/ai-ticket", json={"ticket_id": ticket}, timeout=300).raise_for_status()
+
+
+def _con_trabajo(base, ticket):
+    resp = requests.post(base + "/api/ai-ticket/trabajos", json={"ticket_id": ticket}, timeout=60)
+    resp.raise_for_status()
+    url = base + resp.json()["url_resultado"]
+    while True:
+        resp = requests.get(url, timeout=60)
+        if resp.status_code != 202:
+            resp.raise_for_status()
+            return
+        time.sleep(0.2)
+
+
+def _medir_dashboard(base, detener, latencias):
+    rutas = ["/api/kpis", "/api/tickets?estado=Pendiente&limit=50"]
+    i = 0
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        requests.get(base + rutas[i % len(rutas)], timeout=300)
+        latencias.append(time.perf_counter() - inicio)
+        i += 1
+        time.sleep(0.05)
+
+
+def _escenario(base, modo, concurrentes, primer_ticket):
+    latencias, detener = [], threading.Event()
+    medidor = threading.Thread(target=_medir_dashboard, args=(base, detener, latencias))
+    medidor.start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrentes) as pool:
+        list(pool.map(lambda i: modo(base, str(primer_ticket + i)), range(concurrentes)))
+    total = time.perf_counter() - inicio
+    detener.set()
+    medidor.join()
+    latencias.sort()
+    return {
+        "analisis_total_s": round(total, 2),
+        "dashboard_peticiones": len(latencias),
+        "dashboard_p50_ms": round(statistics.median(latencias) * 1000, 1),
+        "dashboard_max_ms": round(latencias[-1] * 1000, 1),
+    }
+
+
+def _dedup_y_backpressure(base, max_pendientes):
+    ids = {requests.post(base + "/api/ai-ticket/trabajos", json={"ticket_id": "500"}, timeout=60).json()["id"]
+           for _ in range(10)}
+    estados = [requests.post(base + "/api/ai-ticket/trabajos", json={"ticket_id": str(600 + i)}, timeout=60).status_code
+               for i in range(max_pendientes + 5)]
+    return {"envios_mismo_ticket": 10, "trabajos_distintos": len(ids),
+            "envios_distintos": len(estados), "aceptados_202": estados.count(202), "rechazados_429": estados.count(429)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrentes", type=int, default=16)
+    parser.add_argument("--latencia", type=float, default=1.0)
+    parser.add_argument("--max-pendientes", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    escribir_hojas(tmp, 10_000)
+    openai_fake = FakeOpenAIServer(0, args.latencia).iniciar()
+    entorno = {
+        **os.environ,
+        "SHEET_URL": os.path.join(tmp, "tickets.csv"),
+        "SHEET_URL_ASIGNACION": os.path.join(tmp, "asignacion.csv"),
+        "SHEET_URL_TDR": os.path.join(tmp, "tdr.csv"),
+        "OPENAI_BASE_URL": openai_fake.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "SNAPSHOT_DIR": "",
+        "CLASIFICADOR_PATH": "",
+        "JOBS_DB_PATH": os.path.join(tmp, "trabajos.sqlite3"),
+        "JOBS_MAX_PENDIENTES": str(args.max_pendientes),
+    }
+
+    resultados = {}
+    for nombre, opciones in CONFIGURACIONES.items():
+        proceso, base = _gunicorn(_puerto_libre(), opciones, entorno)
+        try:
+            resultados[f"{nombre}, POST /api/ai-ticket"] = _escenario(base, _sincrono, args.concurrentes, 1)
+            resultados[f"{nombre}, trabajos"] = _escenario(base, _con_trabajo, args.concurrentes, 1000)
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+    proceso, base = _gunicorn(_puerto_libre(), CONFIGURACIONES["gthread 1x8"], entorno)
+    try:
+        resultados["deduplicacion y backpressure"] = _dedup_y_backpressure(base, args.max_pendientes)
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+    print(json.dumps({"concurrentes": args.concurrentes, "latencia_llm_s": args.latencia,
+                      "resultados": resultados}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
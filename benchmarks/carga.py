@@ -0,0 +1,285 @@
+"""
+Prueba de carga de punta a punta: usuarios concurrentes del dashboard
+contra gunicorn, con hojas servidas por HTTP local (en lugar de Google
+Sheets) y el fake de OpenAI, ambos con latencia configurable.
+
+    python -m benchmarks.carga --filas 100000 --usuarios 1 10 25 50 \\
+        --configs sync:2x1 gthread:1x8 gthread:2x4 --duracion 20 --salida carga.json
+
+Cada usuario virtual repite (bucle cerrado, con tiempo de pensar) una
+mezcla ponderada de /dashboard, /api/tickets?estado=, /api/tickets-completo
+y /api/ai-ticket. Por configuración de gunicorn y nivel de concurrencia se
+reporta el throughput, percentiles de latencia (total y por ruta), errores
+y el pico de RSS de cada worker; además, la mayor concurrencia con p99
+dentro del objetivo (--p99-objetivo-ms) en las rutas del dashboard (el
+análisis IA se reporta aparte: su latencia la domina el LLM).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.servidor_hojas import ServidorHojas
+from benchmarks.sinteticos import ESTADOS, escribir_hojas
+
+# (nombre, peso, método, ruta o función(filas, rng) -> ruta, cuerpo)
+MEZCLA = [
+    ("/dashboard", 30, "get", lambda filas, rng: ("/dashboard", None)),
+    ("/api/tickets?estado=", 40, "get", lambda filas, rng: (f"/api/tickets?estado={rng.choice(ESTADOS)}", None)),
+    ("/api/tickets-completo", 10, "get", lambda filas, rng: ("/api/tickets-completo", None)),
+    ("/api/ai-ticket", 20, "post",
+     lambda filas, rng: ("/api/ai-ticket", {"ticket_id": str(rng.randint(1, filas))})),
+]
+# Rutas cuya latencia depende del LLM: no cuentan para el objetivo de p99
+RUTAS_LLM = {"/api/ai-ticket"}
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentil(ordenados, p):
+    return ordenados[min(int(p / 100 * len(ordenados)), len(ordenados) - 1)]
+
+
+def _resumen(latencias):
+    if not latencias:
+        return {"peticiones": 0}
+    ordenados = sorted(latencias)
+    return {
+        "peticiones": len(ordenados),
+        "p50_ms": round(_percentil(ordenados, 50) * 1000, 1),
+        "p90_ms": round(_percentil(ordenados, 90) * 1000, 1),
+        "p99_ms": round(_percentil(ordenados, 99) * 1000, 1),
+        "max_ms": round(ordenados[-1] * 1000, 1),
+        "media_ms": round(statistics.fmean(ordenados) * 1000, 1),
+    }
+
+
+# =====================================
+# 🔹 GUNICORN Y MEMORIA POR WORKER
+# =====================================
+def _opciones_gunicorn(config):
+    """'gthread:2x4' -> 2 workers gthread de 4 hilos; 'sync:3x1' -> 3 workers sync."""
+    clase, _, forma = config.partition(":")
+    workers, _, hilos = (forma or "1x1").partition("x")
+    opciones = ["--worker-class", clase, "--workers", workers]
+    if clase == "gthread":
+        opciones += ["--threads", hilos or "1"]
+    return opciones
+
+
+def _hijos(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class MuestreoMemoria(threading.Thread):
+    """Pico de RSS de cada worker de gunicorn (hijos del master), muestreado cada 200 ms."""
+
+    def __init__(self, pid_master):
+        super().__init__(daemon=True)
+        self.pid_master = pid_master
+        self.picos = defaultdict(int)
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.is_set():
+            for pid in _hijos(self.pid_master):
+                self.picos[pid] = max(self.picos[pid], _rss_kb(pid))
+            time.sleep(0.2)
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+        return {str(pid): round(kb / 1024, 1) for pid, kb in sorted(self.picos.items())}
+
+
+def _arrancar_gunicorn(config, entorno):
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{puerto}", "--timeout", "300",
+         *_opciones_gunicorn(config), "app:app"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{puerto}"
+    for _ in range(600):
+        try:
+            # Calienta los snapshots de todos los workers (cada uno carga el suyo)
+            for _ in range(max(len(_hijos(proceso.pid)), 1) * 2):
+                requests.get(base + "/api/kpis", timeout=300)
+            return proceso, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError(f"gunicorn ({config}) no arrancó")
+
+
+# =====================================
+# 🔹 USUARIOS VIRTUALES
+# =====================================
+def _usuario(base, filas, mezcla, fin, pensar, semilla, registros):
+    rng = random.Random(semilla)
+    sesion = requests.Session()
+    nombres = [m[0] for m in mezcla]
+    pesos = [m[1] for m in mezcla]
+    por_nombre = {m[0]: m for m in mezcla}
+    while time.perf_counter() < fin:
+        nombre = rng.choices(nombres, pesos)[0]
+        _, _, metodo, armar = por_nombre[nombre]
+        ruta, cuerpo = armar(filas, rng)
+        inicio = time.perf_counter()
+        try:
+            resp = sesion.request(metodo, base + ruta, json=cuerpo, timeout=300)
+            resp.content  # descarga completa (incluye respuestas en streaming)
+            ok = resp.status_code < 500
+        except requests.RequestException:
+            ok = False
+        registros.append((nombre, time.perf_counter() - inicio, ok, inicio))
+        if pensar:
+            time.sleep(rng.expovariate(1 / pensar))
+
+
+def _nivel(base, filas, usuarios, duracion, pensar, mezcla):
+    registros = []
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    hilos = [threading.Thread(target=_usuario, args=(base, filas, mezcla, fin, pensar, i, registros))
+             for i in range(usuarios)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    ok = [r for r in registros if r[2]]
+    por_ruta = defaultdict(list)
+    for nombre, segundos, exito, _ in ok:
+        por_ruta[nombre].append(segundos)
+    return {
+        "usuarios": usuarios,
+        "duracion_s": round(transcurrido, 2),
+        "throughput_rps": round(len(ok) / transcurrido, 2),
+        "errores": len(registros) - len(ok),
+        "total": _resumen([r[1] for r in ok]),
+        "dashboard": _resumen([r[1] for r in ok if r[0] not in RUTAS_LLM]),
+        "por_ruta": {nombre: _resumen(por_ruta[nombre]) for nombre, *_ in mezcla},
+    }
+
+
+def _probar_config(config, entorno, args, mezcla):
+    proceso, base = _arrancar_gunicorn(config, entorno)
+    memoria = MuestreoMemoria(proceso.pid)
+    memoria.start()
+    niveles = []
+    try:
+        for usuarios in args.usuarios:
+            print(f"  ▶ {config}: {usuarios} usuarios...", file=sys.stderr)
+            niveles.append(_nivel(base, args.filas, usuarios, args.duracion, args.pensar, mezcla))
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    dentro = [n["usuarios"] for n in niveles if n["dashboard"].get("p99_ms", float("inf")) <= args.p99_objetivo_ms
+              and n["errores"] == 0]
+    return {
+        "config": config,
+        "opciones_gunicorn": " ".join(_opciones_gunicorn(config)),
+        "max_usuarios_dentro_objetivo": max(dentro) if dentro else None,
+        "rss_pico_mb_por_worker": memoria.detener(),
+        "niveles": niveles,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[1, 10, 25, 50])
+    parser.add_argument("--configs", nargs="+", default=["sync:2x1", "gthread:1x8", "gthread:2x4"],
+                        help="clase:workersxhilos de gunicorn")
+    parser.add_argument("--duracion", type=float, default=20, help="segundos por nivel de concurrencia")
+    parser.add_argument("--pensar", type=float, default=0.5, help="tiempo medio de pensar entre peticiones (s)")
+    parser.add_argument("--latencia-llm", type=float, default=1.0)
+    parser.add_argument("--latencia-hojas", type=float, default=0.5)
+    parser.add_argument("--p99-objetivo-ms", type=float, default=1000, help="p99 máximo de las rutas del dashboard")
+    parser.add_argument("--mezcla", help='pesos por ruta en JSON, p.ej. \'{"/api/ai-ticket": 0}\'')
+    parser.add_argument("--salida", help="archivo JSON de resultados (además de stdout)")
+    args = parser.parse_args()
+
+    pesos = json.loads(args.mezcla) if args.mezcla else {}
+    mezcla = [(nombre, pesos.get(nombre, peso), metodo, armar) for nombre, peso, metodo, armar in MEZCLA]
+    mezcla = [m for m in mezcla if m[1] > 0]
+
+    tmp = tempfile.mkdtemp()
+    print(f"▶ Generando hojas de {args.filas} filas...", file=sys.stderr)
+    escribir_hojas(tmp, args.filas)
+    hojas = ServidorHojas(tmp, latencia=args.latencia_hojas).iniciar()
+    openai_fake = FakeOpenAIServer(0, args.latencia_llm).iniciar()
+    entorno = {
+        **os.environ,
+        "SHEET_URL": hojas.url("tickets.csv"),
+        "SHEET_URL_ASIGNACION": hojas.url("asignacion.csv"),
+        "SHEET_URL_TDR": hojas.url("tdr.csv"),
+        "OPENAI_BASE_URL": openai_fake.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "SNAPSHOT_DIR": os.path.join(tmp, "espejo"),
+        "JOBS_DB_PATH": os.path.join(tmp, "trabajos.sqlite3"),
+        "MODELO_SLA_PATH": os.getenv("MODELO_SLA_PATH", os.path.join(tmp, "sin_modelo.joblib")),
+    }
+
+    resultados = []
+    for config in args.configs:
+        print(f"▶ gunicorn {config}", file=sys.stderr)
+        resultados.append(_probar_config(config, entorno, args, mezcla))
+
+    informe = json.dumps({
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "filas": args.filas,
+        "latencia_llm_s": args.latencia_llm,
+        "latencia_hojas_s": args.latencia_hojas,
+        "pensar_s": args.pensar,
+        "mezcla": {nombre: peso for nombre, peso, *_ in mezcla},
+        "p99_objetivo_ms": args.p99_objetivo_ms,
+        "llamadas_llm": openai_fake.llamadas,
+        "descargas_hojas": {"200": hojas.descargas, "304": hojas.no_modificadas},
+        "resultados": resultados,
+    }, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(informe)
+    print(informe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Servidor HTTP local que imita la API de respuestas de OpenAI (/v1/responses)
+con latencia configurable. Contesta según el tipo de prompt de openai_service:
+tipo de requerimiento, clasificación completa o respuesta sugerida.
+`fallos` (p.ej. [429, 500]) hace que las siguientes peticiones respondan
+esos códigos de error, y `max_en_curso` registra la concurrencia máxima
+observada (para los tests de reintentos y del semáforo).
+
+    python -m benchmarks.fake_openai --puerto 8900 --latencia 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=x python app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _texto_para(prompt):
+    if "SOLO el tipo de requerimiento" in prompt:
+        return json.dumps({"tipo_requerimiento": "Aula virtual"})
+    if "Clasifica el siguiente ticket de soporte" in prompt:
+        return "```json\n" + json.dumps({
+            "tipo_requerimiento": "Aula virtual",
+            "requerimiento": "Crear aula",
+            "prioridad": "Media",
+            "area_asignada": "Plataforma",
+            "resumen_corto": "Error al crear aula virtual",
+        }) + "\n```"
+    return "Estimado usuario, su requerimiento ha sido clasificado y será atendido.\n\nSaludos cordiales,\nárea de DIFODS"
+
+
+def _respuesta(texto, modelo):
+    return {
+        "id": "resp_fake",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": modelo,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_fake",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": texto, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": 120, "output_tokens": 40, "total_tokens": 160,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, puerto=0, latencia=0.3):
+        self.latencia = latencia
+        self.llamadas = 0
+        self.fallos = []
+        self.en_curso = 0
+        self.max_en_curso = 0
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", puerto), _Handler)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def iniciar(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        cuerpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        servidor = self.server
+        with servidor._lock:
+            servidor.llamadas += 1
+            fallo = servidor.fallos.pop(0) if servidor.fallos else None
+            servidor.en_curso += 1
+            servidor.max_en_curso = max(servidor.max_en_curso, servidor.en_curso)
+        try:
+            self._responder(cuerpo, fallo)
+        finally:
+            with servidor._lock:
+                servidor.en_curso -= 1
+
+    def _responder(self, cuerpo, fallo):
+        prompt = cuerpo.get("input", "")
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt, ensure_ascii=False)
+        if fallo is None and cuerpo.get("stream"):
+            return self._stream(_respuesta(_texto_para(prompt), cuerpo.get("model", "")))
+
+        time.sleep(self.server.latencia)
+        if fallo is None:
+            estado, datos = 200, _respuesta(_texto_para(prompt), cuerpo.get("model", ""))
+        else:
+            estado, datos = fallo, {"error": {"message": f"Error simulado {fallo}", "type": "fake", "code": None}}
+        datos = json.dumps(datos).encode()
+
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+    def _stream(self, respuesta):
+        """
+        Eventos SSE de la API de respuestas (stream=True): el primer token
+        llega al 20% de la latencia y el resto se reparte en el tiempo restante.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def enviar(evento, datos):
+            bloque = f"event: {evento}\ndata: {json.dumps(datos)}\n\n".encode()
+            self.wfile.write(f"{len(bloque):x}\r\n".encode() + bloque + b"\r\n")
+            self.wfile.flush()
+
+        texto = respuesta["output"][0]["content"][0]["text"]
+        partes = [p + " " for p in texto.split(" ")]
+        partes[-1] = partes[-1][:-1]
+        enviar("response.created", {"type": "response.created", "sequence_number": 0,
+                                    "response": {**respuesta, "status": "in_progress", "output": []}})
+        time.sleep(self.server.latencia * 0.2)
+        for i, parte in enumerate(partes, start=1):
+            enviar("response.output_text.delta", {
+                "type": "response.output_text.delta", "item_id": "msg_fake", "output_index": 0,
+                "content_index": 0, "delta": parte, "logprobs": [], "sequence_number": i,
+            })
+            time.sleep(self.server.latencia * 0.8 / len(partes))
+        enviar("response.completed", {"type": "response.completed", "response": respuesta,
+                                      "sequence_number": len(partes) + 1})
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--puerto", type=int, default=8900)
+    parser.add_argument("--latencia", type=float, default=0.3)
+    args = parser.parse_args()
+    servidor = FakeOpenAIServer(args.puerto, args.latencia)
+    print(f"Fake OpenAI en {servidor.base_url} (latencia {args.latencia}s)")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Servidor HTTP local que reemplaza los export CSV de Google Sheets: sirve
+los archivos de un directorio con ETag / Last-Modified (responde 304 si no
+cambiaron) y latencia configurable.
+
+    python -m benchmarks.servidor_hojas --directorio /tmp/hojas --puerto 8901
+    SHEET_URL=http://127.0.0.1:8901/tickets.csv python app.py
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ServidorHojas(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, directorio, puerto=0, latencia=0.0):
+        self.directorio = directorio
+        self.latencia = latencia
+        self.descargas = 0
+        self.no_modificadas = 0
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", puerto), _Handler)
+
+    def url(self, nombre):
+        return f"http://127.0.0.1:{self.server_address[1]}/{nombre}"
+
+    def iniciar(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        ruta = os.path.join(self.server.directorio, os.path.basename(self.path.split("?")[0]))
+        if not os.path.isfile(ruta):
+            self.send_error(404)
+            return
+        time.sleep(self.server.latencia)
+
+        estado = os.stat(ruta)
+        etag = '"' + hashlib.sha1(f"{estado.st_mtime_ns}-{estado.st_size}".encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server._contar("no_modificadas")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        self.server._contar("descargas")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(estado.st_mtime, usegmt=True))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--directorio", required=True)
+    parser.add_argument("--puerto", type=int, default=8901)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--filas", type=int, help="generar hojas sintéticas con este número de tickets")
+    args = parser.parse_args()
+    if args.filas:
+        from benchmarks.sinteticos import escribir_hojas
+        escribir_hojas(args.directorio, args.filas)
+    servidor = ServidorHojas(args.directorio, args.puerto, args.latencia)
+    print(f"Hojas de {args.directorio} en {servidor.url('')} (latencia {args.latencia}s)")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# =====================================
+# 🔹 GENERADOR DE TICKETS SINTÉTICOS
+# =====================================
+ESTADOS = ["Cerrado", "Atendido", "En proceso", "Pendiente", "Asignado"]
+DIRECCIONES = ["DIFODS", "DIGEDD", "DIGEBR", "DITEN", "DIGC"]
+# AREA es el área del solicitante; ÁREA TI es el equipo que atiende (EQUIPO de la hoja de asignación)
+AREAS = ["GESTIÓN PEDAGÓGICA", "FORMACIÓN EN SERVICIO", "MONITOREO, SEGUIMIENTO Y EVALUACIÓN",
+         "PLANIFICACIÓN", "ADMINISTRACIÓN", "COMUNICACIONES"]
+EQUIPOS = ["SOPORTE", "PLATAFORMA", "CONTENIDOS", "CERTIFICACION", "MONITOREO", "CAPACITACION"]
+PROGRAMAS = ["Programa de Inducción Docente", "Formación de Directivos", "Acompañamiento Pedagógico"]
+NIVELES_AVANCE = ["0%", "25%", "50%", "75%", "100%"]
+TIPOS_TICKET = ["Incidencia", "Requerimiento", "Consulta"]
+TIPOS = ["Acceso a plataforma", "Certificados", "Aula virtual", "Reportes", "Matrícula"]
+PRIORIDADES = ["Alta", "Media", "Baja"]
+REQUERIMIENTOS_POR_TIPO = 20
+ESPECIALISTAS = 40
+DNI_BASE_ESPECIALISTA = 40_000_000
+
+
+def generar_tickets(n, semilla=0):
+    """
+    DataFrame de `n` tickets con las mismas columnas (y en el mismo orden)
+    que la hoja real, incluidas las que solo lee la tabla del dashboard.
+    """
+    rng = np.random.default_rng(semilla)
+    # Se formatean solo los días posibles y luego se indexan (mucho más rápido)
+    dias = (pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(730), unit="D")).strftime("%d/%m/%Y").to_numpy()
+    horas = np.array([f"{h:02d}:{m:02d}" for h in range(8, 18) for m in (0, 15, 30, 45)])
+    registro = rng.integers(0, 700, n)
+    derivacion = registro + rng.integers(0, 2, n)
+    asignacion = derivacion + rng.integers(0, 3, n)
+    final = asignacion + rng.integers(0, 28, n)
+    especialista = rng.integers(1, ESPECIALISTAS + 1, n)
+    documento = rng.integers(10_000_000, 80_000_000, n).astype(str)
+    estado = rng.choice(ESTADOS, n)
+    cerrado = np.isin(estado, ["Cerrado", "Atendido"])
+    return pd.DataFrame({
+        "TICKET": np.arange(1, n + 1),
+        "FECHA DE REGISTRO": dias[registro],
+        "DOCUMENTO": documento,
+        "NOMBRES Y APELLIDOS": [f"Usuario {i}" for i in range(1, n + 1)],
+        "CELULAR": rng.integers(900_000_000, 999_999_999, n).astype(str),
+        "CORREO": np.char.add(np.char.add("usuario", documento), "@minedu.gob.pe"),
+        "TIPO REQUERIMIENTO": rng.choice(TIPOS, n),
+        "REQUERIMIENTO": [f"Requerimiento {r}" for r in rng.integers(1, REQUERIMIENTOS_POR_TIPO + 1, n)],
+        "DESCRIPCION": [f"No puedo acceder al curso {c}, el sistema muestra un error al guardar."
+                        for c in rng.integers(1, 501, n)],
+        "ENLACE DE RECURSOS": np.where(rng.random(n) < 0.3, "https://drive.google.com/file/d/recurso", ""),
+        "DIRECCION": rng.choice(DIRECCIONES, n),
+        "AREA": rng.choice(AREAS, n),
+        "PROGRAMA": rng.choice(PROGRAMAS, n),
+        "ESTADO": estado,
+        "RESPUESTA": np.where(cerrado, "Se atendió el requerimiento, por favor verificar.", ""),
+        "FECHA DE DERIVACIÓN": dias[derivacion],
+        "HORA DE DERIVACIÓN": rng.choice(horas, n),
+        "FECHA DE ATENCIÓN": np.where(cerrado, dias[final], ""),
+        "HORA DE ATENCIÓN": np.where(cerrado, rng.choice(horas, n), ""),
+        "ÁREA TI": rng.choice(EQUIPOS, n),
+        "DNI_ESPECIALISTA FUNCIONAL": (DNI_BASE_ESPECIALISTA + especialista).astype(str),
+        "ESPECIALISTA FUNCIONAL TI": [f"Especialista {e}" for e in especialista],
+        "NIVEL DE AVANCE": rng.choice(NIVELES_AVANCE, n),
+        "ESPECIALISTA APOYO TI": np.where(rng.random(n) < 0.2, "Especialista de apoyo", ""),
+        "FECHA DE ASIGNACIÓN AL ESPECIALISTA FUNCIONAL TI": dias[asignacion],
+        "PRIORIDAD": rng.choice(PRIORIDADES, n),
+        "FECHA TENTATIVA REALIZACIÓN": dias[np.minimum(asignacion + 5, len(dias) - 1)],
+        "PRODUCTO": rng.choice(["Aula virtual", "Certificado", "Reporte", ""], n),
+        "TIPO TICKET": rng.choice(TIPOS_TICKET, n),
+        "FECHA_FINAL_ATENCION": dias[final],
+    })
+
+
+def generar_csv_tickets(n, ruta, semilla=0):
+    generar_tickets(n, semilla).to_csv(ruta, index=False)
+    return ruta
+
+
+# =====================================
+# 🔹 HOJAS DE REFERENCIA SINTÉTICAS
+# =====================================
+def _dni_especialista(i):
+    return str(DNI_BASE_ESPECIALISTA + i)
+
+
+def generar_asignacion(semilla=0):
+    """
+    Hoja de asignación: un encargado por (tipo, requerimiento, equipo), con
+    los mismos tipos, requerimientos, equipos (ÁREA TI) y DNI que los
+    tickets sintéticos.
+    """
+    rng = np.random.default_rng(semilla)
+    filas = []
+    for tipo in TIPOS:
+        for r in range(1, REQUERIMIENTOS_POR_TIPO + 1):
+            for equipo in EQUIPOS:
+                encargado, coordinador = rng.integers(1, ESPECIALISTAS + 1, 2)
+                filas.append({
+                    "CATEGORIA_REQUERIMIENTO": tipo,
+                    "REQUERIMIENTO": f"Requerimiento {r}",
+                    "EQUIPO": equipo,
+                    "DNI_ENCARGO_PROCESO": _dni_especialista(encargado),
+                    "Encargdo del proceso": f"Especialista {encargado}",
+                    "Rol del proceso": "Gestor",
+                    "DNI_COORDINADOR_PROCESO": _dni_especialista(coordinador),
+                    "coordinador del proceso": f"Especialista {coordinador}",
+                })
+    return pd.DataFrame(filas)
+
+
+def generar_tdr(actividades_por_especialista=5):
+    """Hoja de TDR (mismas columnas que la real): actividades, productos y entregables por DNI."""
+    filas = [
+        {
+            "DNI": _dni_especialista(e),
+            "CONTRATISTA": f"Especialista {e}",
+            "Actividades": f"Actividad {a} del especialista {e}",
+            "DENOMINACIÓN": f"Especialista funcional TI {e}",
+            "ENTREGABLE": f"Informe mensual {a}",
+            "PRODUCTOS": f"Producto {a}",
+        }
+        for e in range(1, ESPECIALISTAS + 1)
+        for a in range(1, actividades_por_especialista + 1)
+    ]
+    return pd.DataFrame(filas)
+
+
+def escribir_hojas(directorio, filas, semilla=0):
+    """Escribe tickets.csv, asignacion.csv y tdr.csv; devuelve {nombre: ruta}."""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = {nombre: os.path.join(directorio, f"{nombre}.csv") for nombre in ("tickets", "asignacion", "tdr")}
+    generar_csv_tickets(filas, rutas["tickets"], semilla)
+    generar_asignacion(semilla).to_csv(rutas["asignacion"], index=False)
+    generar_tdr().to_csv(rutas["tdr"], index=False)
+    return rutas
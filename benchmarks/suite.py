@@ -0,0 +1,185 @@
+"""
+Suite de benchmarks: servicios y rutas Flask con hojas sintéticas de 1k a
+1M tickets, servidas por HTTP local (en lugar de Google Sheets) y con el
+fake de OpenAI. El resultado es un JSON apto para seguimiento de regresiones.
+
+    python -m benchmarks.suite --filas 1000 10000 100000 1000000 --salida resultados.json
+
+Cada tamaño corre en un subproceso propio (memoria y caches aisladas); se
+reporta también el pico de RSS de ese proceso.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.servidor_hojas import ServidorHojas
+from benchmarks.sinteticos import EQUIPOS, TIPOS, _dni_especialista, escribir_hojas
+
+DESCRIPCION = "No puedo acceder al curso 12, el sistema muestra un error al guardar."
+
+
+def _medir(fn, repeticiones):
+    """Primera ejecución (en frío) y mediana / mínimo de las siguientes, en ms."""
+    tiempos = []
+    for _ in range(max(repeticiones, 1)):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    resto = tiempos[1:] or tiempos
+    return {
+        "primera_ms": round(tiempos[0], 3),
+        "mediana_ms": round(statistics.median(resto), 3),
+        "min_ms": round(min(resto), 3),
+    }
+
+
+def _por_llamada(fn, llamadas):
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        fn()
+    return {"us_por_llamada": round((time.perf_counter() - inicio) / llamadas * 1e6, 3)}
+
+
+def _rutas(filas):
+    ticket = str(max(filas // 2, 1))
+    return [
+        ("GET /dashboard", "get", "/dashboard", None),
+        ("GET /dashboard-ai", "get", "/dashboard-ai", None),
+        ("GET /dashboard-especialistas", "get", "/dashboard-especialistas", None),
+        ("GET /api/kpis", "get", "/api/kpis", None),
+        ("GET /api/kpis/detalle", "get", "/api/kpis/detalle", None),
+        ("GET /api/predict", "get", "/api/predict", None),
+        ("GET /api/tickets (lista completa)", "get", "/api/tickets", None),
+        ("GET /api/tickets?estado", "get", "/api/tickets?estado=Pendiente", None),
+        ("GET /api/tickets (página)", "get", "/api/tickets?offset=0&limit=100&sort=-TICKET", None),
+        ("GET /api/tickets (búsqueda)", "get", "/api/tickets?q=curso 12&limit=50", None),
+        ("GET /api/tickets-completo", "get", "/api/tickets-completo", None),
+        ("GET /api/tickets-completo ndjson", "get", "/api/tickets-completo?formato=ndjson", None),
+        ("GET /api/especialistas/filtros", "get", "/api/especialistas/filtros", None),
+        ("GET /api/especialistas/resumen", "get",
+         "/api/especialistas/resumen?inicio=2024-01-01&fin=2025-12-31", None),
+        ("GET /api/analitica/sla", "get", "/api/analitica/sla?hoy=2026-01-01", None),
+        ("GET /api/analitica/carga", "get", "/api/analitica/carga?hoy=2026-01-01", None),
+        ("GET /api/ai-ticket/<id>", "get", f"/api/ai-ticket/{ticket}", None),
+        ("POST /api/ai-ticket", "post", "/api/ai-ticket", {"ticket_id": ticket}),
+        ("POST /api/ai-clasificar", "post", "/api/ai-clasificar", {"descripcion": DESCRIPCION}),
+        ("GET /api/cache/stats", "get", "/api/cache/stats", None),
+    ]
+
+
+def _benchmark_tamano(filas, repeticiones, latencia_llm):
+    """Corre todos los benchmarks para un tamaño (en el proceso actual)."""
+    tmp = tempfile.mkdtemp()
+    inicio = time.perf_counter()
+    escribir_hojas(tmp, filas)
+    generacion = time.perf_counter() - inicio
+
+    hojas = ServidorHojas(tmp).iniciar()
+    openai_fake = FakeOpenAIServer(0, latencia_llm).iniciar()
+    os.environ.update({
+        "SHEET_URL": hojas.url("tickets.csv"),
+        "SHEET_URL_ASIGNACION": hojas.url("asignacion.csv"),
+        "SHEET_URL_TDR": hojas.url("tdr.csv"),
+        "OPENAI_BASE_URL": openai_fake.base_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+        "LLM_CACHE_PATH": "",
+        "MODELO_SLA_PATH": os.getenv("MODELO_SLA_PATH", os.path.join(tmp, "sin_modelo.joblib")),
+    })
+
+    from services.etl_service import compute_kpis
+    from services.google_sheets_service import get_tickets_data, get_tickets_frame, get_tickets_snapshot
+    from services.model_predict_service import info_modelo, predict_sla_risk
+    from services.openai_service import obtener_especialista, obtener_referencias, obtener_tdr_por_dni
+
+    servicios = {}
+    servicios["carga_snapshot_tickets"] = _medir(get_tickets_snapshot, 1)
+    servicios["carga_referencias"] = _medir(obtener_referencias, 1)
+    df = get_tickets_frame()
+    servicios["get_tickets_data"] = _medir(get_tickets_data, repeticiones)
+    servicios["compute_kpis"] = _medir(lambda: compute_kpis(df), repeticiones)
+    servicios["kpis_materializados"] = _medir(lambda: get_tickets_snapshot().kpis.resumen(), repeticiones)
+    servicios["predict_sla_risk"] = {**_medir(lambda: predict_sla_risk(df), repeticiones),
+                                     "modelo": info_modelo()["tipo"]}
+
+    referencias = obtener_referencias()
+    servicios["obtener_especialista (exacta)"] = _por_llamada(
+        lambda: obtener_especialista(TIPOS[0], "Requerimiento 3", EQUIPOS[0], referencias), 10_000)
+    servicios["obtener_especialista (parcial)"] = _por_llamada(
+        lambda: obtener_especialista(TIPOS[-1][:4], "Requerimiento 2", "otra", referencias), 1_000)
+    servicios["obtener_especialista (sin coincidencia)"] = _por_llamada(
+        lambda: obtener_especialista("inexistente", "x", "y", referencias), 1_000)
+    servicios["obtener_tdr_por_dni"] = _por_llamada(
+        lambda: obtener_tdr_por_dni(_dni_especialista(7), referencias), 10_000)
+
+    from app import app
+    cliente = app.test_client()
+    rutas = {}
+    for nombre, metodo, url, cuerpo in _rutas(filas):
+        estado = {}
+
+        def pedir():
+            resp = getattr(cliente, metodo)(url, json=cuerpo) if cuerpo else getattr(cliente, metodo)(url)
+            estado["status"], estado["bytes"] = resp.status_code, len(resp.get_data())
+
+        rutas[nombre] = {**_medir(pedir, repeticiones), **estado}
+
+    return {
+        "filas": filas,
+        "generacion_hojas_s": round(generacion, 3),
+        "rss_max_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "llamadas_llm": openai_fake.llamadas,
+        "descargas_hojas": {"200": hojas.descargas, "304": hojas.no_modificadas},
+        "servicios": servicios,
+        "rutas": rutas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--latencia-llm", type=float, default=0.05)
+    parser.add_argument("--salida", help="archivo JSON de resultados (además de stdout)")
+    parser.add_argument("--un-tamano", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.un_tamano:
+        print(json.dumps(_benchmark_tamano(args.un_tamano, args.repeticiones, args.latencia_llm)))
+        return
+
+    resultados = []
+    for filas in args.filas:
+        print(f"▶ {filas} filas...", file=sys.stderr)
+        proceso = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--un-tamano", str(filas),
+             "--repeticiones", str(args.repeticiones), "--latencia-llm", str(args.latencia_llm)],
+            capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            resultados.append({"filas": filas, "error": proceso.stderr.strip().splitlines()[-1:]})
+            continue
+        resultados.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+
+    informe = json.dumps({
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(informe)
+    print(informe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from services.etl_service import COLUMNA_ESPECIALISTA, memo_por_snapshot
+from services.metrics_service import medido, tramo
+from services.model_predict_service import SLA_DIAS, SLA_DIAS_DEFECTO, _fecha
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+# Tiempos de resolución por encima de este valor se agrupan en el último día del histograma
+ANALITICA_DIAS_MAX = int(os.getenv("ANALITICA_DIAS_MAX", "365"))
+# Límites (inclusive) de los tramos de antigüedad del backlog: 0-2, 3-5, 6-10, 11-30, 31+
+TRAMOS_ANTIGUEDAD = tuple(int(x) for x in os.getenv("ANALITICA_TRAMOS_ANTIGUEDAD", "2,5,10,30").split(","))
+
+PERCENTILES = (50, 75, 90, 95, 99)
+COLUMNA_DNI = "DNI_ESPECIALISTA FUNCIONAL"
+# Estados que cierran el ticket; el resto cuenta como backlog
+ESTADOS_CERRADOS = ("ATENDIDO", "CERRADO")
+SIN_DATO = "SIN DATO"
+# Tramo de cada edad (0..último límite + 1) como tabla: más rápido que searchsorted por fila
+_TRAMO_POR_EDAD = np.searchsorted(TRAMOS_ANTIGUEDAD, np.arange(TRAMOS_ANTIGUEDAD[-1] + 2))
+
+
+def _nombres_tramos():
+    desde = [0] + [limite + 1 for limite in TRAMOS_ANTIGUEDAD]
+    return [f"{a}-{b}" for a, b in zip(desde, TRAMOS_ANTIGUEDAD)] + [f"{desde[-1]}+"]
+
+
+# =====================================
+# 🔹 VISTA NUMÉRICA (una vez por snapshot)
+# =====================================
+def _codificar(df, columna):
+    """
+    (códigos enteros, etiquetas) de una columna en mayúsculas. Vacíos y
+    nulos van a SIN_DATO; el trabajo es sobre los valores distintos, no
+    sobre las filas.
+    """
+    if columna not in df.columns:
+        return np.zeros(len(df), dtype=np.intp), pd.Index([SIN_DATO])
+    serie = df[columna]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, unicos = pd.factorize(serie)
+    etiquetas = pd.Index(unicos).astype(str).str.strip().str.upper().append(pd.Index([SIN_DATO]))
+    etiquetas = etiquetas.where(~etiquetas.isin(["", "NAN", "NONE", "<NA>"]), SIN_DATO)
+    distintas = etiquetas.unique()
+    # El código -1 (nulo) apunta a la última etiqueta: SIN_DATO
+    return distintas.get_indexer(etiquetas)[codigos].astype(np.intp), distintas
+
+
+def _dias(fechas):
+    """Fechas -> días desde 1970 (int64) y máscara de fechas válidas."""
+    valores = fechas.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    return valores.astype(np.int64), ~np.isnat(valores)
+
+
+def _nombres_especialistas(df, codigos, cantidad):
+    """Primer nombre registrado para cada DNI (por código)."""
+    if COLUMNA_ESPECIALISTA not in df.columns:
+        return [""] * cantidad
+    nombres = pd.Series(df[COLUMNA_ESPECIALISTA].to_numpy()).groupby(codigos, sort=True).first()
+    nombres = nombres.reindex(range(cantidad))
+    return [str(n).strip() if isinstance(n, str) else "" for n in nombres]
+
+
+GRUPOS = ("direccion", "area", "tipo", "prioridad", "especialista")
+
+
+def vista_analitica(df):
+    """
+    Snapshot como arreglos numpy (códigos y días), separado en tickets
+    resueltos y abiertos: las consultas solo hacen bincount sobre estos
+    arreglos, sin volver a recorrer el DataFrame. Se guarda en el propio
+    snapshot (TicketsSnapshot.vista_analitica).
+    """
+    with tramo("analitica.vista"):
+        codigos, etiquetas = {}, {}
+        for nombre, columna in zip(GRUPOS + ("estado",), ("DIRECCION", "AREA", "TIPO REQUERIMIENTO", "PRIORIDAD",
+                                                            COLUMNA_DNI, "ESTADO")):
+            codigos[nombre], etiquetas[nombre] = _codificar(df, columna)
+
+        registro, con_registro = _dias(_fecha(df, "FECHA DE REGISTRO"))
+        final, con_final = _dias(_fecha(df, "FECHA_FINAL_ATENCION"))
+        cerrado = np.asarray(etiquetas["estado"].str.contains("|".join(ESTADOS_CERRADOS)))[codigos["estado"]]
+        duracion = np.where(con_registro & con_final, final - registro, -1)
+        sla_dias = np.array([SLA_DIAS.get(p, SLA_DIAS_DEFECTO) for p in etiquetas["prioridad"]])
+
+        resueltos = np.flatnonzero(cerrado & (duracion >= 0))
+        abiertos = np.flatnonzero(~cerrado & con_registro)
+        return {
+            "filas": len(df),
+            "etiquetas": etiquetas,
+            "sla_dias": sla_dias,
+            "nombres": _nombres_especialistas(df, codigos["especialista"], len(etiquetas["especialista"])),
+            "resueltos": {
+                **{g: codigos[g][resueltos] for g in GRUPOS},
+                "duracion": np.minimum(duracion[resueltos], ANALITICA_DIAS_MAX),
+                # float: bincount lo usa como peso sin convertir en cada consulta
+                "dentro_sla": (duracion[resueltos] <= sla_dias[codigos["prioridad"][resueltos]]).astype(float),
+            },
+            "abiertos": {
+                **{g: codigos[g][abiertos] for g in GRUPOS},
+                "registro": registro[abiertos],
+                "sla_dias": sla_dias[codigos["prioridad"][abiertos]],
+            },
+        }
+
+
+def _filtrar(tabla, etiquetas, direcciones=(), areas=(), tipos=()):
+    """Filas de `tabla` (resueltos o abiertos) con la direccion/area/tipo elegidos."""
+    mascara = None
+    for nombre, valores in (("direccion", direcciones), ("area", areas), ("tipo", tipos)):
+        if valores:
+            # Tabla de verdad por código: evita comparar strings fila por fila
+            coincide = np.asarray(etiquetas[nombre].isin(valores))[tabla[nombre]]
+            mascara = coincide if mascara is None else mascara & coincide
+    return tabla if mascara is None else {k: v[mascara] for k, v in tabla.items()}
+
+
+# =====================================
+# 🔹 AGREGADOS VECTORIZADOS
+# =====================================
+def _percentiles(histograma):
+    """
+    Percentiles por fila de una matriz grupos x días (conteos). Los
+    tiempos son días enteros, así que el percentil es exacto: el primer
+    día cuyo acumulado alcanza q% de los tickets del grupo.
+    """
+    acumulado = histograma.cumsum(axis=1)
+    total = acumulado[:, -1]
+    resultado = {}
+    for q in PERCENTILES:
+        objetivo = np.maximum(np.ceil(total * q / 100), 1)
+        resultado[f"p{q}"] = (acumulado < objetivo[:, None]).sum(axis=1)
+    return total, resultado
+
+
+def _por_grupo(resueltos, abiertos, grupo, cantidad):
+    """
+    Carga y tiempos de resolución por grupo (prioridad, especialista o
+    área). Cada métrica es un bincount sobre una clave grupo x valor; la
+    suma de días y los abiertos salen de esos mismos histogramas.
+    """
+    ancho = ANALITICA_DIAS_MAX + 1
+    dias = np.arange(ancho)
+    if grupo is None:
+        histograma = np.bincount(resueltos["duracion"], minlength=ancho)[None, :]
+        dentro = np.array([resueltos["dentro_sla"].sum()])
+    else:
+        codigos = resueltos[grupo]
+        histograma = np.bincount(codigos * ancho + resueltos["duracion"],
+                                 minlength=cantidad * ancho).reshape(cantidad, ancho)
+        dentro = np.bincount(codigos, weights=resueltos["dentro_sla"], minlength=cantidad)
+    total, percentiles = _percentiles(histograma)
+
+    n_tramos = len(TRAMOS_ANTIGUEDAD) + 1
+    if grupo is None:
+        tramos = np.bincount(abiertos["tramo"], minlength=n_tramos)[None, :]
+        vencidos = np.array([abiertos["vencido"].sum()])
+        edad_max = np.array([abiertos["edad"].max(initial=0)])
+    else:
+        codigos = abiertos[grupo]
+        tramos = np.bincount(codigos * n_tramos + abiertos["tramo"],
+                             minlength=cantidad * n_tramos).reshape(cantidad, n_tramos)
+        vencidos = np.bincount(codigos, weights=abiertos["vencido"], minlength=cantidad)
+        edad_max = np.zeros(cantidad, dtype=np.int64)
+        np.maximum.at(edad_max, codigos, abiertos["edad"])
+    return {
+        "resueltos": total,
+        "promedio": np.divide(histograma @ dias, total, out=np.full(cantidad, np.nan), where=total > 0),
+        "cumplimiento": np.divide(dentro, total, out=np.full(cantidad, np.nan), where=total > 0),
+        "percentiles": percentiles,
+        "tramos": tramos,
+        "abiertos": tramos.sum(axis=1),
+        "vencidos": vencidos,
+        "edad_max": edad_max,
+    }
+
+
+def _filas(agregado, extra):
+    """Grupos con actividad como lista de dicts serializables (más backlog primero)."""
+    nombres = _nombres_tramos()
+    activos = np.flatnonzero((agregado["resueltos"] > 0) | (agregado["abiertos"] > 0))
+    activos = activos[np.lexsort((-agregado["resueltos"][activos], -agregado["abiertos"][activos]))]
+    filas = []
+    for i in activos.tolist():
+        con_resueltos = agregado["resueltos"][i] > 0
+        filas.append({
+            **extra(i),
+            "abiertos": int(agregado["abiertos"][i]),
+            "vencidos_sla": int(agregado["vencidos"][i]),
+            "antiguedad_max_dias": int(agregado["edad_max"][i]) if agregado["abiertos"][i] else None,
+            "antiguedad": dict(zip(nombres, agregado["tramos"][i].tolist())),
+            "resueltos": int(agregado["resueltos"][i]),
+            "resolucion_promedio_dias": round(float(agregado["promedio"][i]), 2) if con_resueltos else None,
+            **{f"resolucion_{q}_dias": int(v[i]) if con_resueltos else None
+               for q, v in agregado["percentiles"].items()},
+            "cumplimiento_sla": round(float(agregado["cumplimiento"][i]), 4) if con_resueltos else None,
+        })
+    return filas
+
+
+@medido("analitica.tickets")
+@memo_por_snapshot
+def analitica_tickets(snapshot, hoy, direcciones=(), areas=(), tipos=()):
+    """
+    Tiempos de resolución (distribución y percentiles), cumplimiento del
+    SLA por PRIORIDAD, antigüedad del backlog y carga por especialista
+    (DNI) y por área de un TicketsSnapshot, filtrados por
+    direccion/area/tipo. `hoy` (YYYY-MM-DD)
+    fija la antigüedad de los tickets abiertos y es parte de la clave de
+    la memo.
+    """
+    vista = snapshot.vista_analitica
+    etiquetas = vista["etiquetas"]
+    resueltos = _filtrar(vista["resueltos"], etiquetas, direcciones, areas, tipos)
+    abiertos = _filtrar(vista["abiertos"], etiquetas, direcciones, areas, tipos)
+    edad = np.datetime64(date.fromisoformat(hoy), "D").astype(np.int64) - abiertos["registro"]
+    if edad.min(initial=0) < 0:
+        # Registrados después de `hoy`: todavía no son backlog
+        abiertos = {k: v[edad >= 0] for k, v in abiertos.items()}
+        edad = edad[edad >= 0]
+    abiertos = {**abiertos, "edad": edad, "vencido": (edad > abiertos["sla_dias"]).astype(float),
+                "tramo": _TRAMO_POR_EDAD[np.minimum(edad, TRAMOS_ANTIGUEDAD[-1] + 1)]}
+
+    histograma = np.bincount(resueltos["duracion"], minlength=ANALITICA_DIAS_MAX + 1)
+    ultimo = int(np.flatnonzero(histograma)[-1]) + 1 if histograma.any() else 0
+    especialistas = etiquetas["especialista"]
+    return {
+        "hoy": hoy,
+        "tickets": {"resueltos": len(resueltos["duracion"]), "abiertos": len(edad)},
+        "resumen": (_filas(_por_grupo(resueltos, abiertos, None, 1), lambda i: {}) or [None])[0],
+        "distribucion_resolucion": {
+            "dias": list(range(ultimo)),
+            "tickets": histograma[:ultimo].tolist(),
+            "dias_max": ANALITICA_DIAS_MAX,
+        },
+        "tramos_antiguedad": _nombres_tramos(),
+        "por_prioridad": _filas(
+            _por_grupo(resueltos, abiertos, "prioridad", len(etiquetas["prioridad"])),
+            lambda i: {"prioridad": str(etiquetas["prioridad"][i]), "sla_dias": float(vista["sla_dias"][i])},
+        ),
+        "por_especialista": _filas(
+            _por_grupo(resueltos, abiertos, "especialista", len(especialistas)),
+            lambda i: {"dni": str(especialistas[i]), "especialista": vista["nombres"][i] or SIN_DATO},
+        ),
+        "por_area": _filas(
+            _por_grupo(resueltos, abiertos, "area", len(etiquetas["area"])),
+            lambda i: {"area": str(etiquetas["area"][i])},
+        ),
+    }
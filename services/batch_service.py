@@ -0,0 +1,211 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from dotenv import load_dotenv
+
+from services.google_sheets_service import get_tickets_snapshot
+from services.openai_service import clasificar_ticket, analizar_ticket_completo, obtener_referencias, limitador_llm
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+LOTE_MAX_TRABAJADORES = int(os.getenv("LOTE_MAX_TRABAJADORES", "8"))
+# Tasa total de llamadas al LLM de todos los lotes del proceso
+LOTE_LLAMADAS_POR_SEGUNDO = float(os.getenv("LOTE_LLAMADAS_POR_SEGUNDO", "5"))
+LOTE_CHECKPOINT_DIR = os.getenv("LOTE_CHECKPOINT_DIR", os.path.join(".cache", "lotes"))
+
+MODOS = ("clasificar", "completo")
+
+
+# =====================================
+# 🔹 LIMITADOR TOKEN BUCKET
+# =====================================
+class TokenBucket:
+    """Limitador de tasa: `tasa` tokens por segundo con ráfagas de hasta `capacidad`."""
+
+    def __init__(self, tasa, capacidad=None):
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad if capacidad is not None else max(tasa, 1))
+        self._tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self, tokens=1):
+        tokens = min(tokens, self.capacidad)
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                espera = (tokens - self._tokens) / self.tasa
+            time.sleep(espera)
+
+
+# Compartido por todos los lotes: dos lotes simultáneos no duplican la tasa
+limitador_lote = TokenBucket(LOTE_LLAMADAS_POR_SEGUNDO)
+
+
+# =====================================
+# 🔹 SELECCIÓN DE TICKETS
+# =====================================
+def seleccionar_tickets(ticket_ids=None, filtros=None, limite=None):
+    """
+    Tickets a procesar: por lista de ids o por filtros de columna
+    (p.ej. {"ESTADO": "Pendiente", "AREA": "SOPORTE"}), usando el snapshot.
+    Parámetros con un tipo inválido lanzan ValueError antes de leer la hoja.
+    """
+    if ticket_ids is not None and not isinstance(ticket_ids, (list, tuple)):
+        raise ValueError("ticket_ids debe ser una lista de ids.")
+    if filtros is not None and not isinstance(filtros, dict):
+        raise ValueError("filtros debe ser un objeto {columna: valor}.")
+    for columna, valor in (filtros or {}).items():
+        valores = valor if isinstance(valor, (list, tuple)) else [valor]
+        if not all(isinstance(v, (str, int, float)) for v in valores):
+            raise ValueError(f"Filtro {columna}: se espera un texto, un número o una lista de ellos.")
+
+    snapshot = get_tickets_snapshot()
+    if ticket_ids:
+        posiciones = []
+        for tid in ticket_ids:
+            clave = str(tid).strip()
+            clave = clave[:-2] if clave.endswith(".0") else clave
+            if clave in snapshot.indice_ticket:
+                posiciones.append(snapshot.indice_ticket[clave])
+    else:
+        df = snapshot.df
+        mascara = None
+        for columna, valor in (filtros or {}).items():
+            columna = columna.upper()
+            if columna not in df.columns:
+                raise ValueError(f"Columna de filtro desconocida: {columna}")
+            valores = valor if isinstance(valor, (list, tuple)) else [valor]
+            cond = df[columna].astype(str).str.lower().isin([str(v).lower() for v in valores])
+            mascara = cond if mascara is None else mascara & cond
+        posiciones = range(len(df)) if mascara is None else mascara.to_numpy().nonzero()[0]
+    posiciones = list(posiciones)[:limite] if limite else list(posiciones)
+    return snapshot.filas(posiciones)
+
+
+# =====================================
+# 🔹 CHECKPOINT
+# =====================================
+def ruta_checkpoint(nombre):
+    """Ruta del archivo de checkpoint para un nombre de lote (saneado)."""
+    limpio = re.sub(r"[^A-Za-z0-9_.-]", "_", nombre)
+    return os.path.join(LOTE_CHECKPOINT_DIR, f"{limpio}.ndjson")
+
+
+def _leer_checkpoint(ruta):
+    hechos = set()
+    if ruta and os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue  # última línea truncada por una caída
+                if registro.get("ok"):
+                    hechos.add(str(registro["ticket"]))
+    return hechos
+
+
+# =====================================
+# 🔹 EJECUCIÓN DEL LOTE
+# =====================================
+def _procesar(ticket, modo, limitador, referencias):
+    ticket_id = str(ticket.get("TICKET", ""))
+    descripcion = ticket.get("DESCRIPCION", "")
+    if not descripcion:
+        return {"ticket": ticket_id, "ok": False, "error": "El ticket no contiene descripción."}
+
+    # Los tokens se toman en cada llamada real a la API (no por aciertos de cache o del clasificador local)
+    marca = limitador_llm.set(limitador)
+    inicio = time.perf_counter()
+    try:
+        if modo == "completo":
+            resultado = analizar_ticket_completo(descripcion, ticket)
+        else:
+            resultado = clasificar_ticket(descripcion, referencias)
+    finally:
+        limitador_llm.reset(marca)
+    segundos = round(time.perf_counter() - inicio, 3)
+
+    if "error" in resultado:
+        return {"ticket": ticket_id, "ok": False, "error": resultado["error"], "segundos": segundos}
+    return {"ticket": ticket_id, "ok": True, "resultado": resultado, "segundos": segundos}
+
+
+def clasificar_lote(tickets, modo="clasificar", trabajadores=4, llamadas_por_segundo=None, checkpoint=None):
+    """
+    Generador: procesa `tickets` con un pool acotado de hilos y un token
+    bucket sobre las llamadas al LLM (el del proceso, `limitador_lote`,
+    salvo que se indique otra `llamadas_por_segundo`), y va entregando un
+    dict por ticket en orden de finalización. Con `checkpoint` (ruta), cada resultado se anexa
+    al archivo y, al reanudar, se omiten los tickets ya clasificados.
+    Al final entrega un registro {"resumen": ...}.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo}")
+    trabajadores = max(1, min(int(trabajadores), LOTE_MAX_TRABAJADORES))
+    limitador = limitador_lote if llamadas_por_segundo is None else TokenBucket(llamadas_por_segundo)
+    referencias = obtener_referencias()
+
+    hechos = _leer_checkpoint(checkpoint)
+    pendientes = [t for t in tickets if str(t.get("TICKET", "")) not in hechos]
+    archivo = None
+    if checkpoint:
+        os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok=True)
+        archivo = open(checkpoint, "a", encoding="utf-8")
+
+    inicio = time.perf_counter()
+    ok = errores = 0
+    try:
+        with ThreadPoolExecutor(trabajadores, thread_name_prefix="lote") as pool:
+            cola = iter(pendientes)
+            en_curso = set()
+            # Se mantienen como máximo 2x trabajadores tareas en vuelo (memoria acotada)
+            while True:
+                while len(en_curso) < trabajadores * 2:
+                    ticket = next(cola, None)
+                    if ticket is None:
+                        break
+                    en_curso.add(pool.submit(_procesar, ticket, modo, limitador, referencias))
+                if not en_curso:
+                    break
+                listos, en_curso = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    try:
+                        registro = futuro.result()
+                    except Exception as e:
+                        registro = {"ticket": None, "ok": False, "error": str(e)}
+                    if registro["ok"]:
+                        ok += 1
+                    else:
+                        errores += 1
+                    if archivo:
+                        archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                        archivo.flush()
+                    yield registro
+    finally:
+        if archivo:
+            archivo.close()
+
+    segundos = time.perf_counter() - inicio
+    yield {"resumen": {
+        "total": len(tickets),
+        "omitidos_por_checkpoint": len(tickets) - len(pendientes),
+        "procesados": ok + errores,
+        "ok": ok,
+        "errores": errores,
+        "segundos": round(segundos, 3),
+        "tickets_por_segundo": round((ok + errores) / segundos, 3) if segundos else None,
+    }}
@@ -0,0 +1,283 @@
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import joblib
+import numpy as np
+from dotenv import load_dotenv
+
+from services.metrics_service import Contador, Histograma, tramo_segundos
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+# Artefacto entrenado (flask entrenar-clasificador); "" lo desactiva
+CLASIFICADOR_PATH = os.getenv("CLASIFICADOR_PATH", os.path.join("models", "clasificador_tickets.joblib"))
+# Confianza mínima (la menor entre todas las salidas) para no llamar al LLM
+CLASIFICADOR_UMBRAL = float(os.getenv("CLASIFICADOR_UMBRAL", "0.8"))
+# Confianza mínima solo del tipo para ahorrar la primera llamada (prompt de tipo)
+CLASIFICADOR_UMBRAL_TIPO = float(os.getenv("CLASIFICADOR_UMBRAL_TIPO", "0.9"))
+
+# Salida de la clasificación -> columna de la hoja de tickets.
+# area_asignada es el equipo TI que atiende (ÁREA TI, mismo vocabulario que EQUIPO
+# en la hoja de asignación), no el AREA del solicitante.
+SALIDAS = {
+    "tipo_requerimiento": "TIPO REQUERIMIENTO",
+    "requerimiento": "REQUERIMIENTO",
+    "prioridad": "PRIORIDAD",
+    "area_asignada": "ÁREA TI",
+}
+COLUMNA_TEXTO = "DESCRIPCION"
+PALABRAS_RESUMEN = 20
+
+clasificaciones_locales = Contador("clasificador_local_total",
+                                   "Clasificaciones por camino: local (sin LLM), solo_tipo (1 llamada) o llm (2).",
+                                   ("resultado",))
+prediccion_segundos = Histograma("clasificador_local_segundos", "Duración de la predicción del clasificador local.",
+                                 buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01))
+
+
+# =====================================
+# 🔹 ENTRENAMIENTO (offline)
+# =====================================
+def _etiquetados(df):
+    """Filas con descripción y todas las etiquetas presentes."""
+    columnas = [COLUMNA_TEXTO, *SALIDAS.values()]
+    faltan = [c for c in columnas if c not in df.columns]
+    if faltan:
+        raise ValueError(f"Faltan columnas para entrenar: {faltan}")
+    datos = df[columnas].astype(str).apply(lambda s: s.str.strip())
+    validas = (datos != "").all(axis=1) & ~datos.isin(["nan", "None", "NaT", "<NA>"]).any(axis=1)
+    return datos[validas]
+
+
+def _ajustar(textos, etiquetas):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    vectorizador = TfidfVectorizer(strip_accents="unicode", lowercase=True, ngram_range=(1, 2),
+                                   min_df=2, max_features=20000, sublinear_tf=True, dtype=np.float32)
+    x = vectorizador.fit_transform(textos)
+    modelos = {}
+    for salida, y in etiquetas.items():
+        modelos[salida] = LogisticRegression(max_iter=1000, C=10.0).fit(x, y)
+    return vectorizador, modelos
+
+
+def entrenar_clasificador(df, ruta=CLASIFICADOR_PATH, umbral=CLASIFICADOR_UMBRAL, semilla=0):
+    """
+    Entrena el clasificador local (TF-IDF + regresión logística por salida)
+    con los tickets ya clasificados y lo guarda con joblib. Devuelve las
+    métricas de validación: exactitud por salida y, al umbral dado, la
+    fracción de tickets que se resolverían sin LLM y su exactitud.
+    """
+    from sklearn.model_selection import train_test_split
+
+    datos = _etiquetados(df)
+    if len(datos) < 50:
+        raise ValueError(f"Muy pocos tickets clasificados para entrenar ({len(datos)})")
+    for salida, columna in SALIDAS.items():
+        if datos[columna].nunique() < 2:
+            raise ValueError(f"La columna {columna} tiene una sola clase; no se puede entrenar")
+
+    entrenamiento, validacion = train_test_split(datos, test_size=0.2, random_state=semilla)
+    vectorizador, modelos = _ajustar(entrenamiento[COLUMNA_TEXTO],
+                                     {s: entrenamiento[c] for s, c in SALIDAS.items()})
+    x_val = vectorizador.transform(validacion[COLUMNA_TEXTO])
+    confianza = np.ones(len(validacion))
+    correcto = np.ones(len(validacion), dtype=bool)
+    exactitud = {}
+    for salida, columna in SALIDAS.items():
+        proba = modelos[salida].predict_proba(x_val)
+        prediccion = modelos[salida].classes_[proba.argmax(axis=1)]
+        acierto = prediccion == validacion[columna].to_numpy()
+        exactitud[salida] = round(float(acierto.mean()), 4)
+        confianza = np.minimum(confianza, proba.max(axis=1))
+        correcto &= acierto
+    cubiertos = confianza >= umbral
+    metricas = {
+        "filas": int(len(datos)),
+        "exactitud_validacion": exactitud,
+        "umbral": umbral,
+        "cobertura_umbral": round(float(cubiertos.mean()), 4),
+        "exactitud_cubiertos": round(float(correcto[cubiertos].mean()), 4) if cubiertos.any() else None,
+    }
+
+    # Modelo final con todos los datos
+    vectorizador, modelos = _ajustar(datos[COLUMNA_TEXTO], {s: datos[c] for s, c in SALIDAS.items()})
+    artefacto = {"vectorizador": vectorizador, "modelos": modelos, "salidas": SALIDAS,
+                 "entrenado_en": datetime.now().isoformat(timespec="seconds"), "metricas": metricas}
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    joblib.dump(artefacto, ruta)
+    return metricas
+
+
+# =====================================
+# 🔹 PREDICCIÓN RÁPIDA (una descripción)
+# =====================================
+class ClasificadorLocal:
+    """
+    Versión de solo lectura del artefacto para predecir un texto en
+    microsegundos: el TF-IDF se calcula con el analizador y el vocabulario
+    del vectorizador (sin la validación de sklearn), y las cuatro salidas
+    se evalúan con un solo producto sobre las filas de los términos presentes.
+    """
+
+    def __init__(self, artefacto):
+        if artefacto.get("salidas") != SALIDAS:
+            raise ValueError("artefacto entrenado con otras columnas de salida; vuelva a entrenarlo")
+        vectorizador = artefacto["vectorizador"]
+        self.entrenado_en = artefacto.get("entrenado_en")
+        self.metricas = artefacto.get("metricas")
+        self._analizar = vectorizador.build_analyzer()
+        self._vocabulario = vectorizador.vocabulary_
+        self._idf = vectorizador.idf_.astype(np.float32)
+        self._sublinear = vectorizador.sublinear_tf
+
+        pesos, sesgos, self._salidas = [], [], []
+        inicio = 0
+        for salida, modelo in artefacto["modelos"].items():
+            coef, sesgo, clases = modelo.coef_, modelo.intercept_, modelo.classes_
+            if len(clases) == 2:
+                # Binario: sklearn guarda una sola fila (clase positiva)
+                coef, sesgo = np.vstack([-coef, coef]) / 2, np.array([-sesgo[0], sesgo[0]]) / 2
+            pesos.append(coef)
+            sesgos.append(sesgo)
+            self._salidas.append((salida, inicio, inicio + len(clases), clases.tolist()))
+            inicio += len(clases)
+        # términos x clases (todas las salidas): una fila por término del vocabulario
+        self._pesos = np.ascontiguousarray(np.vstack(pesos).T, dtype=np.float32)
+        self._sesgos = np.concatenate(sesgos).astype(np.float32)
+
+    def _tfidf(self, texto):
+        conteos = Counter(i for i in map(self._vocabulario.get, self._analizar(texto)) if i is not None)
+        if not conteos:
+            return None, None
+        indices = np.fromiter(conteos.keys(), dtype=np.intp, count=len(conteos))
+        tf = np.fromiter(conteos.values(), dtype=np.float32, count=len(conteos))
+        if self._sublinear:
+            tf = np.log(tf) + 1
+        valores = tf * self._idf[indices]
+        return indices, valores / math.sqrt(float(valores @ valores))
+
+    def predecir(self, texto):
+        """{salida: (clase, probabilidad)} o None si el texto no tiene términos conocidos."""
+        indices, valores = self._tfidf(texto)
+        if indices is None:
+            return None
+        puntajes = valores @ self._pesos[indices] + self._sesgos
+        resultado = {}
+        for salida, inicio, fin, clases in self._salidas:
+            bloque = puntajes[inicio:fin]
+            exp = np.exp(bloque - bloque.max())
+            mejor = int(exp.argmax())
+            resultado[salida] = (clases[mejor], float(exp[mejor] / exp.sum()))
+        return resultado
+
+
+def cargar_clasificador(ruta=CLASIFICADOR_PATH):
+    """Clasificador listo para predecir o None si no hay artefacto (se usa solo el LLM)."""
+    if not ruta or not os.path.exists(ruta):
+        print(f"⚠️ Clasificador local no encontrado en {ruta}; todas las clasificaciones usan el LLM")
+        return None
+    try:
+        clasificador = ClasificadorLocal(joblib.load(ruta))
+        print(f"🟢 Clasificador local cargado ({clasificador.entrenado_en})")
+        return clasificador
+    except Exception as e:
+        print(f"❌ No se pudo cargar el clasificador local: {e}")
+        return None
+
+
+_clasificador = cargar_clasificador()
+_lock_stats = threading.Lock()
+_stats = {"local": 0, "solo_tipo": 0, "llm": 0, "segundos_prediccion": 0.0}
+
+
+def recargar_clasificador(ruta=CLASIFICADOR_PATH):
+    global _clasificador
+    _clasificador = cargar_clasificador(ruta)
+    return _clasificador
+
+
+# =====================================
+# 🔹 CAMINO RÁPIDO DE clasificar_ticket
+# =====================================
+def _resumen_corto(descripcion):
+    palabras = descripcion.split()
+    return " ".join(palabras[:PALABRAS_RESUMEN]) + ("..." if len(palabras) > PALABRAS_RESUMEN else "")
+
+
+def prediccion_local(descripcion):
+    """
+    Predicción del clasificador local para una descripción:
+    {"clasificacion": dict | None, "tipo_requerimiento": str | None}.
+    - clasificacion: resultado completo (mismo formato que el LLM) si todas
+      las salidas superan CLASIFICADOR_UMBRAL; evita las 2 llamadas.
+    - tipo_requerimiento: si solo el tipo supera CLASIFICADOR_UMBRAL_TIPO;
+      evita el prompt de tipo.
+    """
+    clasificador = _clasificador
+    if clasificador is None:
+        return {"clasificacion": None, "tipo_requerimiento": None}
+
+    inicio = time.perf_counter()
+    prediccion = clasificador.predecir(descripcion)
+    segundos = time.perf_counter() - inicio
+    prediccion_segundos.observar(segundos)
+    with _lock_stats:
+        _stats["segundos_prediccion"] += segundos
+
+    if prediccion is None:
+        return {"clasificacion": None, "tipo_requerimiento": None}
+    confianza = min(p for _, p in prediccion.values())
+    if confianza >= CLASIFICADOR_UMBRAL:
+        clasificacion = {salida: clase for salida, (clase, _) in prediccion.items()}
+        clasificacion["resumen_corto"] = _resumen_corto(descripcion)
+        clasificacion["origen"] = "clasificador_local"
+        clasificacion["confianza"] = round(confianza, 4)
+        return {"clasificacion": clasificacion, "tipo_requerimiento": clasificacion["tipo_requerimiento"]}
+    tipo, p_tipo = prediccion["tipo_requerimiento"]
+    return {"clasificacion": None, "tipo_requerimiento": tipo if p_tipo >= CLASIFICADOR_UMBRAL_TIPO else None}
+
+
+def registrar_camino(resultado):
+    """Cuenta por qué camino se resolvió una clasificación (local | solo_tipo | llm)."""
+    clasificaciones_locales.inc(resultado=resultado)
+    with _lock_stats:
+        _stats[resultado] += 1
+
+
+def info_clasificador():
+    """Estado del clasificador y llamadas al LLM evitadas desde el arranque."""
+    with _lock_stats:
+        stats = dict(_stats)
+    total = stats["local"] + stats["solo_tipo"] + stats["llm"]
+    llamadas_evitadas = 2 * stats["local"] + stats["solo_tipo"]
+    # Latencia ahorrada estimada con la duración media observada de cada prompt
+    llm_tipo = tramo_segundos.promedio(tramo="llm.tipo")
+    llm_clasificacion = tramo_segundos.promedio(tramo="llm.clasificacion")
+    ahorro = None
+    if llm_tipo is not None and llm_clasificacion is not None:
+        ahorro = (stats["local"] * (llm_tipo + llm_clasificacion) + stats["solo_tipo"] * llm_tipo
+                  - stats["segundos_prediccion"])
+    info = {
+        "tipo": "modelo" if _clasificador is not None else "sin_modelo",
+        "ruta": CLASIFICADOR_PATH,
+        "umbral": CLASIFICADOR_UMBRAL,
+        "umbral_tipo": CLASIFICADOR_UMBRAL_TIPO,
+        "clasificaciones": total,
+        "por_camino": {k: stats[k] for k in ("local", "solo_tipo", "llm")},
+        "llamadas_llm_evitadas": llamadas_evitadas,
+        "fraccion_llamadas_evitadas": round(llamadas_evitadas / (2 * total), 4) if total else None,
+        "prediccion_us_promedio": round(stats["segundos_prediccion"] / total * 1e6, 1) if total else None,
+        "segundos_ahorrados_estimados": round(ahorro, 3) if ahorro is not None else None,
+    }
+    if _clasificador is not None:
+        info.update({"entrenado_en": _clasificador.entrenado_en, "metricas": _clasificador.metricas})
+    return info
@@ -1,7 +1,21 @@
+import threading
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
 import pandas as pd
 
+from services.metrics_service import medido
+
+
+@medido("etl.compute_kpis")
 def compute_kpis(data):
-    df = pd.DataFrame(data)
+    if isinstance(data, dict) and "error" in data:
+        return data
+    # Acepta directamente el DataFrame del snapshot (sin copiarlo)
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
     if df.empty:
         return {"error": "Sin datos"}
 
@@ -25,3 +39,293 @@ def compute_kpis(data):
     return kpis
 
 
+def mayusculas_categoria(serie):
+    """
+    Pasa a mayúsculas una columna. Si es categórica solo transforma sus
+    categorías (no fila por fila) y conserva el tipo categórico.
+    """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.fillna("SIN DATO").astype(str).str.upper()
+    nuevas = serie.cat.categories.astype(str).str.upper()
+    unicas = pd.Index(nuevas.unique())
+    codigos = unicas.get_indexer(nuevas)[serie.cat.codes]
+    return pd.Series(pd.Categorical.from_codes(codigos, unicas), index=serie.index, name=serie.name)
+
+
+# ============================================================
+# AGREGADOS DEL DASHBOARD DE ESPECIALISTAS
+# ============================================================
+COLUMNA_ESPECIALISTA = "ESPECIALISTA FUNCIONAL TI"
+# Orden de precedencia igual al del dashboard: ASIGNADO > PROCESO > PENDIENTE
+GRUPOS_ESTADO = [("asignado", "ASIGNADO"), ("proceso", "PROCESO"), ("pendiente", "PENDIENTE")]
+
+
+def memo_por_snapshot(fn):
+    """
+    Memoriza `fn(snapshot, *args)` por objeto snapshot (el DataFrame de
+    tickets o un TicketsSnapshot). Cada snapshot tiene su propio dict de
+    resultados, que se descarta cuando el snapshot deja de existir: una
+    consulta lenta sobre el snapshot anterior que termina después del
+    cambio escribe en el dict del snapshot anterior, no en el del nuevo.
+    """
+    por_df = {}
+    lock = threading.Lock()
+
+    def _olvidar(ref, clave):
+        with lock:
+            if clave in por_df and por_df[clave][0] is ref:
+                del por_df[clave]
+
+    def envoltura(df, *args):
+        clave = id(df)
+        with lock:
+            entrada = por_df.get(clave)
+            if entrada is None or entrada[0]() is not df:
+                ref = weakref.ref(df, lambda r, c=clave: _olvidar(r, c))
+                entrada = por_df[clave] = (ref, {})
+            resultados = entrada[1]
+            if args in resultados:
+                return resultados[args]
+        valor = fn(df, *args)
+        with lock:
+            if len(resultados) > 256:
+                resultados.clear()
+            return resultados.setdefault(args, valor)
+
+    envoltura.__wrapped__ = fn
+    envoltura.__doc__ = fn.__doc__
+    return envoltura
+
+
+@memo_por_snapshot
+def _vista_especialistas(df):
+    """Columnas normalizadas que usa el dashboard (una vez por snapshot)."""
+    estado = df["ESTADO"].astype(str).str.upper() if "ESTADO" in df.columns else pd.Series("", index=df.index)
+    grupo = pd.Series(None, index=df.index, dtype=object)
+    for nombre, patron in reversed(GRUPOS_ESTADO):
+        grupo = grupo.mask(estado.str.contains(patron, regex=False), nombre)
+
+    especialista = df[COLUMNA_ESPECIALISTA].astype(str) if COLUMNA_ESPECIALISTA in df.columns else pd.Series("", index=df.index)
+    return pd.DataFrame({
+        "DIRECCION": mayusculas_categoria(df["DIRECCION"]),
+        "AREA": mayusculas_categoria(df["AREA"]),
+        "TIPO": mayusculas_categoria(df["TIPO REQUERIMIENTO"]),
+        "ESPECIALISTA": especialista.mask(especialista.str.strip() == "", "SIN ASIGNAR"),
+        "GRUPO": grupo,
+        "ATENDIDO": estado.str.contains("ATENDIDO", regex=False),
+        "FECHA": df["FECHA_FINAL_ATENCION"],
+    })
+
+
+def _filtrar(vista, direcciones=(), areas=(), tipos=()):
+    mascara = pd.Series(True, index=vista.index)
+    for columna, valores in (("DIRECCION", direcciones), ("AREA", areas), ("TIPO", tipos)):
+        if valores:
+            mascara &= vista[columna].isin(valores)
+    return vista[mascara]
+
+
+def _ordenados(serie):
+    return sorted(str(v) for v in serie.dropna().unique())
+
+
+@medido("etl.valores_filtro")
+@memo_por_snapshot
+def valores_filtro(df, direcciones=(), areas=()):
+    """
+    Valores distintos para los filtros dependientes del dashboard:
+    direcciones (todas), áreas de las direcciones elegidas y tipos de las
+    direcciones/áreas elegidas.
+    """
+    vista = _vista_especialistas(df)
+    por_direccion = _filtrar(vista, direcciones)
+    return {
+        "direcciones": _ordenados(vista["DIRECCION"]),
+        "areas": _ordenados(por_direccion["AREA"]),
+        "tipos": _ordenados(_filtrar(por_direccion, areas=areas)["TIPO"]),
+    }
+
+
+@medido("etl.resumen_especialistas")
+@memo_por_snapshot
+def resumen_especialistas(df, direcciones=(), areas=(), tipos=()):
+    """Tabla por especialista con tickets asignados / en proceso / pendientes."""
+    vista = _filtrar(_vista_especialistas(df), direcciones, areas, tipos)
+    vista = vista[vista["GRUPO"].notna()]
+    conteo = pd.crosstab(vista["ESPECIALISTA"], vista["GRUPO"])
+    conteo = conteo.reindex(columns=[g for g, _ in GRUPOS_ESTADO], fill_value=0)
+    conteo["total"] = conteo.sum(axis=1)
+
+    filas = [
+        {"especialista": esp, **{k: int(v) for k, v in valores.items()}}
+        for esp, valores in conteo.to_dict(orient="index").items()
+    ]
+    totales = {k: int(v) for k, v in conteo.sum().items()} if len(conteo) else \
+        {**{g: 0 for g, _ in GRUPOS_ESTADO}, "total": 0}
+    return {"especialistas": filas, "totales": totales}
+
+
+@medido("etl.serie_atendidos")
+@memo_por_snapshot
+def serie_atendidos(df, inicio, fin):
+    """Tickets ATENDIDO por día de FECHA_FINAL_ATENCION entre `inicio` y `fin` (inclusive)."""
+    vista = _vista_especialistas(df)
+    fechas = vista.loc[vista["ATENDIDO"], "FECHA"].dropna()
+    fechas = fechas[(fechas >= pd.Timestamp(inicio)) & (fechas <= pd.Timestamp(fin))]
+    conteo = fechas.dt.normalize().value_counts().sort_index()
+    return {
+        "labels": [f.strftime("%d/%m/%Y") for f in conteo.index],
+        "valores": [int(v) for v in conteo.to_numpy()],
+        "total": int(conteo.sum()),
+    }
+
+
+# ============================================================
+# KPIs MATERIALIZADOS (una vez por snapshot, incrementales)
+# ============================================================
+DIMENSIONES_KPI = ["DIRECCION", "AREA", "ESTADO"]
+VENTANAS_DIAS = (7, 30)
+FORMATO_FECHA_REGISTRO = "%d/%m/%Y"
+# Con pocas filas (diffs) contar en Python evita el costo fijo de groupby
+FILAS_CONTEO_DIRECTO = 5000
+
+
+def _conteo_dimensiones(df):
+    """(DIRECCION, AREA, ESTADO) -> cantidad de tickets."""
+    if df.empty:
+        return Counter()
+    if len(df) <= FILAS_CONTEO_DIRECTO:
+        columnas = [df[c].tolist() if c in df.columns else ["SIN DATO"] * len(df) for c in DIMENSIONES_KPI]
+        conteo = Counter()
+        for clave, n in Counter(zip(*columnas)).items():
+            conteo[tuple(str(v) for v in clave)] += n
+        return conteo
+    claves = pd.DataFrame({c: df[c] if c in df.columns else "SIN DATO" for c in DIMENSIONES_KPI}, index=df.index)
+    tamanos = claves.groupby(DIMENSIONES_KPI, observed=True, dropna=False, sort=False).size()
+    return Counter({tuple(str(v) for v in clave): int(n) for clave, n in tamanos.items() if n})
+
+
+@lru_cache(maxsize=8192)
+def _parsear_dia(texto):
+    try:
+        return datetime.strptime(texto.strip(), FORMATO_FECHA_REGISTRO).date()
+    except ValueError:
+        return None
+
+
+def _dia(valor):
+    if isinstance(valor, datetime):
+        return None if pd.isna(valor) else valor.date()
+    if isinstance(valor, date):
+        return valor
+    return _parsear_dia(valor) if isinstance(valor, str) else None
+
+
+def _conteo_por_dia(df, columna):
+    """Fecha (date) -> cantidad de tickets; se convierte solo cada valor distinto."""
+    if columna not in df.columns or df.empty:
+        return Counter()
+    serie = df[columna]
+    es_fecha = pd.api.types.is_datetime64_any_dtype(serie)
+    if len(df) <= FILAS_CONTEO_DIRECTO:
+        valores = serie.to_numpy().astype("datetime64[D]").tolist() if es_fecha else serie.tolist()
+        conteo = Counter(valores)
+    else:
+        conteo = (serie.dt.normalize() if es_fecha else serie).value_counts()
+        conteo = dict(zip(conteo.index.tolist(), conteo.to_numpy().tolist()))
+    dias = Counter()
+    for valor, n in conteo.items():
+        dia = _dia(valor)
+        if dia is not None:
+            dias[dia] += n
+    return dias
+
+
+def _restar(a, b):
+    resultado = Counter(a)
+    resultado.subtract(b)
+    return Counter({k: v for k, v in resultado.items() if v})
+
+
+@dataclass(frozen=True)
+class KPIsMaterializados:
+    """
+    Conteos agregados de un snapshot: cubo DIRECCION x AREA x ESTADO y
+    tickets registrados / atendidos por día. Todo lo que muestran los
+    dashboards se deriva de aquí sin volver a recorrer el DataFrame.
+    """
+    cubo: Counter = field(default_factory=Counter)
+    registrados: Counter = field(default_factory=Counter)
+    atendidos: Counter = field(default_factory=Counter)
+    incremental: bool = False
+
+    @property
+    def total(self):
+        return sum(self.cubo.values())
+
+    def _por(self, posicion):
+        conteo = Counter()
+        for clave, n in self.cubo.items():
+            conteo[clave[posicion]] += n
+        return conteo
+
+    def resumen(self):
+        """Mismo formato que compute_kpis: total + cantidad por ESTADO."""
+        if not self.cubo:
+            return {"error": "Sin datos"}
+        kpis = {"total_tickets": self.total}
+        kpis.update(dict(self._por(2).most_common()))
+        return kpis
+
+    def _desglose(self, posicion):
+        desglose = {}
+        for clave, n in sorted(self.cubo.items()):
+            grupo = desglose.setdefault(clave[posicion], {"total_tickets": 0})
+            grupo["total_tickets"] += n
+            grupo[clave[2]] = grupo.get(clave[2], 0) + n
+        return desglose
+
+    def ventanas(self, hoy=None):
+        """Tickets registrados / atendidos en los últimos 7 y 30 días (incluye hoy)."""
+        hoy = hoy or date.today()
+        resultado = {}
+        for dias in VENTANAS_DIAS:
+            desde = hoy - timedelta(days=dias - 1)
+            resultado[f"{dias}d"] = {
+                "registrados": sum(n for d, n in self.registrados.items() if desde <= d <= hoy),
+                "atendidos": sum(n for d, n in self.atendidos.items() if desde <= d <= hoy),
+            }
+        return resultado
+
+    def detalle(self, hoy=None):
+        return {
+            **self.resumen(),
+            "por_direccion": self._desglose(0),
+            "por_area": self._desglose(1),
+            "ventanas": self.ventanas(hoy),
+        }
+
+
+@medido("etl.materializar_kpis")
+def materializar_kpis(df):
+    """KPIs completos de un DataFrame (recorre todas las filas una vez)."""
+    return KPIsMaterializados(
+        cubo=_conteo_dimensiones(df),
+        registrados=_conteo_por_dia(df, "FECHA DE REGISTRO"),
+        atendidos=_conteo_por_dia(df, "FECHA_FINAL_ATENCION"),
+    )
+
+
+def actualizar_kpis(kpis, salientes, entrantes):
+    """
+    KPIs del snapshot nuevo a partir de los del anterior: se restan las
+    filas que salieron o cambiaron (versión anterior) y se suman las que
+    entraron o cambiaron (versión nueva).
+    """
+    viejos, nuevos = materializar_kpis(salientes), materializar_kpis(entrantes)
+    return KPIsMaterializados(
+        cubo=_restar(kpis.cubo + nuevos.cubo, viejos.cubo),
+        registrados=_restar(kpis.registrados + nuevos.registrados, viejos.registrados),
+        atendidos=_restar(kpis.atendidos + nuevos.atendidos, viejos.atendidos),
+        incremental=True,
+    )
@@ -1,29 +1,365 @@
+import io
+import numpy as np
 import pandas as pd
 import os
+from dataclasses import dataclass
+from functools import cached_property
 from dotenv import load_dotenv
+from services.snapshot_cache import SnapshotCache, DEFAULT_TTL
+from services.sheet_sync_service import SheetSync, DiffFilas, diff_por_clave, normalizar_clave
+from services.http_service import stream_registros
+from services.etl_service import materializar_kpis, actualizar_kpis
+from services.analitica_service import vista_analitica
+from services.metrics_service import tramo, medido
+from services.snapshot_disk_service import espejo
 # === CONFIGURACIÓN ===
 # Reemplaza con tu URL pública de Google Sheets (formato CSV export)
 load_dotenv()
 SHEET_URL = os.getenv("SHEET_URL")
+# Segundos que un snapshot de tickets se considera vigente
+TICKETS_CACHE_TTL = float(os.getenv("TICKETS_CACHE_TTL", DEFAULT_TTL))
 
+# Tipos de columna del snapshot columnar
+COLUMNAS_CATEGORICAS = ["ESTADO", "DIRECCION", "AREA", "TIPO REQUERIMIENTO"]
+COLUMNAS_TEXTO = ["DOCUMENTO", "DNI_ESPECIALISTA FUNCIONAL"]
+COLUMNAS_FECHA = {"FECHA_FINAL_ATENCION": "%d/%m/%Y"}
+# Por encima de esta fracción de filas cambiadas los KPIs se recalculan completos
+KPIS_MAX_FRACCION_INCREMENTAL = 0.5
+# Columnas consideradas en la búsqueda libre de /api/tickets
+COLUMNAS_BUSQUEDA = [
+    "TICKET", "DOCUMENTO", "NOMBRES Y APELLIDOS", "TIPO REQUERIMIENTO", "REQUERIMIENTO",
+    "DESCRIPCION", "DIRECCION", "AREA", "ESTADO", "ESPECIALISTA FUNCIONAL TI", "PRIORIDAD",
+]
 
-def get_tickets_data():
-    try:
-        # Cargar solo las columnas críticas como string
-        df = pd.read_csv(
-            SHEET_URL,
-            dtype={
-                "DOCUMENTO": str,
-                "DNI_ESPECIALISTA FUNCIONAL": str
-            }
+
+@dataclass(frozen=True)
+class TicketsSnapshot:
+    """
+    Versión inmutable de la hoja de tickets.
+    `df` es el snapshot columnar tipado que comparten todos los consumidores
+    (categorías para ESTADO/DIRECCION/AREA/TIPO REQUERIMIENTO, fechas ya
+    parseadas y DOCUMENTO/DNI como string); no debe modificarse in situ.
+    `diff` describe qué TICKET cambiaron respecto al snapshot anterior, para
+    que los datos derivados (KPIs, índices, agregados) se actualicen en forma
+    incremental en lugar de reconstruirse.
+    """
+    df: pd.DataFrame
+    diff: DiffFilas
+    hash: str
+
+    @cached_property
+    def registros(self):
+        """Vista lista-de-dicts (solo para las rutas que aún la necesitan)."""
+        with tramo("tickets.registros"):
+            return _a_registros(self.df)
+
+    # ---------- índices (se construyen una vez por snapshot) ----------
+    @cached_property
+    def indice_ticket(self):
+        """TICKET normalizado -> posición de fila (primera aparición)."""
+        claves = normalizar_clave(self.df["TICKET"]).to_numpy()
+        posiciones = np.arange(len(claves))
+        # Se recorre al revés para que, si hay duplicados, gane la primera fila
+        return dict(zip(claves[::-1], posiciones[::-1]))
+
+    @cached_property
+    def indice_estado(self):
+        """ESTADO en minúsculas -> posiciones de fila."""
+        return _indice_secundario(self.df, "ESTADO", lambda v: str(v).strip().lower())
+
+    @cached_property
+    def indice_dni(self):
+        """DNI_ESPECIALISTA FUNCIONAL -> posiciones de fila."""
+        return _indice_secundario(self.df, "DNI_ESPECIALISTA FUNCIONAL", lambda v: str(v).strip())
+
+    @cached_property
+    def vista_analitica(self):
+        """Arreglos numpy de la analítica de SLA y carga (propios de este snapshot)."""
+        return vista_analitica(self.df)
+
+    def construir_indices(self):
+        self.indice_ticket, self.indice_estado, self.indice_dni
+        return self
+
+    # ---------- KPIs materializados ----------
+    @cached_property
+    def kpis(self):
+        """KPIs del snapshot (completos, salvo que se hereden con heredar_kpis)."""
+        return materializar_kpis(self.df)
+
+    def heredar_kpis(self, anterior):
+        """
+        Deriva los KPIs de los del snapshot anterior usando solo las filas
+        del diff. Si el diff es completo, hay TICKET repetidos o cambió
+        demasiado, se deja el cálculo completo.
+        """
+        diff = self.diff
+        cambios = len(diff.agregados) + len(diff.eliminados) + len(diff.modificados)
+        if (
+            anterior is None
+            or diff.completo
+            or cambios > KPIS_MAX_FRACCION_INCREMENTAL * len(self.df)
+            or len(self.indice_ticket) != len(self.df)
+            or len(anterior.indice_ticket) != len(anterior.df)
+        ):
+            self.kpis
+            return self
+        salientes = [anterior.indice_ticket[k] for k in diff.eliminados | diff.modificados]
+        entrantes = [self.indice_ticket[k] for k in diff.agregados | diff.modificados]
+        # Mismo almacenamiento que usa cached_property: el snapshot sigue siendo inmutable
+        self.__dict__["kpis"] = actualizar_kpis(
+            anterior.kpis, anterior.df.iloc[sorted(salientes)], self.df.iloc[sorted(entrantes)]
         )
-        df = df.fillna("")
-        # Asegurarte de que no haya ".0" si Excel las exportó como float
-        df["DOCUMENTO"] = df["DOCUMENTO"].astype(str).str.replace(r"\.0$", "", regex=True)
-        df["DNI_ESPECIALISTA FUNCIONAL"] = df["DNI_ESPECIALISTA FUNCIONAL"].astype(str).str.replace(r"\.0$", "", regex=True)
+        return self
+
+    @cached_property
+    def texto_busqueda(self):
+        """Texto en minúsculas por fila (columnas buscables) para la búsqueda libre."""
+        columnas = [c for c in COLUMNAS_BUSQUEDA if c in self.df.columns]
+        if not columnas:
+            return pd.Series("", index=self.df.index)
+        texto = self.df[columnas[0]].astype(str)
+        for col in columnas[1:]:
+            texto = texto + "\x1f" + self.df[col].astype(str)
+        return texto.str.lower()
+
+    def filas(self, posiciones):
+        """Registros (dicts) de las posiciones dadas, sin convertir toda la hoja."""
+        if "registros" in self.__dict__:
+            return [self.registros[i] for i in posiciones]
+        return _a_registros(self.df.iloc[posiciones])
+
+
+def _fechas_a_texto(df):
+    """Copia superficial con las fechas en el formato original de la hoja."""
+    df = df.copy(deep=False)
+    for col, formato in COLUMNAS_FECHA.items():
+        if col in df.columns:
+            df[col] = df[col].dt.strftime(formato).fillna("")
+    return df
+
+
+def _a_registros(df):
+    return _fechas_a_texto(df).astype(object).to_dict(orient="records")
+
+
+def _indice_secundario(df, columna, normalizar):
+    if columna not in df.columns:
+        return {}
+    indice = {}
+    for valor, posiciones in df.groupby(columna, observed=True, sort=False).indices.items():
+        clave = normalizar(valor)
+        indice[clave] = np.concatenate([indice[clave], posiciones]) if clave in indice else posiciones
+    # Mantener el orden original de las filas dentro de cada grupo
+    return {k: np.sort(v) for k, v in indice.items()}
+
+
+def _parsear_tickets(contenido):
+    # Cargar solo las columnas críticas como string
+    df = pd.read_csv(
+        io.BytesIO(contenido),
+        dtype={
+            "DOCUMENTO": str,
+            "DNI_ESPECIALISTA FUNCIONAL": str
+        }
+    )
+    df = df.fillna("")
+    # Asegurarte de que no haya ".0" si Excel las exportó como float
+    df["DOCUMENTO"] = df["DOCUMENTO"].astype(str).str.replace(r"\.0$", "", regex=True)
+    df["DNI_ESPECIALISTA FUNCIONAL"] = df["DNI_ESPECIALISTA FUNCIONAL"].astype(str).str.replace(r"\.0$", "", regex=True)
+    return _tipar_columnas(df)
+
+
+def _tipar_columnas(df):
+    # Columnas de baja cardinalidad como categorías (menos memoria, groupby rápido)
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype("category")
+    for col in COLUMNAS_TEXTO:
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    for col, formato in COLUMNAS_FECHA.items():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=formato, errors="coerce")
+    return df
+
+
+_sync_tickets = SheetSync(SHEET_URL, nombre="tickets")
+
+
+def _leer_tickets(anterior=None):
+    contenido = _sync_tickets.descargar()
+    if contenido is None and anterior is not None:
+        # Contenido idéntico: no se vuelve a parsear
+        return anterior
+    if contenido is None:
+        # Sin snapshot previo en este proceso: forzar descarga completa
+        _sync_tickets.olvidar()
+        contenido = _sync_tickets.descargar()
+
+    try:
+        with tramo("hoja_tickets.parseo"):
+            df = _parsear_tickets(contenido)
+    except Exception:
+        # Olvidar los validadores para reintentar el parseo en el próximo refresco
+        _sync_tickets.olvidar()
+        raise
+    with tramo("hoja_tickets.diff"):
+        diff = diff_por_clave(anterior.df if anterior else None, df)
+    if anterior is not None and diff.vacio:
+        return anterior
+
+    snapshot = TicketsSnapshot(df=df, diff=diff, hash=_sync_tickets.hash)
+    with tramo("hoja_tickets.indices"):
+        snapshot.construir_indices()
+    with tramo("hoja_tickets.kpis"):
+        snapshot.heredar_kpis(anterior)
+    # La vista numérica de la analítica se arma aquí (hilo de refresco), no en la primera consulta
+    snapshot.vista_analitica
+    with tramo("hoja_tickets.espejo"):
+        espejo.guardar("tickets", df, _sync_tickets.validadores())
+    return snapshot
+
+
+def _precargar_tickets():
+    """Último snapshot bueno desde el espejo en disco (sin red), o None."""
+    with tramo("hoja_tickets.espejo_carga"):
+        guardado = espejo.cargar("tickets")
+        if guardado is None:
+            return None
+        df, meta = guardado
+        if not _sync_tickets.restaurar(meta):
+            return None
+        snapshot = TicketsSnapshot(df=df, diff=DiffFilas(completo=True), hash=_sync_tickets.hash)
+        snapshot.construir_indices()
+        snapshot.kpis
+    print(f"🟡 Tickets precargados desde el espejo local ({len(df)} filas)")
+    return snapshot
+
 
-        return df.to_dict(orient="records")
+# Snapshot compartido por todas las rutas del proceso
+tickets_cache = SnapshotCache("tickets", _leer_tickets, ttl=TICKETS_CACHE_TTL, precargar=_precargar_tickets)
+
+
+def get_tickets_snapshot():
+    """Snapshot actual de la hoja de tickets (DataFrame + registros + diff)."""
+    return tickets_cache.valor()
+
+
+def get_tickets_frame():
+    """
+    Devuelve el DataFrame tipado compartido del snapshot actual (sin copias).
+    Es de solo lectura: quien necesite modificarlo debe hacer su propia copia.
+    """
+    try:
+        return get_tickets_snapshot().df
+
+    except Exception as e:
+        return {"error": f"No se pudo leer la hoja: {e}"}
+
+
+def get_tickets_kpis():
+    """KPIs materializados del snapshot actual (o dict de error)."""
+    try:
+        return get_tickets_snapshot().kpis
+
+    except Exception as e:
+        return {"error": f"No se pudo leer la hoja: {e}"}
+
+
+def get_tickets_data():
+    """
+    Devuelve la lista de tickets desde el snapshot en memoria.
+    La hoja solo se descarga en la primera llamada o cuando vence el TTL
+    (en segundo plano, sirviendo mientras tanto el snapshot anterior), y
+    solo se vuelve a parsear si su contenido cambió.
+    La lista es compartida: no debe modificarse in situ.
+    """
+    try:
+        return get_tickets_snapshot().registros
 
     except Exception as e:
         return {"error": f"No se pudo leer la hoja: {e}"}
-    
\ No newline at end of file
+
+
+def buscar_ticket(ticket_id):
+    """Devuelve el ticket (dict) por su id en O(1), o None si no existe."""
+    snapshot = get_tickets_snapshot()
+    clave = str(ticket_id).strip()
+    if clave.endswith(".0"):
+        clave = clave[:-2]
+    posicion = snapshot.indice_ticket.get(clave)
+    if posicion is None:
+        return None
+    return snapshot.filas([posicion])[0]
+
+
+def filtrar_por_estado(estado, snapshot=None):
+    """Tickets con el ESTADO dado (sin distinguir mayúsculas)."""
+    snapshot = snapshot or get_tickets_snapshot()
+    posiciones = snapshot.indice_estado.get(str(estado).strip().lower(), [])
+    return snapshot.filas(posiciones)
+
+
+def stream_tickets(estado=None, formato="json", snapshot=None):
+    """
+    Mismo contenido que get_tickets_data() / filtrar_por_estado(), pero
+    serializado por lotes directamente desde el DataFrame del snapshot
+    (no arma la lista de dicts completa ni el documento JSON en memoria).
+    """
+    snapshot = snapshot or get_tickets_snapshot()
+    df = snapshot.df
+    if estado:
+        df = df.iloc[snapshot.indice_estado.get(str(estado).strip().lower(), [])]
+    return stream_registros(df, transformar=_fechas_a_texto, formato=formato)
+
+
+def filtrar_por_dni(dni):
+    """Tickets asignados al DNI_ESPECIALISTA FUNCIONAL dado."""
+    snapshot = get_tickets_snapshot()
+    posiciones = snapshot.indice_dni.get(str(dni).strip(), [])
+    return snapshot.filas(posiciones)
+
+
+@medido("tickets.consulta")
+def consultar_tickets(estado=None, busqueda=None, orden=None, descendente=False,
+                      offset=0, limite=100, campos=None, snapshot=None):
+    """
+    Página de tickets sobre el snapshot: filtro por ESTADO (índice),
+    búsqueda libre, orden por columna, proyección de columnas y offset/límite.
+    `snapshot` permite usar el mismo que ya tomó la ruta (ETag y cursor).
+    Devuelve (registros, total_estado, total_filtrado).
+    """
+    snapshot = snapshot or get_tickets_snapshot()
+    df = snapshot.df
+
+    if estado:
+        posiciones = snapshot.indice_estado.get(str(estado).strip().lower(), np.array([], dtype=np.intp))
+    else:
+        posiciones = np.arange(len(df))
+    total = len(posiciones)
+
+    if busqueda:
+        coincide = snapshot.texto_busqueda.to_numpy()[posiciones]
+        mascara = pd.Series(coincide).str.contains(busqueda.lower(), regex=False).to_numpy()
+        posiciones = posiciones[mascara]
+    filtrados = len(posiciones)
+
+    if orden and orden in df.columns and filtrados:
+        valores = df[orden].iloc[posiciones].reset_index(drop=True)
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            valores = valores.astype(str)
+        try:
+            orden_pos = valores.sort_values(ascending=not descendente, kind="stable").index.to_numpy()
+        except TypeError:
+            # Columnas con tipos mezclados (números y "") se ordenan como texto
+            orden_pos = valores.astype(str).sort_values(ascending=not descendente, kind="stable").index.to_numpy()
+        posiciones = posiciones[orden_pos]
+
+    pagina = posiciones[offset:offset + limite]
+    if campos:
+        columnas = [c for c in campos if c in df.columns]
+        registros = _a_registros(df.iloc[pagina][columnas])
+    else:
+        registros = snapshot.filas(pagina)
+    return registros, total, filtrados
@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import json
+import zlib
+
+import pandas as pd
+
+try:
+    import brotli  # opcional: solo si está instalado
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# =====================================
+# 🔹 UTILIDADES HTTP (ETag y compresión)
+# =====================================
+TAMANO_MINIMO_COMPRESION = 1024
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "text/html", "text/css", "application/javascript")
+
+
+def etag_para(*partes):
+    """ETag débil a partir de la versión de los datos y los parámetros del request."""
+    h = hashlib.sha1()
+    for parte in partes:
+        h.update(str(parte).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def comprimir_respuesta(request, response):
+    """
+    Comprime con brotli o gzip según Accept-Encoding. No toca respuestas
+    en streaming, ya codificadas, pequeñas o de tipos no comprimibles.
+    """
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code >= 300
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in TIPOS_COMPRIMIBLES
+    ):
+        return response
+
+    aceptadas = request.headers.get("Accept-Encoding", "").lower()
+    datos = response.get_data()
+    if len(datos) < TAMANO_MINIMO_COMPRESION:
+        return response
+
+    if brotli is not None and "br" in aceptadas:
+        response.set_data(brotli.compress(datos, quality=5))
+        response.headers["Content-Encoding"] = "br"
+    elif "gzip" in aceptadas:
+        response.set_data(gzip.compress(datos, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+# =====================================
+# 🔹 JSON EN STREAMING
+# =====================================
+FILAS_POR_LOTE = 5000
+
+
+def _json_por_defecto(valor):
+    # pd.NA / NaT (columnas "string" y fechas vacías) -> null; el resto como texto
+    if pd.isna(valor):
+        return None
+    return str(valor)
+
+
+def codificar_json(valor):
+    """Objeto -> bytes JSON (orjson si está instalado, si no json de la stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(valor, default=_json_por_defecto,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(valor, ensure_ascii=False, default=_json_por_defecto).encode("utf-8")
+
+
+def _a_dicts(df):
+    # Más rápido que to_dict(orient="records"): una conversión por columna
+    nombres = [str(c) for c in df.columns]
+    columnas = [df[c].tolist() for c in df.columns]
+    return [dict(zip(nombres, fila)) for fila in zip(*columnas)]
+
+
+def stream_registros(df, transformar=None, formato="json", filas_por_lote=FILAS_POR_LOTE):
+    """
+    Genera el JSON de `df` por lotes de filas sin armar el documento completo
+    en memoria. `transformar(lote)` se aplica a cada lote (p.ej. mayúsculas o
+    formato de fechas), así que no se copian columnas completas.
+    formato="json" produce un array; formato="ndjson" una fila por línea.
+    """
+    if formato == "json":
+        yield b"["
+    primero = True
+    for inicio in range(0, len(df), filas_por_lote):
+        lote = df.iloc[inicio:inicio + filas_por_lote]
+        if transformar is not None:
+            lote = transformar(lote)
+        registros = _a_dicts(lote)
+        if not registros:
+            continue
+        if formato == "ndjson":
+            yield b"".join(codificar_json(r) + b"\n" for r in registros)
+        else:
+            cuerpo = codificar_json(registros)[1:-1]  # sin los corchetes del lote
+            yield cuerpo if primero else b"," + cuerpo
+            primero = False
+    if formato == "json":
+        yield b"]"
+
+
+def codificacion_aceptada(request):
+    """Codificación de compresión para streams (solo gzip: admite compresión incremental)."""
+    return "gzip" if "gzip" in request.headers.get("Accept-Encoding", "").lower() else None
+
+
+def evento_sse(evento, datos):
+    """Un evento de Server-Sent Events con datos JSON (una sola línea `data:`)."""
+    return b"event: " + evento.encode("utf-8") + b"\ndata: " + codificar_json(datos) + b"\n\n"
+
+
+def comprimir_stream(partes, nivel=5):
+    """Comprime en gzip un generador de bytes a medida que se produce."""
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for parte in partes:
+        datos = compresor.compress(parte)
+        if datos:
+            yield datos
+    yield compresor.flush()
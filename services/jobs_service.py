@@ -0,0 +1,232 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from services.http_service import codificar_json
+from services.metrics_service import Contador, Histograma
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+# Archivo SQLite con el estado de los trabajos, compartido por todos los workers
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(".cache", "trabajos.sqlite3"))
+# Hilos que ejecutan trabajos en cada proceso (aparte de los que atienden peticiones)
+JOBS_TRABAJADORES = int(os.getenv("JOBS_TRABAJADORES", "8"))
+# Trabajos en cola + en proceso admitidos entre todos los workers; por encima se responde 429
+JOBS_MAX_PENDIENTES = int(os.getenv("JOBS_MAX_PENDIENTES", "64"))
+# Segundos que se conserva un trabajo terminado para consultarlo
+JOBS_RETENCION = float(os.getenv("JOBS_RETENCION", "3600"))
+# Un trabajo sin terminar tras este tiempo se da por perdido (p.ej. worker reiniciado)
+JOBS_TIMEOUT = float(os.getenv("JOBS_TIMEOUT", "600"))
+
+ACTIVOS = ("en_cola", "en_proceso")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    creado REAL NOT NULL,
+    iniciado REAL,
+    terminado REAL,
+    resultado TEXT,
+    error TEXT
+);
+-- Un solo trabajo activo por clave: la deduplicación es atómica entre procesos
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trabajos_activos ON trabajos (clave) WHERE estado IN ('en_cola', 'en_proceso');
+CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado, creado);
+"""
+
+trabajos_total = Contador("trabajos_total", "Trabajos enviados a la cola por resultado del envío.",
+                          ("tipo", "resultado"))
+trabajo_segundos = Histograma("trabajo_segundos", "Duración de los trabajos (espera en cola o ejecución).",
+                              ("tipo", "etapa"))
+
+
+class ColaLlena(Exception):
+    """La cola alcanzó JOBS_MAX_PENDIENTES (backpressure)."""
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+# =====================================
+# 🔹 COLA DE TRABAJOS
+# =====================================
+class ColaTrabajos:
+    """
+    Cola de trabajos en segundo plano (p.ej. análisis IA de un ticket).
+    El estado vive en SQLite (WAL), así que cualquier worker de gunicorn
+    puede responder la consulta de un trabajo; la ejecución ocurre en un
+    pool de hilos del proceso que lo recibió, separado de los hilos que
+    atienden peticiones. Trabajos idénticos en curso (misma clave) se
+    deduplican y, si hay demasiados pendientes, se rechazan (ColaLlena).
+    """
+
+    def __init__(self, ruta=JOBS_DB_PATH, trabajadores=JOBS_TRABAJADORES, max_pendientes=JOBS_MAX_PENDIENTES):
+        self.ruta = ruta
+        self.trabajadores = trabajadores
+        self.max_pendientes = max_pendientes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _conexion(self):
+        # Una conexión por hilo y por proceso (las conexiones no sobreviven al fork)
+        con = getattr(self._local, "con", None)
+        if con is not None and self._local.pid == os.getpid():
+            return con
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        con = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+        con.row_factory = sqlite3.Row
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.executescript(_ESQUEMA)
+        self._local.con, self._local.pid = con, os.getpid()
+        return con
+
+    def _ejecutor(self):
+        # Tras un fork (gunicorn) los hilos del pool no existen: se recrea por proceso
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(self.trabajadores, thread_name_prefix="trabajo")
+                self._pid = os.getpid()
+        return self._pool
+
+    # ---------- envío ----------
+    def encolar(self, tipo, clave, fn, *args):
+        """
+        Registra y programa `fn(*args)`. Devuelve (trabajo, nuevo): si ya hay
+        un trabajo activo con la misma clave se devuelve ese (nuevo=False).
+        Lanza ColaLlena si hay JOBS_MAX_PENDIENTES trabajos activos.
+        """
+        con = self._conexion()
+        ahora = time.time()
+        existente, pendientes, trabajo_id = None, 0, None
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            self._limpiar(con, ahora)
+            existente = con.execute(
+                "SELECT * FROM trabajos WHERE clave = ? AND estado IN (?, ?)", (clave, *ACTIVOS)
+            ).fetchone()
+            if existente is None:
+                pendientes = con.execute(
+                    "SELECT COUNT(*) FROM trabajos WHERE estado IN (?, ?)", ACTIVOS).fetchone()[0]
+            if existente is None and pendientes < self.max_pendientes:
+                trabajo_id = uuid.uuid4().hex
+                con.execute(
+                    "INSERT INTO trabajos (id, tipo, clave, estado, pid, creado) VALUES (?, ?, ?, 'en_cola', ?, ?)",
+                    (trabajo_id, tipo, clave, os.getpid(), ahora),
+                )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        if existente is not None:
+            trabajos_total.inc(tipo=tipo, resultado="deduplicado")
+            return self._a_dict(con, existente), False
+        if trabajo_id is None:
+            trabajos_total.inc(tipo=tipo, resultado="rechazado")
+            raise ColaLlena(f"Hay {pendientes} trabajos pendientes (máximo {self.max_pendientes})")
+
+        trabajos_total.inc(tipo=tipo, resultado="encolado")
+        self._ejecutor().submit(self._ejecutar, trabajo_id, tipo, ahora, fn, args)
+        return self.obtener(trabajo_id), True
+
+    def _limpiar(self, con, ahora):
+        # Activos de procesos que ya no existen o colgados: se marcan como perdidos
+        perdidos = [
+            (ahora, fila["id"]) for fila in con.execute(
+                "SELECT id, pid, creado FROM trabajos WHERE estado IN (?, ?)", ACTIVOS)
+            if ahora - fila["creado"] > JOBS_TIMEOUT or not _proceso_vivo(fila["pid"])
+        ]
+        con.executemany(
+            "UPDATE trabajos SET estado = 'error', terminado = ?, error = 'Trabajo perdido (worker reiniciado o timeout)' "
+            "WHERE id = ?", perdidos)
+        con.execute("DELETE FROM trabajos WHERE estado NOT IN (?, ?) AND terminado < ?",
+                    (*ACTIVOS, ahora - JOBS_RETENCION))
+
+    # ---------- ejecución ----------
+    def _ejecutar(self, trabajo_id, tipo, creado, fn, args):
+        con = self._conexion()
+        inicio = time.time()
+        trabajo_segundos.observar(inicio - creado, tipo=tipo, etapa="cola")
+        con.execute("UPDATE trabajos SET estado = 'en_proceso', iniciado = ? WHERE id = ?", (inicio, trabajo_id))
+        try:
+            resultado = codificar_json(fn(*args)).decode("utf-8")
+            estado, error = "completado", None
+        except Exception as e:
+            print(f"❌ Trabajo {trabajo_id} ({tipo}) con error: {e}")
+            resultado, estado, error = None, "error", str(e)
+        fin = time.time()
+        trabajo_segundos.observar(fin - inicio, tipo=tipo, etapa="ejecucion")
+        con.execute("UPDATE trabajos SET estado = ?, terminado = ?, resultado = ?, error = ? WHERE id = ?",
+                    (estado, fin, resultado, error, trabajo_id))
+
+    # ---------- consulta ----------
+    def obtener(self, trabajo_id):
+        """Estado del trabajo (con `resultado` si terminó) o None si no existe."""
+        con = self._conexion()
+        fila = con.execute("SELECT * FROM trabajos WHERE id = ?", (trabajo_id,)).fetchone()
+        return self._a_dict(con, fila) if fila is not None else None
+
+    def _a_dict(self, con, fila):
+        trabajo = {
+            "id": fila["id"],
+            "tipo": fila["tipo"],
+            "estado": fila["estado"],
+            "creado": fila["creado"],
+            "iniciado": fila["iniciado"],
+            "terminado": fila["terminado"],
+        }
+        if fila["estado"] == "en_cola":
+            # Trabajos en cola que llegaron antes (de todos los workers)
+            trabajo["posicion"] = con.execute(
+                "SELECT COUNT(*) FROM trabajos WHERE estado = 'en_cola' AND creado < ?", (fila["creado"],)
+            ).fetchone()[0]
+        if fila["resultado"] is not None:
+            trabajo["resultado"] = json.loads(fila["resultado"])
+        if fila["error"] is not None:
+            trabajo["error"] = fila["error"]
+        return trabajo
+
+    def estadisticas(self):
+        try:
+            con = self._conexion()
+            por_estado = dict(con.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado").fetchall())
+        except sqlite3.Error as e:
+            return {"error": str(e)}
+        return {
+            "ruta": self.ruta,
+            "trabajadores_por_proceso": self.trabajadores,
+            "max_pendientes": self.max_pendientes,
+            "pendientes": sum(por_estado.get(e, 0) for e in ACTIVOS),
+            "por_estado": por_estado,
+        }
+
+
+# Instancia compartida del proceso
+cola_trabajos = ColaTrabajos()
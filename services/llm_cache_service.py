@@ -0,0 +1,224 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+# Archivo SQLite compartido por todos los workers ("" desactiva la cache)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+LLM_CACHE_MAX_ENTRADAS = int(os.getenv("LLM_CACHE_MAX_ENTRADAS", "20000"))
+# Cada cuántos segundos se vuelcan a SQLite los accesos y contadores acumulados en memoria
+LLM_CACHE_VOLCADO_SEGUNDOS = float(os.getenv("LLM_CACHE_VOLCADO_SEGUNDOS", "5"))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    clave TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    llamadas INTEGER NOT NULL,
+    creado REAL NOT NULL,
+    ultimo_acceso REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_acceso ON llm_cache (ultimo_acceso);
+CREATE TABLE IF NOT EXISTS llm_cache_stats (
+    nombre TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+
+def clave_cache(tipo, modelo, version_plantilla, *partes):
+    """
+    Clave direccionada por contenido: hash del modelo, la versión de la
+    plantilla del prompt y el contenido que la alimenta (descripción del
+    ticket, versión de las hojas de referencia, etc.).
+    """
+    h = hashlib.sha256()
+    for parte in (tipo, modelo, version_plantilla, *partes):
+        h.update(str(parte).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class LLMCache:
+    """
+    Cache persistente de resultados de LLM en SQLite (modo WAL), compartida
+    entre workers de gunicorn y que sobrevive a reinicios. Desalojo LRU por
+    `ultimo_acceso` con tope de tamaño total y de número de entradas.
+    Una lectura solo hace un SELECT: el `ultimo_acceso` y los contadores
+    (hits, misses, llamadas ahorradas) se acumulan en memoria y se vuelcan
+    en una sola transacción cada `volcado_segundos`, antes de desalojar y
+    al pedir estadísticas.
+    """
+
+    def __init__(self, ruta=LLM_CACHE_PATH, max_mb=LLM_CACHE_MAX_MB, max_entradas=LLM_CACHE_MAX_ENTRADAS,
+                 volcado_segundos=LLM_CACHE_VOLCADO_SEGUNDOS):
+        self.ruta = ruta
+        self.max_bytes = int(max_mb * 2**20)
+        self.max_entradas = max_entradas
+        self.volcado_segundos = volcado_segundos
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._accesos = {}      # clave -> último acceso aún no escrito
+        self._contadores = {}   # nombre -> incremento aún no escrito
+        self._pid = os.getpid()
+        self._ultimo_volcado = time.monotonic()
+
+    @property
+    def activa(self):
+        return bool(self.ruta)
+
+    def _conexion(self):
+        # Una conexión por hilo y por proceso (las conexiones no sobreviven al fork)
+        con = getattr(self._local, "con", None)
+        if con is not None and self._local.pid == os.getpid():
+            return con
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        con = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.executescript(_ESQUEMA)
+        self._local.con, self._local.pid = con, os.getpid()
+        return con
+
+    def _sumar(self, con, nombre, cantidad=1):
+        con.execute(
+            "INSERT INTO llm_cache_stats (nombre, valor) VALUES (?, ?) "
+            "ON CONFLICT(nombre) DO UPDATE SET valor = valor + excluded.valor",
+            (nombre, cantidad),
+        )
+
+    def obtener(self, clave):
+        """Valor (deserializado) o None si no está en cache."""
+        if not self.activa:
+            return None
+        try:
+            fila = self._conexion().execute(
+                "SELECT valor, llamadas FROM llm_cache WHERE clave = ?", (clave,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache LLM no disponible: {e}")
+            return None
+        if fila is None:
+            self._anotar(None, {"misses": 1})
+            return None
+        self._anotar(clave, {"hits": 1, "llamadas_ahorradas": fila[1]})
+        return json.loads(fila[0])
+
+    def _anotar(self, clave, contadores):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Lo pendiente heredado del fork ya lo escribirá el proceso padre
+                self._accesos, self._contadores, self._pid = {}, {}, os.getpid()
+            if clave is not None:
+                self._accesos[clave] = time.time()
+            for nombre, cantidad in contadores.items():
+                self._contadores[nombre] = self._contadores.get(nombre, 0) + cantidad
+            vencido = time.monotonic() - self._ultimo_volcado >= self.volcado_segundos
+        if vencido:
+            self.volcar()
+
+    def volcar(self):
+        """Escribe en SQLite los accesos y contadores acumulados en memoria."""
+        if not self.activa:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._accesos, self._contadores, self._pid = {}, {}, os.getpid()
+            accesos, contadores = self._accesos, self._contadores
+            self._accesos, self._contadores = {}, {}
+            self._ultimo_volcado = time.monotonic()
+        if not accesos and not contadores:
+            return
+        try:
+            con = self._conexion()
+            con.execute("BEGIN")
+            try:
+                con.executemany(
+                    "UPDATE llm_cache SET ultimo_acceso = MAX(ultimo_acceso, ?) WHERE clave = ?",
+                    [(instante, clave) for clave, instante in accesos.items()],
+                )
+                for nombre, cantidad in contadores.items():
+                    self._sumar(con, nombre, cantidad)
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Solo se pierde la recencia LRU y parte de las estadísticas
+            print(f"⚠️ No se pudieron volcar los accesos a la cache LLM: {e}")
+
+    def guardar(self, clave, tipo, valor, llamadas=1):
+        """Guarda un resultado; `llamadas` es cuántas llamadas al LLM evita un acierto."""
+        if not self.activa:
+            return
+        self.volcar()  # el desalojo LRU debe ver los accesos recientes
+        try:
+            datos = json.dumps(valor, ensure_ascii=False)
+            ahora = time.time()
+            con = self._conexion()
+            con.execute(
+                "INSERT OR REPLACE INTO llm_cache (clave, tipo, valor, bytes, llamadas, creado, ultimo_acceso) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (clave, tipo, datos, len(datos.encode("utf-8")), llamadas, ahora, ahora),
+            )
+            self._desalojar(con)
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo guardar en la cache LLM: {e}")
+
+    def _desalojar(self, con):
+        entradas, total = con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()
+        if entradas <= self.max_entradas and total <= self.max_bytes:
+            return
+        # Borrar las menos usadas recientemente hasta volver bajo ambos topes
+        sobrantes = max(entradas - self.max_entradas, 0)
+        exceso = total - self.max_bytes
+        borrar, liberado = [], 0
+        for clave, tam in con.execute("SELECT clave, bytes FROM llm_cache ORDER BY ultimo_acceso ASC"):
+            if len(borrar) >= sobrantes and liberado >= exceso:
+                break
+            borrar.append((clave,))
+            liberado += tam
+        con.executemany("DELETE FROM llm_cache WHERE clave = ?", borrar)
+        self._sumar(con, "desalojos", len(borrar))
+
+    def estadisticas(self):
+        if not self.activa:
+            return {"activa": False}
+        self.volcar()
+        try:
+            con = self._conexion()
+            contadores = dict(con.execute("SELECT nombre, valor FROM llm_cache_stats").fetchall())
+            entradas, total = con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()
+        except sqlite3.Error as e:
+            return {"activa": True, "error": str(e)}
+        hits, misses = contadores.get("hits", 0), contadores.get("misses", 0)
+        return {
+            "activa": True,
+            "ruta": self.ruta,
+            "entradas": entradas,
+            "mb": round(total / 2**20, 3),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "llamadas_ahorradas": contadores.get("llamadas_ahorradas", 0),
+            "desalojos": contadores.get("desalojos", 0),
+        }
+
+
+# Instancia compartida del proceso
+llm_cache = LLMCache()
+atexit.register(llm_cache.volcar)
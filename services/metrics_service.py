@@ -0,0 +1,322 @@
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+PREFIJO = "difods_"
+# Cabecera Server-Timing en todas las respuestas (también con "X-Server-Timing: 1" por petición)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+# Habilita /debug/perfil (perfilador por muestreo); apagado por defecto
+PERFILADOR_HABILITADO = os.getenv("PERFILADOR_HABILITADO", "0") == "1"
+
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_BYTES = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+
+# =====================================
+# 🔹 MÉTRICAS (formato de exposición de Prometheus)
+# =====================================
+# Métricas en memoria del proceso: con varios workers de gunicorn cada uno
+# expone las suyas (el despliegue actual usa un solo worker).
+_METRICAS = {}
+_RECOLECTORES = []
+
+
+def _etiquetas_texto(nombres, valores):
+    if not nombres:
+        return ""
+    pares = []
+    for nombre, valor in zip(nombres, valores):
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{nombre}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador monotónico con etiquetas."""
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _METRICAS[self.nombre] = self
+
+    def inc(self, valor=1, **etiquetas):
+        clave = tuple(etiquetas.get(e, "") for e in self.etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def muestras(self):
+        with self._lock:
+            valores = dict(self._valores)
+        for clave, valor in sorted(valores.items()):
+            yield f"{self.nombre}{_etiquetas_texto(self.etiquetas, clave)} {_numero(valor)}"
+
+
+class Histograma:
+    """Histograma acumulativo (buckets fijos) con etiquetas."""
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+        _METRICAS[self.nombre] = self
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(etiquetas.get(e, "") for e in self.etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def promedio(self, **etiquetas):
+        """Media de las observaciones de una serie (None si no hay ninguna)."""
+        clave = tuple(etiquetas.get(e, "") for e in self.etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            return serie[1] / serie[2] if serie and serie[2] else None
+
+    def muestras(self):
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        nombres = self.etiquetas + ("le",)
+        for clave, (conteos, suma, total) in sorted(series.items()):
+            acumulado = 0
+            for limite, n in zip(self.buckets, conteos):
+                acumulado += n
+                yield f"{self.nombre}_bucket{_etiquetas_texto(nombres, clave + (_numero(limite),))} {acumulado}"
+            yield f"{self.nombre}_sum{_etiquetas_texto(self.etiquetas, clave)} {_numero(round(suma, 6))}"
+            yield f"{self.nombre}_count{_etiquetas_texto(self.etiquetas, clave)} {total}"
+
+
+def registrar_recolector(fn):
+    """
+    `fn()` devuelve [(nombre, tipo, ayuda, [(dict_etiquetas, valor), ...]), ...]
+    y se evalúa en cada lectura de /metrics (p.ej. estadísticas de caches).
+    """
+    _RECOLECTORES.append(fn)
+    return fn
+
+
+def exportar():
+    """Texto de todas las métricas en el formato de exposición de Prometheus."""
+    lineas = []
+    for metrica in list(_METRICAS.values()):
+        lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+        lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+        lineas.extend(metrica.muestras())
+    for recolector in _RECOLECTORES:
+        try:
+            familias = recolector()
+        except Exception as e:
+            print(f"⚠️ Recolector de métricas con error: {e}")
+            continue
+        for nombre, tipo, ayuda, muestras in familias:
+            nombre = PREFIJO + nombre
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                if valor is None:
+                    continue
+                lineas.append(f"{nombre}{_etiquetas_texto(tuple(etiquetas), tuple(etiquetas.values()))} {_numero(valor)}")
+    return "\n".join(lineas) + "\n"
+
+
+# Métricas comunes a todos los servicios
+peticiones_segundos = Histograma("http_peticion_segundos", "Latencia de las peticiones HTTP (hasta enviar cabeceras).",
+                                 ("ruta", "metodo", "estado"))
+respuesta_bytes = Histograma("http_respuesta_bytes", "Tamaño de las respuestas HTTP no streaming.",
+                             ("ruta",), BUCKETS_BYTES)
+tramo_segundos = Histograma("tramo_segundos", "Duración de cada etapa instrumentada.", ("tramo",))
+tramo_errores = Contador("tramo_errores_total", "Etapas instrumentadas que terminaron con excepción.", ("tramo",))
+hoja_bytes = Histograma("hoja_bytes", "Tamaño de las hojas descargadas.", ("hoja",), BUCKETS_BYTES)
+llm_llamadas = Contador("llm_llamadas_total", "Llamadas a la API de OpenAI.", ("operacion", "resultado"))
+llm_tokens = Contador("llm_tokens_total", "Tokens consumidos en llamadas a OpenAI.", ("operacion", "tipo"))
+
+
+# =====================================
+# 🔹 TRAMOS (spans) Y SERVER-TIMING
+# =====================================
+# Lista de (tramo, segundos) de la petición en curso; None fuera de una petición
+_tramos_peticion = contextvars.ContextVar("tramos_peticion", default=None)
+
+
+def iniciar_peticion():
+    """Empieza a acumular los tramos de la petición actual (para Server-Timing)."""
+    tramos = []
+    _tramos_peticion.set(tramos)
+    return tramos
+
+
+def tramos_peticion():
+    return _tramos_peticion.get() or []
+
+
+@contextmanager
+def tramo(nombre):
+    """Mide una etapa: histograma `tramo_segundos` + entrada en Server-Timing."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        tramo_errores.inc(tramo=nombre)
+        raise
+    finally:
+        segundos = time.perf_counter() - inicio
+        tramo_segundos.observar(segundos, tramo=nombre)
+        tramos = _tramos_peticion.get()
+        if tramos is not None:
+            tramos.append((nombre, segundos))  # list.append es atómico entre hilos
+
+
+def medido(nombre):
+    """Decorador equivalente a `with tramo(nombre)` (funciones normales y corrutinas)."""
+    def decorador(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def envoltura_async(*args, **kwargs):
+                with tramo(nombre):
+                    return await fn(*args, **kwargs)
+            return envoltura_async
+
+        @wraps(fn)
+        def envoltura(*args, **kwargs):
+            with tramo(nombre):
+                return fn(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+async def con_tramos_de(tramos, coro):
+    """Ejecuta `coro` (en otro hilo/loop) acumulando sus tramos en la lista `tramos`."""
+    _tramos_peticion.set(tramos)
+    return await coro
+
+
+def cabecera_server_timing(tramos, total=None):
+    # Los tramos repetidos (p.ej. varias llamadas al LLM) se suman
+    acumulado, veces = {}, Counter()
+    for nombre, segundos in tramos:
+        acumulado[nombre] = acumulado.get(nombre, 0.0) + segundos
+        veces[nombre] += 1
+    partes = []
+    for nombre, segundos in acumulado.items():
+        desc = f';desc="x{veces[nombre]}"' if veces[nombre] > 1 else ""
+        partes.append(f"{nombre};dur={segundos * 1000:.1f}{desc}")
+    if total is not None:
+        partes.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(partes)
+
+
+def registrar_uso_llm(respuesta, operacion):
+    """Cuenta la llamada y los tokens informados por la API de respuestas."""
+    llm_llamadas.inc(operacion=operacion, resultado="ok")
+    uso = getattr(respuesta, "usage", None)
+    if uso is None:
+        return
+    for tipo in ("input_tokens", "output_tokens"):
+        cantidad = getattr(uso, tipo, None)
+        if cantidad:
+            llm_tokens.inc(cantidad, operacion=operacion, tipo=tipo.replace("_tokens", ""))
+
+
+# =====================================
+# 🔹 PERFILADOR POR MUESTREO
+# =====================================
+class PerfiladorMuestreo:
+    """
+    Toma muestras periódicas de las pilas de todos los hilos
+    (sys._current_frames) y las acumula en formato "collapsed"
+    (una línea por pila: marco;marco;marco N), compatible con
+    flamegraph.pl y speedscope. El muestreo corre en su propio hilo y,
+    con `segundos`, se detiene solo al cumplirse el plazo.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.muestras = Counter()
+        self._activo = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._hasta = None
+
+    @property
+    def activo(self):
+        return self._activo.is_set()
+
+    @property
+    def terminado(self):
+        """Hubo al menos un perfilado y ya no está en curso."""
+        return self._hilo is not None and not self.activo
+
+    @property
+    def restante(self):
+        return max(self._hasta - time.monotonic(), 0.0) if self.activo and self._hasta else None
+
+    def iniciar(self, segundos=None):
+        """Empieza a muestrear; False si ya hay un perfilado en curso."""
+        with self._lock:
+            if self.activo:
+                return False
+            self.muestras = Counter()
+            self._hasta = time.monotonic() + segundos if segundos else None
+            self._activo.set()
+            self._hilo = threading.Thread(target=self._bucle, name="perfilador", daemon=True)
+            self._hilo.start()
+            return True
+
+    def detener(self):
+        self._activo.clear()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join()
+        return self
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        while self._activo.is_set():
+            for ident, marco in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                marcos = []
+                while marco is not None:
+                    codigo = marco.f_code
+                    marcos.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{marco.f_lineno})")
+                    marco = marco.f_back
+                self.muestras[";".join(reversed(marcos))] += 1
+            if self._hasta is not None and time.monotonic() >= self._hasta:
+                self._activo.clear()
+                break
+            time.sleep(self.intervalo)
+
+    def collapsed(self):
+        return "\n".join(f"{pila} {n}" for pila, n in self.muestras.most_common()) + "\n"
+
+
+perfilador = PerfiladorMuestreo()
@@ -1,26 +1,223 @@
-import pandas as pd
+import os
+from datetime import date, datetime
+
+import joblib
 import numpy as np
-import random
+import pandas as pd
+from dotenv import load_dotenv
+
+from services.etl_service import memo_por_snapshot
+from services.metrics_service import medido, tramo
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+# Artefacto del modelo entrenado (flask entrenar-sla)
+MODELO_SLA_PATH = os.getenv("MODELO_SLA_PATH", os.path.join("models", "sla_riesgo.joblib"))
+
+# Días de atención comprometidos por prioridad
+SLA_DIAS = {
+    "ALTA": float(os.getenv("SLA_DIAS_ALTA", "2")),
+    "MEDIA": float(os.getenv("SLA_DIAS_MEDIA", "5")),
+    "BAJA": float(os.getenv("SLA_DIAS_BAJA", "10")),
+}
+SLA_DIAS_DEFECTO = float(os.getenv("SLA_DIAS_DEFECTO", "5"))
+
+FORMATO_FECHA = "%d/%m/%Y"
+COLUMNAS_CATEGORIA = ["PRIORIDAD", "TIPO REQUERIMIENTO", "AREA"]
+COLUMNAS_NUMERICAS = ["EDAD_DIAS", "FRACCION_SLA", "DIA_SEMANA"]
+
+
+# =====================================
+# 🔹 FEATURES (vectorizadas)
+# =====================================
+def _por_valores_unicos(serie, fn):
+    # Las columnas tienen pocos valores distintos: se transforma cada uno una sola vez
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    return pd.Series(np.asarray(fn(pd.Index(unicos)))[codigos], index=serie.index)
+
+
+def _fecha(df, columna):
+    if columna not in df.columns:
+        return pd.Series(pd.NaT, index=df.index)
+    serie = df[columna]
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return _por_valores_unicos(serie, lambda u: pd.to_datetime(u, format=FORMATO_FECHA, errors="coerce"))
+
+
+def _categoria(df, columna):
+    if columna not in df.columns:
+        return pd.Series("", index=df.index)
+    return _por_valores_unicos(df[columna], lambda u: u.astype(str).str.strip().str.upper())
+
+
+def dias_sla(prioridad):
+    """Días de SLA por fila según la PRIORIDAD (ya en mayúsculas)."""
+    return prioridad.map(SLA_DIAS).astype(float).fillna(SLA_DIAS_DEFECTO)
+
+
+def construir_features(df, edad_dias):
+    """Matriz de entrada del modelo: categorías + edad del ticket en días."""
+    x = pd.DataFrame({col: _categoria(df, col) for col in COLUMNAS_CATEGORIA}, index=df.index)
+    registro = _fecha(df, "FECHA DE REGISTRO")
+    edad = np.clip(np.nan_to_num(np.asarray(edad_dias, dtype=float)), 0, None)
+    x["EDAD_DIAS"] = edad
+    x["FRACCION_SLA"] = edad / dias_sla(x["PRIORIDAD"]).to_numpy()
+    x["DIA_SEMANA"] = registro.dt.dayofweek.fillna(0).to_numpy()
+    return x
+
+
+def _duracion_dias(df):
+    """Días entre el registro y la atención final (NaN si sigue abierto)."""
+    return (_fecha(df, "FECHA_FINAL_ATENCION") - _fecha(df, "FECHA DE REGISTRO")).dt.days.to_numpy(dtype=float)
+
+
+def _edad_actual(df, hoy=None):
+    """Edad en días: hasta la atención final si existe, si no hasta hoy."""
+    hoy = pd.Timestamp(hoy or datetime.now()).normalize()
+    fin = _fecha(df, "FECHA_FINAL_ATENCION").fillna(hoy)
+    return (fin - _fecha(df, "FECHA DE REGISTRO")).dt.days.to_numpy(dtype=float)
+
+
+# =====================================
+# 🔹 ENTRENAMIENTO
+# =====================================
+def entrenar_modelo(df, ruta=MODELO_SLA_PATH, semilla=0):
+    """
+    Entrena el modelo de riesgo SLA con los tickets ya atendidos y lo
+    guarda con joblib. Cada ticket se observa en una edad aleatoria
+    anterior a su cierre, así el modelo estima P(incumplir SLA | sigue
+    abierto a esa edad). Devuelve las métricas del entrenamiento.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    duracion = _duracion_dias(df)
+    cerrados = ~np.isnan(duracion) & (duracion >= 0)
+    df, duracion = df[cerrados], duracion[cerrados]
+    if len(df) < 50:
+        raise ValueError(f"Muy pocos tickets atendidos para entrenar ({len(df)})")
+
+    rng = np.random.default_rng(semilla)
+    edad = rng.uniform(0, duracion + 1)
+    x = construir_features(df, edad)
+    y = (duracion > dias_sla(x["PRIORIDAD"]).to_numpy()).astype(int)
+    if y.min() == y.max():
+        raise ValueError("Todos los tickets tienen la misma etiqueta de SLA; no se puede entrenar")
+
+    modelo = Pipeline([
+        ("features", ColumnTransformer([
+            ("categorias", OneHotEncoder(handle_unknown="ignore", min_frequency=5), COLUMNAS_CATEGORIA),
+            ("numericas", StandardScaler(), COLUMNAS_NUMERICAS),
+        ])),
+        ("clasificador", LogisticRegression(max_iter=1000, class_weight="balanced")),
+    ])
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, random_state=semilla, stratify=y)
+    modelo.fit(x_train, y_train)
+    metricas = {
+        "filas": int(len(x)),
+        "tasa_incumplimiento": round(float(y.mean()), 4),
+        "auc_validacion": round(float(roc_auc_score(y_test, modelo.predict_proba(x_test)[:, 1])), 4),
+    }
+    modelo.fit(x, y)  # modelo final con todos los datos
+
+    artefacto = {"modelo": modelo, "entrenado_en": datetime.now().isoformat(timespec="seconds"),
+                 "sla_dias": dict(SLA_DIAS), "metricas": metricas}
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    joblib.dump(artefacto, ruta)
+    return metricas
+
+
+# =====================================
+# 🔹 CARGA (una vez por proceso)
+# =====================================
+def cargar_modelo(ruta=MODELO_SLA_PATH):
+    """Artefacto entrenado o None si no existe / no se puede leer."""
+    if not ruta or not os.path.exists(ruta):
+        print(f"⚠️ Modelo SLA no encontrado en {ruta}; se usa la heurística de edad/prioridad")
+        return None
+    try:
+        artefacto = joblib.load(ruta)
+        print(f"🟢 Modelo SLA cargado ({artefacto.get('entrenado_en')})")
+        return artefacto
+    except Exception as e:
+        print(f"❌ No se pudo cargar el modelo SLA: {e}")
+        return None
+
+
+_artefacto = cargar_modelo()
+
+
+def recargar_modelo(ruta=MODELO_SLA_PATH):
+    global _artefacto
+    _artefacto = cargar_modelo(ruta)  # la versión del modelo es parte de la clave de la memo
+    return _artefacto
+
+
+def info_modelo():
+    if _artefacto is None:
+        return {"tipo": "heuristico", "ruta": MODELO_SLA_PATH}
+    return {"tipo": "modelo", "ruta": MODELO_SLA_PATH, "entrenado_en": _artefacto.get("entrenado_en"),
+            "metricas": _artefacto.get("metricas")}
+
+
+# =====================================
+# 🔹 PREDICCIÓN EN LOTE
+# =====================================
+def riesgo_sla(df, hoy=None):
+    """Probabilidad de incumplir el SLA para todas las filas (vector numpy)."""
+    with tramo("sla.features"):
+        x = construir_features(df, _edad_actual(df, hoy))
+    if _artefacto is not None:
+        with tramo("sla.modelo"):
+            return _artefacto["modelo"].predict_proba(x)[:, 1]
+    # Sin modelo: curva logística sobre la fracción del SLA consumida
+    return 1 / (1 + np.exp(-6 * (x["FRACCION_SLA"].to_numpy() - 0.75)))
+
+
+def _alertas(riesgo):
+    return np.select([riesgo > 0.7, riesgo > 0.4], ["ALTA", "MEDIA"], "BAJA")
+
+
+@memo_por_snapshot
+def _riesgo_por_snapshot(df, version_modelo, hoy):
+    """
+    Resultados ya serializables; se calculan una vez por snapshot, modelo
+    y día (`hoy`, YYYY-MM-DD: la edad de los tickets abiertos cambia cada
+    día aunque el snapshot siga siendo el mismo).
+    """
+    riesgo = np.round(riesgo_sla(df, hoy), 2)
+    columnas = {
+        "TICKET": df["TICKET"].tolist() if "TICKET" in df.columns else [""] * len(df),
+        "PRIORIDAD": df["PRIORIDAD"].astype(object).where(df["PRIORIDAD"].notna(), "").tolist()
+        if "PRIORIDAD" in df.columns else [""] * len(df),
+        "riesgo_sla": riesgo.tolist(),
+        "alerta": _alertas(riesgo).tolist(),
+    }
+    nombres = list(columnas)
+    return [dict(zip(nombres, fila)) for fila in zip(*columnas.values())]
+
 
 # ============================================================
-# FUNCIÓN: Predicción simulada de riesgo SLA
+# FUNCIÓN: Predicción de riesgo SLA
 # ============================================================
+@medido("sla.prediccion")
 def predict_sla_risk(data):
     """
-    Recibe una lista de tickets (diccionarios o dataframe)
-    y devuelve un listado con la probabilidad simulada de riesgo SLA.
+    Recibe los tickets (dataframe del snapshot o lista de diccionarios) y
+    devuelve un listado con la probabilidad de riesgo SLA de cada uno.
     """
-    df = pd.DataFrame(data)
+    if isinstance(data, dict) and "error" in data:
+        return data
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
     if df.empty:
         return []
-
-    resultados = []
-    for _, row in df.iterrows():
-        riesgo = random.uniform(0, 1)
-        resultados.append({
-            "TICKET": row.get("TICKET", ""),
-            "PRIORIDAD": row.get("PRIORIDAD", ""),
-            "riesgo_sla": round(riesgo, 2),
-            "alerta": "ALTA" if riesgo > 0.7 else "MEDIA" if riesgo > 0.4 else "BAJA"
-        })
-    return resultados
+    version_modelo = _artefacto.get("entrenado_en") if _artefacto is not None else None
+    return _riesgo_por_snapshot(df, version_modelo, date.today().isoformat())
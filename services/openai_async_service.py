@@ -0,0 +1,327 @@
+import asyncio
+import json
+import os
+import random
+import threading
+
+from dotenv import load_dotenv
+
+from services.llm_cache_service import llm_cache
+from services.clasificador_local_service import prediccion_local, registrar_camino
+from services.metrics_service import tramo, con_tramos_de, tramos_peticion, llm_llamadas, registrar_uso_llm
+from services.openai_service import (
+    MODELO_OPENAI,
+    armar_ticket_info,
+    clave_clasificacion,
+    clave_respuesta,
+    firmar_respuesta,
+    guardar_clasificacion,
+    limpiar_json,
+    obtener_especialista,
+    obtener_referencias,
+    obtener_tdr_por_dni,
+    parsear_clasificacion,
+    prompt_clasificacion,
+    prompt_respuesta,
+    prompt_tipo,
+)
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+load_dotenv()
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))             # segundos por llamada
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))        # reintentos por llamada
+OPENAI_RETRY_BASE = float(os.getenv("OPENAI_RETRY_BASE", "0.5"))      # base del backoff (s)
+OPENAI_MAX_CONCURRENCIA = int(os.getenv("OPENAI_MAX_CONCURRENCIA", "16"))
+
+
+# =====================================
+# 🔹 EVENT LOOP COMPARTIDO DEL PROCESO
+# =====================================
+class _LoopCompartido:
+    """
+    Un único event loop por proceso, en un hilo daemon. El cliente async
+    (y su pool de conexiones) y el semáforo viven en ese loop, así que
+    todas las peticiones Flask del worker reutilizan las mismas conexiones.
+    El SDK de openai se importa aquí, en la primera llamada, no al importar la app.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.loop = None
+        self.cliente = None
+        self.semaforo = None
+        self.reintentables = ()
+
+    def asegurar(self):
+        if self._pid == os.getpid() and self.loop is not None:
+            return self
+        with self._lock:
+            if self._pid == os.getpid() and self.loop is not None:
+                return self
+            import openai
+
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="openai-async", daemon=True).start()
+            # Errores transitorios que vale la pena reintentar
+            self.reintentables = (
+                asyncio.TimeoutError,
+                openai.APIConnectionError,
+                openai.APITimeoutError,
+                openai.RateLimitError,
+                openai.InternalServerError,
+            )
+            # Los reintentos se manejan aquí (con jitter), no en el SDK
+            self.cliente = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, timeout=OPENAI_TIMEOUT)
+            self.semaforo = asyncio.run_coroutine_threadsafe(_crear_semaforo(), loop).result()
+            self.loop = loop
+            self._pid = os.getpid()
+        return self
+
+
+async def _crear_semaforo():
+    return asyncio.Semaphore(OPENAI_MAX_CONCURRENCIA)
+
+
+_compartido = _LoopCompartido()
+
+
+def ejecutar(coro, timeout=None):
+    """Ejecuta una corrutina en el loop compartido y espera su resultado (para código síncrono)."""
+    loop = _compartido.asegurar().loop
+    # Los tramos medidos dentro del loop se suman a los de la petición que espera
+    coro = con_tramos_de(tramos_peticion(), coro)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def llamar_llm(prompt, operacion="llm", modelo=MODELO_OPENAI):
+    """
+    Una llamada a la API de respuestas con timeout por llamada, reintentos
+    acotados con backoff exponencial + jitter, y concurrencia limitada.
+    """
+    compartido = _compartido.asegurar()
+    with tramo("llm.espera_semaforo"):
+        await compartido.semaforo.acquire()
+    try:
+        for intento in range(OPENAI_MAX_RETRIES + 1):
+            try:
+                with tramo(f"llm.{operacion}"):
+                    resp = await asyncio.wait_for(
+                        compartido.cliente.responses.create(model=modelo, input=prompt),
+                        timeout=OPENAI_TIMEOUT,
+                    )
+                registrar_uso_llm(resp, operacion)
+                return resp.output_text
+            except compartido.reintentables as e:
+                llm_llamadas.inc(operacion=operacion, resultado="reintento" if intento < OPENAI_MAX_RETRIES else "error")
+                if intento == OPENAI_MAX_RETRIES:
+                    raise
+                espera = random.uniform(0, OPENAI_RETRY_BASE * 2 ** intento)  # full jitter
+                print(f"⚠️ Reintento {intento + 1} de la llamada a OpenAI en {espera:.2f}s: {e!r}")
+                await asyncio.sleep(espera)
+            except Exception:
+                llm_llamadas.inc(operacion=operacion, resultado="error")
+                raise
+    finally:
+        compartido.semaforo.release()
+
+
+async def stream_llm(prompt, operacion="llm", modelo=MODELO_OPENAI):
+    """
+    Como llamar_llm pero con stream=True: produce los fragmentos de texto a
+    medida que llegan. Solo se reintenta si la llamada falla antes del
+    primer fragmento (los siguientes ya pueden estar en el navegador).
+    """
+    compartido = _compartido.asegurar()
+    with tramo("llm.espera_semaforo"):
+        await compartido.semaforo.acquire()
+    try:
+        for intento in range(OPENAI_MAX_RETRIES + 1):
+            emitido = False
+            try:
+                with tramo(f"llm.{operacion}"):
+                    stream = await asyncio.wait_for(
+                        compartido.cliente.responses.create(model=modelo, input=prompt, stream=True),
+                        timeout=OPENAI_TIMEOUT,
+                    )
+                    async with stream:
+                        async for evento in stream:
+                            if evento.type == "response.output_text.delta":
+                                emitido = True
+                                yield evento.delta
+                            elif evento.type == "response.completed":
+                                registrar_uso_llm(evento.response, operacion)
+                return
+            except compartido.reintentables as e:
+                ultimo = emitido or intento == OPENAI_MAX_RETRIES
+                llm_llamadas.inc(operacion=operacion, resultado="error" if ultimo else "reintento")
+                if ultimo:
+                    raise
+                espera = random.uniform(0, OPENAI_RETRY_BASE * 2 ** intento)  # full jitter
+                print(f"⚠️ Reintento {intento + 1} de la llamada a OpenAI en {espera:.2f}s: {e!r}")
+                await asyncio.sleep(espera)
+            except Exception:
+                llm_llamadas.inc(operacion=operacion, resultado="error")
+                raise
+    finally:
+        compartido.semaforo.release()
+
+
+def iterar(agen):
+    """Recorre un generador async en el loop compartido desde código síncrono (respuestas en streaming)."""
+    loop = _compartido.asegurar().loop
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Si el cliente se desconecta, cerrar el generador libera el semáforo y la conexión
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+# =====================================
+# 🔹 PIPELINE ASYNC
+# =====================================
+async def clasificar_ticket_async(descripcion_ticket, referencias):
+    """Versión async de clasificar_ticket (mismos prompts y formato de salida)."""
+    if not descripcion_ticket or descripcion_ticket.strip() == "":
+        return {"error": "Descripción vacía"}
+
+    clave = clave_clasificacion(descripcion_ticket, referencias)
+    cacheado = await asyncio.to_thread(llm_cache.obtener, clave)
+    if cacheado is not None:
+        return cacheado
+
+    local = prediccion_local(descripcion_ticket)
+    if local["clasificacion"] is not None:
+        registrar_camino("local")
+        return local["clasificacion"]
+
+    tipo_requerimiento = local["tipo_requerimiento"]
+    registrar_camino("solo_tipo" if tipo_requerimiento else "llm")
+    llamadas = 1 if tipo_requerimiento else 2
+    if not tipo_requerimiento:
+        try:
+            texto_tipo = await llamar_llm(prompt_tipo(descripcion_ticket, referencias.lista_tipos), "tipo")
+            tipo_requerimiento = json.loads(limpiar_json(texto_tipo)).get("tipo_requerimiento", "")
+        except Exception as e:
+            print("⚠️ No se pudo determinar tipo_requerimiento:", e)
+            tipo_requerimiento = ""
+
+    try:
+        texto = await llamar_llm(prompt_clasificacion(descripcion_ticket, referencias, tipo_requerimiento), "clasificacion")
+        result = parsear_clasificacion(texto)
+        await asyncio.to_thread(guardar_clasificacion, clave, result, llamadas)
+        return result
+    except Exception as e:
+        print("❌ Error en clasificar_ticket_async:", e)
+        return {"error": str(e)}
+
+
+async def generar_respuesta_async(ticket_info):
+    try:
+        prompt = prompt_respuesta(ticket_info)
+        clave = clave_respuesta(prompt)
+        cacheado = await asyncio.to_thread(llm_cache.obtener, clave)
+        if cacheado is not None:
+            return {"respuesta_sugerida": cacheado}
+
+        texto = firmar_respuesta(await llamar_llm(prompt, "respuesta"))
+        await asyncio.to_thread(llm_cache.guardar, clave, "respuesta", texto)
+        return {"respuesta_sugerida": texto}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def analizar_ticket_completo_async(descripcion_ticket, datos_usuario=None):
+    """
+    Mismo resultado que analizar_ticket_completo, pero:
+    - las hojas de referencia se obtienen en un hilo sin bloquear el loop,
+    - las llamadas a OpenAI comparten conexiones y respetan el semáforo.
+    Cada paso depende del anterior (el prompt de tipo usa las hojas, la
+    respuesta usa el especialista), así que no hay llamadas que solapar;
+    la concurrencia está entre tickets, no dentro de uno.
+    """
+    try:
+        referencias = await asyncio.to_thread(obtener_referencias)
+    except Exception as e:
+        return {"error": f"No se pudieron leer las hojas de referencia: {e}"}
+
+    clasificacion = await clasificar_ticket_async(descripcion_ticket, referencias)
+    if "error" in clasificacion:
+        return clasificacion
+
+    tipo = clasificacion.get("tipo_requerimiento", "")
+    req = clasificacion.get("requerimiento", "")
+    area = clasificacion.get("area_asignada", "")
+
+    especialista = obtener_especialista(tipo, req, area, referencias)
+    dni = especialista["dni_encargado_proceso"] if especialista else None
+
+    # Búsqueda en un diccionario ya precalculado: no merece un hilo
+    tdr = obtener_tdr_por_dni(dni, referencias) if dni else []
+    respuesta = await generar_respuesta_async(armar_ticket_info(descripcion_ticket, datos_usuario, area, especialista))
+
+    return {
+        "clasificacion": clasificacion,
+        "especialista": especialista or "No encontrado",
+        "tdr": tdr,
+        "respuesta": respuesta
+    }
+
+
+async def analizar_ticket_eventos(descripcion_ticket, datos_usuario=None):
+    """
+    El mismo análisis que analizar_ticket_completo_async, como secuencia de
+    eventos (nombre, datos) emitidos apenas cada parte está lista:
+    clasificacion, especialista, tdr, respuesta_delta (fragmentos del LLM)
+    y respuesta (texto final firmado). Un error corta la secuencia con
+    ("error", {...}).
+    """
+    try:
+        referencias = await asyncio.to_thread(obtener_referencias)
+    except Exception as e:
+        yield "error", {"error": f"No se pudieron leer las hojas de referencia: {e}"}
+        return
+
+    clasificacion = await clasificar_ticket_async(descripcion_ticket, referencias)
+    if "error" in clasificacion:
+        yield "error", clasificacion
+        return
+    yield "clasificacion", clasificacion
+
+    area = clasificacion.get("area_asignada", "")
+    especialista = obtener_especialista(clasificacion.get("tipo_requerimiento", ""),
+                                        clasificacion.get("requerimiento", ""), area, referencias)
+    yield "especialista", especialista or "No encontrado"
+    dni = especialista["dni_encargado_proceso"] if especialista else None
+    yield "tdr", obtener_tdr_por_dni(dni, referencias) if dni else []
+
+    prompt = prompt_respuesta(armar_ticket_info(descripcion_ticket, datos_usuario, area, especialista))
+    clave = clave_respuesta(prompt)
+    cacheado = await asyncio.to_thread(llm_cache.obtener, clave)
+    if cacheado is not None:
+        yield "respuesta", {"respuesta_sugerida": cacheado}
+        return
+
+    partes = []
+    try:
+        async for fragmento in stream_llm(prompt, "respuesta"):
+            partes.append(fragmento)
+            yield "respuesta_delta", {"texto": fragmento}
+    except Exception as e:
+        yield "respuesta", {"error": str(e)}
+        return
+    texto = firmar_respuesta("".join(partes))
+    await asyncio.to_thread(llm_cache.guardar, clave, "respuesta", texto)
+    yield "respuesta", {"respuesta_sugerida": texto}
+
+
+def analizar_ticket(descripcion_ticket, datos_usuario=None):
+    """Punto de entrada síncrono (rutas Flask) del pipeline async."""
+    return ejecutar(analizar_ticket_completo_async(descripcion_ticket, datos_usuario))
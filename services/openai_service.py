@@ -1,24 +1,217 @@
+import contextvars
+import io
 import os
+import threading
 import pandas as pd
 import json
-from openai import OpenAI
+from dataclasses import dataclass
 from dotenv import load_dotenv
+from services.snapshot_cache import SnapshotCache, DEFAULT_TTL
+from services.sheet_sync_service import SheetSync, descargar_en_paralelo
+from services.snapshot_disk_service import espejo
+from services.clasificador_local_service import prediccion_local, registrar_camino
+from services.llm_cache_service import llm_cache, clave_cache
+from services.metrics_service import tramo, medido, llm_llamadas, registrar_uso_llm
 
 # =====================================
 # 🔹 CONFIGURACIÓN
 # =====================================
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 SHEET_URL = os.getenv("SHEET_URL")  # si lo usas para tus tickets
 SHEET_URL_ASIGNACION = os.getenv("SHEET_URL_ASIGNACION")
 SHEET_URL_TDR = os.getenv("SHEET_URL_TDR")  # ❌ sin espacio al final
+# Segundos que las hojas de referencia (asignación y TDR) se consideran vigentes
+REFERENCIAS_CACHE_TTL = float(os.getenv("REFERENCIAS_CACHE_TTL", DEFAULT_TTL))
+MODELO_OPENAI = "gpt-4o-mini"
+# Subir la versión al cambiar el texto de un prompt (invalida la cache LLM)
+VERSION_PROMPT_CLASIFICACION = "1"
+VERSION_PROMPT_RESPUESTA = "1"
+
+# Limitador de tasa (TokenBucket) de la operación en curso, p.ej. un lote;
+# se consulta justo antes de cada llamada real a la API (no en aciertos de cache)
+limitador_llm = contextvars.ContextVar("limitador_llm", default=None)
+
+
+# =====================================
+# 🔹 CLIENTE OPENAI (perezoso)
+# =====================================
+_cliente = None
+_lock_cliente = threading.Lock()
+
+
+def cliente_openai():
+    """
+    Cliente síncrono de OpenAI. El SDK se importa y el cliente se construye
+    en la primera llamada al LLM, no al importar la app (importar openai es
+    lo más lento del arranque del worker).
+    """
+    global _cliente
+    if _cliente is None:
+        with _lock_cliente:
+            if _cliente is None:
+                from openai import OpenAI
+                _cliente = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _cliente
+
+
+# =====================================
+# 🔹 HOJAS DE REFERENCIA (ASIGNACIÓN + TDR)
+# =====================================
+@dataclass(frozen=True)
+class ReferenciasSnapshot:
+    """
+    Hojas de asignación y TDR precalculadas para búsquedas sin escaneos:
+    - especialistas: (categoria, requerimiento, equipo) en minúsculas -> especialista
+    - especialistas_parcial: filas ya en minúsculas para la coincidencia parcial
+    - tdr_por_dni: DNI -> lista de registros TDR
+    - tipos / requerimientos_por_tipo: listas listas para los prompts
+    """
+    asignacion: pd.DataFrame
+    tdr: pd.DataFrame
+    especialistas: dict
+    especialistas_parcial: tuple
+    tdr_por_dni: dict
+    tipos: list
+    requerimientos_por_tipo: dict
+    version: str
+
+    @property
+    def lista_tipos(self):
+        return ", ".join(self.tipos)
+
+
+def _leer_asignacion(contenido):
+    return pd.read_csv(
+        io.BytesIO(contenido),
+        dtype={
+            "DNI_ENCARGO_PROCESO": str,
+            "DNI_COORDINADOR_PROCESO": str
+        },
+        on_bad_lines='skip',
+    ).fillna("")
+
+
+def _leer_tdr(contenido):
+    return pd.read_csv(
+        io.BytesIO(contenido),
+        dtype={"DNI": str},
+        on_bad_lines='skip',
+    ).fillna("")
+
+
+def _fila_especialista(fila):
+    return {
+        "dni_encargado_proceso": str(fila.get("DNI_ENCARGO_PROCESO", "")),
+        "encargado": fila.get("Encargdo del proceso", ""),
+        "rol_proceso": fila.get("Rol del proceso", ""),
+        "dni_coordinador": str(fila.get("DNI_COORDINADOR_PROCESO", "")),
+        "coordinador": fila.get("coordinador del proceso", ""),
+        "equipo": fila.get("EQUIPO", ""),
+        "categoria_requerimiento": fila.get("CATEGORIA_REQUERIMIENTO", ""),
+        "requerimiento": fila.get("REQUERIMIENTO", "")
+    }
+
+
+def construir_referencias(df_asignacion, df_tdr, version=""):
+    """Precalcula los diccionarios y listas de las hojas de referencia."""
+    especialistas = {}
+    parcial = []
+    for fila in df_asignacion.to_dict(orient="records"):
+        cat = str(fila.get("CATEGORIA_REQUERIMIENTO", "")).lower()
+        req = str(fila.get("REQUERIMIENTO", "")).lower()
+        equipo = str(fila.get("EQUIPO", "")).lower()
+        datos = _fila_especialista(fila)
+        especialistas.setdefault((cat, req, equipo), datos)  # gana la primera fila
+        parcial.append((cat, req, datos))
+
+    tdr_por_dni = {}
+    if "DNI" in df_tdr.columns:
+        for dni, grupo in df_tdr.groupby(df_tdr["DNI"].astype(str), sort=False):
+            tdr_por_dni[dni] = grupo.to_dict(orient="records")
+
+    tipos = sorted(df_asignacion["CATEGORIA_REQUERIMIENTO"].dropna().unique().tolist())
+    requerimientos_por_tipo = {}
+    claves_tipo = df_asignacion["CATEGORIA_REQUERIMIENTO"].astype(str).str.strip().str.upper()
+    for tipo, grupo in df_asignacion.groupby(claves_tipo, sort=False):
+        requerimientos_por_tipo[tipo] = grupo["REQUERIMIENTO"].dropna().unique().tolist()
+
+    return ReferenciasSnapshot(
+        asignacion=df_asignacion,
+        tdr=df_tdr,
+        especialistas=especialistas,
+        especialistas_parcial=tuple(parcial),
+        tdr_por_dni=tdr_por_dni,
+        tipos=tipos,
+        requerimientos_por_tipo=requerimientos_por_tipo,
+        version=version,
+    )
+
+
+_sync_asignacion = SheetSync(SHEET_URL_ASIGNACION, nombre="asignacion")
+_sync_tdr = SheetSync(SHEET_URL_TDR, nombre="tdr")
+
+
+def _cargar_referencias(anterior=None):
+    if anterior is None:
+        # Primera carga del proceso: forzar descarga de ambas hojas
+        _sync_asignacion.olvidar()
+        _sync_tdr.olvidar()
+    try:
+        contenido_asig, contenido_tdr = descargar_en_paralelo(_sync_asignacion, _sync_tdr)
+        if contenido_asig is None and contenido_tdr is None and anterior is not None:
+            return anterior
+        with tramo("hojas_referencia.parseo"):
+            df_asignacion = _leer_asignacion(contenido_asig) if contenido_asig is not None else anterior.asignacion
+            df_tdr = _leer_tdr(contenido_tdr) if contenido_tdr is not None else anterior.tdr
+        with tramo("hojas_referencia.indices"):
+            referencias = construir_referencias(
+                df_asignacion, df_tdr,
+                version=f"{_sync_asignacion.hash[:12]}-{_sync_tdr.hash[:12]}"
+            )
+    except Exception:
+        # Una hoja pudo descargarse bien y la otra no: olvidar los validadores
+        # de ambas para que el próximo refresco las traiga completas
+        _sync_asignacion.olvidar()
+        _sync_tdr.olvidar()
+        raise
+
+    with tramo("hojas_referencia.espejo"):
+        if contenido_asig is not None:
+            espejo.guardar("asignacion", df_asignacion, _sync_asignacion.validadores())
+        if contenido_tdr is not None:
+            espejo.guardar("tdr", df_tdr, _sync_tdr.validadores())
+    return referencias
+
+
+def _precargar_referencias():
+    """Hojas de referencia desde el espejo en disco (sin red), o None."""
+    asignacion, tdr = espejo.cargar("asignacion"), espejo.cargar("tdr")
+    if asignacion is None or tdr is None:
+        return None
+    if not (_sync_asignacion.restaurar(asignacion[1]) and _sync_tdr.restaurar(tdr[1])):
+        _sync_asignacion.olvidar()
+        _sync_tdr.olvidar()
+        return None
+    return construir_referencias(
+        asignacion[0], tdr[0],
+        version=f"{_sync_asignacion.hash[:12]}-{_sync_tdr.hash[:12]}"
+    )
+
+
+referencias_cache = SnapshotCache("referencias", _cargar_referencias, ttl=REFERENCIAS_CACHE_TTL,
+                                  precargar=_precargar_referencias)
+
+
+def obtener_referencias():
+    """Hojas de referencia precalculadas (se descargan solo al vencer el TTL)."""
+    return referencias_cache.valor()
 
 
 # =====================================
 # CLASIFICACIÓN AUTOMÁTICA DE TICKETS
 # =====================================
-def clasificar_ticket(descripcion_ticket: str):
+def clasificar_ticket(descripcion_ticket: str, referencias=None):
     """
     Analiza el texto del ticket y clasifica tipo, requerimiento, prioridad y área.
     Para tipo_requerimiento y requerimiento: debe elegir solo de las listas de la hoja.
@@ -30,27 +223,107 @@ def clasificar_ticket(descripcion_ticket: str):
         return {"error": "Descripción vacía"}
 
     try:
-        # === Leer hoja de asignaciones ===
-        df_asignacion = pd.read_csv(
-            SHEET_URL_ASIGNACION,
-            dtype={
-                "DNI_ENCARGO_PROCESO": str,
-                "DNI_COORDINADOR_PROCESO": str
-            },
-            on_bad_lines='skip',
-            engine='python'
-        ).fillna("")
-
-        # === Generar lista global de tipos ===
-        tipos = sorted(df_asignacion["CATEGORIA_REQUERIMIENTO"].dropna().unique().tolist())
-        lista_tipos = ", ".join(tipos)
+        # === Hoja de asignaciones ya precalculada en memoria ===
+        if referencias is None:
+            referencias = obtener_referencias()
+        lista_tipos = referencias.lista_tipos
 
     except Exception as e:
         print(f"❌ Error cargando hoja de asignaciones: {e}")
         return {"error": f"No se pudo leer la hoja de asignaciones: {e}"}
 
+    # === Resultado ya calculado para esta descripción y estas hojas ===
+    clave = clave_clasificacion(descripcion_ticket, referencias)
+    cacheado = llm_cache.obtener(clave)
+    if cacheado is not None:
+        return cacheado
+
+    # === Clasificador local: con confianza suficiente no se llama al LLM ===
+    local = prediccion_local(descripcion_ticket)
+    if local["clasificacion"] is not None:
+        registrar_camino("local")
+        return local["clasificacion"]
+
     # === Prompt inicial para determinar tipo principal ===
-    prompt_tipo = f"""
+    tipo_requerimiento = local["tipo_requerimiento"]
+    registrar_camino("solo_tipo" if tipo_requerimiento else "llm")
+    llamadas = 1 if tipo_requerimiento else 2
+    if not tipo_requerimiento:
+        try:
+            resp_tipo = llamar_llm_sync(prompt_tipo(descripcion_ticket, lista_tipos), "tipo")
+            tipo_data = json.loads(limpiar_json(resp_tipo.output_text))
+            tipo_requerimiento = tipo_data.get("tipo_requerimiento", "")
+        except Exception as e:
+            print("⚠️ No se pudo determinar tipo_requerimiento:", e)
+            tipo_requerimiento = ""
+
+    # === Prompt completo final ===
+    prompt = prompt_clasificacion(descripcion_ticket, referencias, tipo_requerimiento)
+
+    try:
+        response = llamar_llm_sync(prompt, "clasificacion")
+        texto = response.output_text.strip()
+        print("🧠 Texto IA crudo:", texto)
+
+        result = parsear_clasificacion(texto)
+        print("✅ Clasificación IA:", result)
+        guardar_clasificacion(clave, result, llamadas)
+        return result
+
+    except Exception as e:
+        print("❌ Error en clasificar_ticket:", e)
+        return {"error": str(e)}
+
+
+def llamar_llm_sync(prompt, operacion):
+    """Llamada a la API de respuestas con tramo, conteo de llamadas y tokens."""
+    limitador = limitador_llm.get()
+    if limitador is not None:
+        limitador.adquirir()
+    with tramo(f"llm.{operacion}"):
+        try:
+            respuesta = cliente_openai().responses.create(model=MODELO_OPENAI, input=prompt)
+        except Exception:
+            llm_llamadas.inc(operacion=operacion, resultado="error")
+            raise
+    registrar_uso_llm(respuesta, operacion)
+    return respuesta
+
+
+# =====================================
+# 🔹 PROMPTS Y PARSEO (compartidos con la versión async)
+# =====================================
+def clave_clasificacion(descripcion_ticket, referencias):
+    return clave_cache("clasificacion", MODELO_OPENAI, VERSION_PROMPT_CLASIFICACION,
+                       descripcion_ticket.strip(), referencias.version)
+
+
+def guardar_clasificacion(clave, result, llamadas):
+    # Solo se guardan clasificaciones válidas; `llamadas` son las que de verdad se
+    # hicieron (1 si el clasificador local ya dio el tipo, 2 si no)
+    if "error" not in result and "raw_text" not in result:
+        llm_cache.guardar(clave, "clasificacion", result, llamadas=llamadas)
+
+
+def clave_respuesta(prompt):
+    return clave_cache("respuesta", MODELO_OPENAI, VERSION_PROMPT_RESPUESTA, prompt)
+
+
+def limpiar_json(texto):
+    return texto.strip().replace("```json", "").replace("```", "").strip()
+
+
+def parsear_clasificacion(texto):
+    texto_limpio = limpiar_json(texto)
+    try:
+        return json.loads(texto_limpio)
+    except json.JSONDecodeError as err:
+        print("⚠️ No se pudo parsear el JSON:", err)
+        return {"raw_text": texto_limpio}
+
+
+def prompt_tipo(descripcion_ticket, lista_tipos):
+    return f"""
     Eres un analista de soporte técnico y automatización del MINEDU (SIFODS).
     Clasifica el siguiente ticket y devuelve SOLO el tipo de requerimiento en formato JSON:
     {{
@@ -61,27 +334,18 @@ def clasificar_ticket(descripcion_ticket: str):
     \"\"\"{descripcion_ticket}\"\"\"
     """
 
-    try:
-        resp_tipo = client.responses.create(model="gpt-4o-mini", input=prompt_tipo)
-        tipo_result = resp_tipo.output_text.strip().replace("```json", "").replace("```", "").strip()
-        tipo_data = json.loads(tipo_result)
-        tipo_requerimiento = tipo_data.get("tipo_requerimiento", "")
-    except Exception as e:
-        print("⚠️ No se pudo determinar tipo_requerimiento:", e)
-        tipo_requerimiento = ""
+
+def prompt_clasificacion(descripcion_ticket, referencias, tipo_requerimiento):
+    lista_tipos = referencias.lista_tipos
 
     # === Filtrar requerimientos asociados a ese tipo ===
     lista_requerimientos = []
     if tipo_requerimiento:
-        lista_requerimientos = df_asignacion.loc[
-            df_asignacion["CATEGORIA_REQUERIMIENTO"].str.strip().str.upper() == tipo_requerimiento.strip().upper(),
-            "REQUERIMIENTO"
-        ].dropna().unique().tolist()
+        lista_requerimientos = referencias.requerimientos_por_tipo.get(tipo_requerimiento.strip().upper(), [])
 
     lista_requerimientos_texto = ", ".join(lista_requerimientos) if lista_requerimientos else "N/A"
 
-    # === Prompt completo final ===
-    prompt = f"""
+    return f"""
     Responde SOLO en formato JSON válido y sin texto adicional.
 
     Eres un analista de soporte técnico y automatización del MINEDU (SIFODS).
@@ -98,84 +362,49 @@ def clasificar_ticket(descripcion_ticket: str):
     \"\"\"{descripcion_ticket}\"\"\"
     """
 
-    try:
-        response = client.responses.create(model="gpt-4o-mini", input=prompt)
-        texto = response.output_text.strip()
-        print("🧠 Texto IA crudo:", texto)
-
-        texto_limpio = texto.replace("```json", "").replace("```", "").strip()
-
-        try:
-            result = json.loads(texto_limpio)
-        except json.JSONDecodeError as err:
-            print("⚠️ No se pudo parsear el JSON:", err)
-            result = {"raw_text": texto_limpio}
-
-        print("✅ Clasificación IA:", result)
-        return result
-
-    except Exception as e:
-        print("❌ Error en clasificar_ticket:", e)
-        return {"error": str(e)}
-
 
 
 
 # =====================================
 # 🔹 BÚSQUEDA DE ESPECIALISTA
 # =====================================
-def obtener_especialista(tipo, requerimiento, area,df_asignacion):
+@medido("referencias.especialista")
+def obtener_especialista(tipo, requerimiento, area, referencias=None):
     """
     Busca en la hoja de asignaciones el especialista responsable según tipo, requerimiento y área.
     """
-    df = df_asignacion.fillna("").copy()
+    if referencias is None:
+        referencias = obtener_referencias()
     tipo, req, area = tipo.lower(), requerimiento.lower(), area.lower()
 
     # Coincidencia exacta
-    exact = df[
-        (df["CATEGORIA_REQUERIMIENTO"].str.lower() == tipo) &
-        (df["REQUERIMIENTO"].str.lower() == req) &
-        (df["EQUIPO"].str.lower() == area)  #Esta variable esta por mejorar
-    ]
-    if not exact.empty:
-        fila = exact.iloc[0]
-    else:
+    fila = referencias.especialistas.get((tipo, req, area))  #Esta variable esta por mejorar
+    if fila is None:
         # Coincidencia parcial si no hay exacta
-        parcial = df[
-            df["CATEGORIA_REQUERIMIENTO"].str.lower().str.contains(tipo, na=False) &
-            df["REQUERIMIENTO"].str.lower().str.contains(req, na=False)
-        ]
-        fila = parcial.iloc[0] if not parcial.empty else None
+        fila = next(
+            (datos for cat, r, datos in referencias.especialistas_parcial if tipo in cat and req in r),
+            None
+        )
 
     if fila is None:
         return None
 
-    return {
-        "dni_encargado_proceso": str(fila.get("DNI_ENCARGO_PROCESO", "")),
-        "encargado": fila.get("Encargdo del proceso", ""),
-        "rol_proceso": fila.get("Rol del proceso", ""),
-        "dni_coordinador": str(fila.get("DNI_COORDINADOR_PROCESO", "")),
-        "coordinador": fila.get("coordinador del proceso", ""),
-        "equipo": fila.get("EQUIPO", ""),
-        "categoria_requerimiento": fila.get("CATEGORIA_REQUERIMIENTO", ""),
-        "requerimiento": fila.get("REQUERIMIENTO", "")
-    }
+    return dict(fila)
 
 # =====================================
 # 🔹 BÚSQUEDA DE TDR POR DNI
 # =====================================
-def obtener_tdr_por_dni(dni,df_tdr):
+@medido("referencias.tdr")
+def obtener_tdr_por_dni(dni, referencias=None):
     """
     Devuelve todos los TDR (actividades, productos, entregables) de un especialista.
     """
     if not dni:
         return []
-    
-    df = df_tdr.fillna("").copy()
-    registros = df[df["DNI"].astype(str) == str(dni)]
-    if registros.empty:
-        return []
-    return registros.to_dict(orient="records")
+
+    if referencias is None:
+        referencias = obtener_referencias()
+    return list(referencias.tdr_por_dni.get(str(dni), []))
 
 # =====================================
 # 🔹 RESPUESTA SUGERIDA POR IA
@@ -185,13 +414,29 @@ def generar_respuesta(ticket_info: dict):
     Genera una respuesta formal y empática al usuario según el contexto del ticket.
     """
     try:
-        nombre = ticket_info.get("NOMBRES Y APELLIDOS", "usuario")
-        ticket_id = ticket_info.get("TICKET", "0000")
-        descripcion = ticket_info.get("DESCRIPCION", "")
-        area = ticket_info.get("area_asignada", "soporte técnico")
-        especialista = ticket_info.get("especialista", {}).get("encargado", "nuestro equipo")
+        prompt = prompt_respuesta(ticket_info)
+        clave = clave_respuesta(prompt)
+        cacheado = llm_cache.obtener(clave)
+        if cacheado is not None:
+            return {"respuesta_sugerida": cacheado}
+
+        response = llamar_llm_sync(prompt, "respuesta")
+        texto = firmar_respuesta(response.output_text)
+        llm_cache.guardar(clave, "respuesta", texto)
+        return {"respuesta_sugerida": texto}
+
+    except Exception as e:
+        return {"error": str(e)}
 
-        prompt = f"""
+
+def prompt_respuesta(ticket_info: dict):
+    nombre = ticket_info.get("NOMBRES Y APELLIDOS", "usuario")
+    ticket_id = ticket_info.get("TICKET", "0000")
+    descripcion = ticket_info.get("DESCRIPCION", "")
+    area = ticket_info.get("area_asignada", "soporte técnico")
+    especialista = ticket_info.get("especialista", {}).get("encargado", "nuestro equipo")
+
+    return f"""
         Redacta una respuesta profesional, empática y clara en español para el usuario {nombre},
         respecto al ticket N°{ticket_id}. El texto del ticket es:
         "{descripcion}"
@@ -204,17 +449,13 @@ def generar_respuesta(ticket_info: dict):
         área de DIFODS"
         """
 
-        response = client.responses.create(model="gpt-4o-mini", input=prompt)
-        texto = response.output_text.strip()
 
-        # 🔹 Asegurar que siempre termine con la firma institucional
-        if not texto.lower().strip().endswith("área de difods") and "Saludos cordiales" not in texto:
-            texto += "\n\nSaludos cordiales,\nárea de DIFODS"
-
-        return {"respuesta_sugerida": texto}
-
-    except Exception as e:
-        return {"error": str(e)}
+def firmar_respuesta(texto):
+    texto = texto.strip()
+    # 🔹 Asegurar que siempre termine con la firma institucional
+    if not texto.lower().strip().endswith("área de difods") and "Saludos cordiales" not in texto:
+        texto += "\n\nSaludos cordiales,\nárea de DIFODS"
+    return texto
 
 # =====================================
 # 🔹 ORQUESTADOR GENERAL
@@ -223,24 +464,13 @@ def analizar_ticket_completo(descripcion_ticket, datos_usuario=None):
     """
     Analiza el ticket: clasificación IA + búsqueda de especialista + TDR + respuesta sugerida.
     """
-    # Cargar las hojas desde Google Sheets directamente
-    df_tdr = pd.read_csv(
-        SHEET_URL_TDR, 
-        dtype={"DNI": str},
-        on_bad_lines='skip',
-        engine='python'
-        )
-    df_asignacion = pd.read_csv(
-        SHEET_URL_ASIGNACION,
-        dtype={
-            "DNI_ENCARGO_PROCESO": str,
-            "DNI_COORDINADOR_PROCESO": str
-        },
-        on_bad_lines='skip',
-        engine='python'
-    )
+    # Hojas de referencia precalculadas (sin lectura de CSV por ticket)
+    try:
+        referencias = obtener_referencias()
+    except Exception as e:
+        return {"error": f"No se pudieron leer las hojas de referencia: {e}"}
 
-    clasificacion = clasificar_ticket(descripcion_ticket)
+    clasificacion = clasificar_ticket(descripcion_ticket, referencias)
     if "error" in clasificacion:
         return clasificacion
 
@@ -248,18 +478,12 @@ def analizar_ticket_completo(descripcion_ticket, datos_usuario=None):
     req = clasificacion.get("requerimiento", "")
     area = clasificacion.get("area_asignada", "")
 
-    especialista = obtener_especialista(tipo, req, area, df_asignacion)
+    especialista = obtener_especialista(tipo, req, area, referencias)
     dni = especialista["dni_encargado_proceso"] if especialista else None
-    tdr = obtener_tdr_por_dni(dni, df_tdr) if dni else []
+    tdr = obtener_tdr_por_dni(dni, referencias) if dni else []
 
     # Preparar información para respuesta
-    ticket_info = {
-        "NOMBRES Y APELLIDOS": datos_usuario.get("NOMBRES Y APELLIDOS", "usuario") if datos_usuario else "usuario",
-        "TICKET": datos_usuario.get("TICKET", "0000") if datos_usuario else "0000",
-        "DESCRIPCION": descripcion_ticket,
-        "area_asignada": area,
-        "especialista": especialista or {}
-    }
+    ticket_info = armar_ticket_info(descripcion_ticket, datos_usuario, area, especialista)
 
     respuesta = generar_respuesta(ticket_info)
 
@@ -270,6 +494,15 @@ def analizar_ticket_completo(descripcion_ticket, datos_usuario=None):
         "respuesta": respuesta
     }
 
+def armar_ticket_info(descripcion_ticket, datos_usuario, area, especialista):
+    return {
+        "NOMBRES Y APELLIDOS": datos_usuario.get("NOMBRES Y APELLIDOS", "usuario") if datos_usuario else "usuario",
+        "TICKET": datos_usuario.get("TICKET", "0000") if datos_usuario else "0000",
+        "DESCRIPCION": descripcion_ticket,
+        "area_asignada": area,
+        "especialista": especialista or {}
+    }
+
 # =====================================
 # 🔹 EJEMPLO DE USO LOCAL
 # =====================================
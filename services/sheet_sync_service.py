@@ -0,0 +1,232 @@
+import contextvars
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import formatdate
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics_service import tramo, hoja_bytes
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+SHEET_TIMEOUT = float(os.getenv("SHEET_TIMEOUT", "30"))                    # lectura (s)
+SHEET_TIMEOUT_CONEXION = float(os.getenv("SHEET_TIMEOUT_CONEXION", "5"))   # conexión (s)
+# Descargas simultáneas de hojas (y conexiones keep-alive por host)
+SHEET_DESCARGAS_PARALELAS = int(os.getenv("SHEET_DESCARGAS_PARALELAS", "4"))
+
+
+# =====================================
+# 🔹 SESIÓN HTTP Y DESCARGAS EN PARALELO
+# =====================================
+class _DescargasCompartidas:
+    """
+    Sesión HTTP con pool de conexiones (keep-alive: el refresco de cada
+    hoja no repite DNS + TCP + TLS) y pool de hilos para descargar varias
+    hojas a la vez. Ambos son por proceso: tras un fork se recrean.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.sesion = None
+        self.pool = None
+
+    def asegurar(self):
+        if self._pid == os.getpid():
+            return self
+        with self._lock:
+            if self._pid != os.getpid():
+                sesion = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=SHEET_DESCARGAS_PARALELAS,
+                                        pool_maxsize=SHEET_DESCARGAS_PARALELAS)
+                sesion.mount("http://", adaptador)
+                sesion.mount("https://", adaptador)
+                self.sesion = sesion
+                self.pool = ThreadPoolExecutor(SHEET_DESCARGAS_PARALELAS, thread_name_prefix="hoja")
+                self._pid = os.getpid()
+        return self
+
+
+_compartido = _DescargasCompartidas()
+
+
+def descargar_en_paralelo(*syncs):
+    """
+    `descargar()` de varias hojas a la vez; devuelve los contenidos en el
+    mismo orden (None = sin cambios). Si alguna falla se propaga el error,
+    después de esperar a las demás.
+    """
+    if len(syncs) == 1:
+        return [syncs[0].descargar()]
+    pool = _compartido.asegurar().pool
+    # Cada descarga corre con el contexto de la petición: sus tramos van a Server-Timing
+    futuros = [pool.submit(contextvars.copy_context().run, sync.descargar) for sync in syncs]
+    errores = [f.exception() for f in futuros]
+    for error in errores:
+        if error is not None:
+            raise error
+    return [f.result() for f in futuros]
+
+
+# =====================================
+# 🔹 DESCARGA CONDICIONAL DE HOJAS
+# =====================================
+class SheetSync:
+    """
+    Descarga una hoja (URL de export CSV o ruta local) solo si cambió.
+
+    - Usa ETag / Last-Modified cuando el servidor los envía (respuesta 304).
+    - Siempre compara además el hash SHA-256 del contenido, porque el export
+      de Google Sheets no suele enviar validadores.
+    """
+
+    def __init__(self, url, timeout=SHEET_TIMEOUT, nombre="hoja"):
+        self.url = url
+        self.nombre = nombre
+        self.timeout = timeout
+        self.etag = None
+        self.last_modified = None
+        self.hash = None
+
+    def descargar(self):
+        """
+        Devuelve los bytes de la hoja, o None si el contenido no cambió
+        desde la última descarga exitosa.
+        """
+        if not self.url:
+            raise ValueError("URL de la hoja no configurada")
+
+        with tramo(f"hoja_{self.nombre}.descarga"):
+            if self.url.startswith(("http://", "https://")):
+                contenido = self._descargar_http()
+            else:
+                contenido = self._leer_archivo()
+        if contenido is None:
+            return None
+        hoja_bytes.observar(len(contenido), hoja=self.nombre)
+
+        digest = hashlib.sha256(contenido).hexdigest()
+        if digest == self.hash:
+            return None
+        self.hash = digest
+        return contenido
+
+    def olvidar(self):
+        """
+        Descarta hash, ETag y Last-Modified: la próxima `descargar()` trae
+        la hoja completa (sin 304 ni "mismo hash"). Se usa cuando el
+        contenido descargado no llegó a usarse (falló el parseo o la otra hoja).
+        """
+        self.hash = self.etag = self.last_modified = None
+
+    def validadores(self):
+        """Estado de la última descarga, para guardarlo junto al espejo en disco."""
+        return {"url": self.url, "hash": self.hash, "etag": self.etag, "last_modified": self.last_modified}
+
+    def restaurar(self, meta):
+        """
+        Retoma los validadores guardados con `validadores()`; así el primer
+        refresco tras un reinicio puede recibir 304 / mismo hash. Se ignoran
+        si el espejo es de otra URL.
+        """
+        if not meta or meta.get("url") != self.url:
+            return False
+        self.hash = meta.get("hash")
+        self.etag = meta.get("etag")
+        self.last_modified = meta.get("last_modified")
+        return True
+
+    def _descargar_http(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        sesion = _compartido.asegurar().sesion
+        resp = sesion.get(self.url, headers=headers, timeout=(SHEET_TIMEOUT_CONEXION, self.timeout))
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+
+        self.etag = resp.headers.get("ETag")
+        self.last_modified = resp.headers.get("Last-Modified")
+        return resp.content
+
+    def _leer_archivo(self):
+        # Ruta local: el mtime hace de Last-Modified
+        mtime = formatdate(os.stat(self.url).st_mtime, usegmt=True)
+        if mtime == self.last_modified and self.hash is not None:
+            return None
+        with open(self.url, "rb") as f:
+            contenido = f.read()
+        self.last_modified = mtime
+        return contenido
+
+
+# =====================================
+# 🔹 DIFERENCIAS POR FILA
+# =====================================
+@dataclass(frozen=True)
+class DiffFilas:
+    """Cambios entre dos versiones de una hoja, por clave (p.ej. TICKET)."""
+    agregados: frozenset = field(default_factory=frozenset)
+    eliminados: frozenset = field(default_factory=frozenset)
+    modificados: frozenset = field(default_factory=frozenset)
+    completo: bool = False  # True si no hay versión previa (recarga total)
+
+    @property
+    def vacio(self):
+        return not (self.agregados or self.eliminados or self.modificados or self.completo)
+
+    def resumen(self):
+        return {
+            "agregados": len(self.agregados),
+            "eliminados": len(self.eliminados),
+            "modificados": len(self.modificados),
+            "completo": self.completo,
+        }
+
+
+def normalizar_clave(serie):
+    """Normaliza ids (quita espacios y el '.0' de floats exportados)."""
+    return serie.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+
+
+def _hash_por_clave(df, clave):
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    hashes.index = normalizar_clave(df[clave])
+    # Si hay ids repetidos se considera la última aparición
+    return hashes[~hashes.index.duplicated(keep="last")]
+
+
+def diff_por_clave(df_anterior, df_nuevo, clave="TICKET"):
+    """
+    Calcula qué claves se agregaron, eliminaron o modificaron entre dos
+    DataFrames, comparando un hash por fila (vectorizado).
+    """
+    if df_anterior is None or clave not in df_anterior.columns or clave not in df_nuevo.columns:
+        return DiffFilas(completo=True)
+    if list(df_anterior.columns) != list(df_nuevo.columns):
+        # Cambió el esquema: todo lo derivado debe recalcularse
+        return DiffFilas(completo=True)
+
+    h_old = _hash_por_clave(df_anterior, clave)
+    h_new = _hash_por_clave(df_nuevo, clave)
+
+    agregados = h_new.index.difference(h_old.index)
+    eliminados = h_old.index.difference(h_new.index)
+    comunes = h_new.index.intersection(h_old.index)
+    cambiados = comunes[h_new.loc[comunes].to_numpy() != h_old.loc[comunes].to_numpy()]
+
+    return DiffFilas(
+        agregados=frozenset(agregados),
+        eliminados=frozenset(eliminados),
+        modificados=frozenset(cambiados),
+    )
@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+DEFAULT_TTL = float(os.getenv("SNAPSHOT_CACHE_TTL", "300"))
+
+# Registro global de caches (para el endpoint de estadísticas)
+_CACHES = {}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Foto inmutable de un dato cacheado. Nunca se modifica: cada refresco
+    crea un Snapshot nuevo que reemplaza al anterior de forma atómica.
+    """
+    valor: Any
+    version: int
+    cargado_en: float      # time.time() de la última carga o validación
+    monotonic: float       # time.monotonic() para calcular la edad
+
+    @property
+    def edad(self):
+        return time.monotonic() - self.monotonic
+
+
+class SnapshotCache:
+    """
+    Cache en memoria de proceso con TTL, refresco en segundo plano y
+    stale-while-revalidate:
+
+    - Sin snapshot: la primera petición carga (single-flight, las demás esperan).
+    - Snapshot vigente: se sirve directamente (hit).
+    - Snapshot vencido: se sirve el anterior y se despierta al hilo de refresco.
+
+    `cargar(anterior)` recibe el valor previo (o None) y devuelve el nuevo valor.
+    Si devuelve el mismo objeto, se considera "sin cambios": solo se renueva la edad.
+
+    `precargar()` (opcional) devuelve rápido un valor de respaldo (p.ej. el espejo
+    en disco) o None. Ese valor se sirve como vencido mientras el hilo de refresco
+    trae la versión actual.
+    """
+
+    def __init__(self, nombre: str, cargar: Callable[[Any], Any], ttl: float = DEFAULT_TTL,
+                 precargar: Callable[[], Any] = None):
+        self.nombre = nombre
+        self.ttl = ttl
+        self._cargar = cargar
+        self._precargar = precargar
+        self._snapshot = None
+        self._lock_carga = threading.Lock()
+        self._lock_stats = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+        self._pid = None
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0, "refrescos": 0, "sin_cambios": 0, "errores": 0,
+                       "precargas": 0}
+        self._ultimo_error = None
+        _CACHES[nombre] = self
+        if hasattr(os, "register_at_fork"):
+            # Un fork durante una carga (p.ej. gunicorn --preload) no debe heredar el lock tomado
+            os.register_at_fork(after_in_child=self._tras_fork)
+
+    def _tras_fork(self):
+        self._lock_carga = threading.Lock()
+        self._lock_stats = threading.Lock()
+
+    # ---------- lectura ----------
+    def obtener(self) -> Snapshot:
+        self._asegurar_hilo()
+        snap = self._snapshot
+        if snap is None:
+            with self._lock_carga:
+                snap = self._snapshot
+                if snap is None:
+                    self._contar("misses")
+                    snap = self._sembrar()
+                    if snap is None:
+                        return self._refrescar()
+                    self._despertar.set()  # refrescar ya, sirviendo el respaldo mientras tanto
+                    return snap
+            self._contar("hits")
+            return snap
+
+        if snap.edad > self.ttl:
+            self._contar("stale_hits")
+            self._despertar.set()
+        else:
+            self._contar("hits")
+        return snap
+
+    def valor(self):
+        return self.obtener().valor
+
+    def actual(self):
+        """Snapshot actual sin disparar cargas (puede ser None)."""
+        return self._snapshot
+
+    # ---------- escritura ----------
+    def precalentar(self, cargar=False):
+        """
+        Carga el respaldo de `precargar` (sin red) si aún no hay snapshot; p.ej. al arrancar el worker.
+        Con `cargar=True` y sin respaldo, la primera carga empieza ya en un hilo aparte: la primera
+        petición espera esa misma carga (single-flight) en lugar de empezar otra.
+        """
+        with self._lock_carga:
+            if self._snapshot is not None:
+                return self._snapshot
+            snap = self._sembrar()
+        if snap is not None:
+            self._asegurar_hilo()
+            self._despertar.set()
+        elif cargar:
+            threading.Thread(target=self._carga_inicial, name=f"carga-{self.nombre}", daemon=True).start()
+        return snap
+
+    def _carga_inicial(self):
+        with self._lock_carga:
+            if self._snapshot is not None:
+                return
+            try:
+                self._refrescar()
+            except Exception as e:
+                # La primera petición vuelve a intentarlo (y recibe el error si persiste)
+                print(f"⚠️ [{self.nombre}] Falló la carga inicial en segundo plano: {e}")
+                return
+        self._asegurar_hilo()
+
+    def _sembrar(self):
+        # Debe llamarse con _lock_carga tomado
+        if self._precargar is None:
+            return None
+        try:
+            valor = self._precargar()
+        except Exception as e:
+            print(f"⚠️ [{self.nombre}] No se pudo precargar el respaldo: {e}")
+            return None
+        if valor is None:
+            return None
+        self._contar("precargas")
+        # Edad mayor que el TTL: se sirve como vencido y dispara el refresco
+        snap = Snapshot(valor, 1, time.time(), time.monotonic() - self.ttl - 1)
+        self._snapshot = snap
+        return snap
+
+    def refrescar(self) -> Snapshot:
+        """Fuerza una recarga síncrona (single-flight)."""
+        with self._lock_carga:
+            return self._refrescar()
+
+    def _refrescar(self) -> Snapshot:
+        # Debe llamarse con _lock_carga tomado
+        anterior = self._snapshot
+        try:
+            nuevo_valor = self._cargar(anterior.valor if anterior else None)
+        except Exception as e:
+            self._contar("errores")
+            self._ultimo_error = str(e)
+            if anterior is None:
+                raise
+            print(f"⚠️ [{self.nombre}] Error al refrescar, se mantiene el snapshot anterior: {e}")
+            return anterior
+
+        self._ultimo_error = None
+        if anterior is not None and nuevo_valor is anterior.valor:
+            self._contar("sin_cambios")
+            version = anterior.version
+        else:
+            self._contar("refrescos")
+            version = anterior.version + 1 if anterior else 1
+
+        snap = Snapshot(nuevo_valor, version, time.time(), time.monotonic())
+        self._snapshot = snap  # reemplazo atómico de la referencia
+        return snap
+
+    # ---------- hilo de refresco ----------
+    def _asegurar_hilo(self):
+        # Tras un fork (gunicorn) los hilos no sobreviven: se recrea por proceso
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._lock_stats:
+            if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+                return
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._bucle, name=f"refresco-{self.nombre}", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            snap = self._snapshot
+            espera = self.ttl if snap is None else max(self.ttl - snap.edad, 0.0)
+            self._despertar.wait(timeout=espera)
+            self._despertar.clear()
+            snap = self._snapshot
+            if snap is None or snap.edad < self.ttl:
+                continue
+            if not self._lock_carga.acquire(blocking=False):
+                continue  # ya hay una carga en curso
+            try:
+                self._refrescar()
+            except Exception:
+                pass
+            finally:
+                self._lock_carga.release()
+            if self._ultimo_error:
+                # Evita reintentos en bucle si la fuente está caída
+                time.sleep(min(self.ttl, 30))
+
+    # ---------- métricas ----------
+    def _contar(self, clave):
+        with self._lock_stats:
+            self._stats[clave] += 1
+
+    def estadisticas(self):
+        with self._lock_stats:
+            stats = dict(self._stats)
+        snap = self._snapshot
+        lecturas = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats.update({
+            "ttl_segundos": self.ttl,
+            "version": snap.version if snap else None,
+            "edad_segundos": round(snap.edad, 3) if snap else None,
+            "cargado_en": snap.cargado_en if snap else None,
+            "hit_ratio": round((stats["hits"] + stats["stale_hits"]) / lecturas, 4) if lecturas else None,
+            "ultimo_error": self._ultimo_error,
+        })
+        return stats
+
+
+def estadisticas_caches():
+    """Estadísticas de todas las caches registradas en el proceso."""
+    return {nombre: cache.estadisticas() for nombre, cache in _CACHES.items()}
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+try:
+    import pyarrow as pa
+except ImportError:  # opcional: sin pyarrow no hay espejo en disco
+    pa = None
+
+# =====================================
+# 🔹 CONFIGURACIÓN
+# =====================================
+# Directorio del espejo local de las hojas ("" lo desactiva)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(".cache", "snapshots"))
+
+_CLAVE_META = b"difods"
+
+
+# =====================================
+# 🔹 ESPEJO EN DISCO (Arrow IPC)
+# =====================================
+class EspejoDisco:
+    """
+    Guarda el último snapshot bueno de cada hoja como archivo Arrow IPC
+    (Feather v2, sin compresión) junto con sus validadores (hash, ETag,
+    Last-Modified). El beneficio es un arranque en caliente rápido y sin
+    red: leer el archivo (memory-map) cuesta mucho menos que descargar y
+    parsear el CSV. No es memoria compartida entre workers: al pasar a
+    pandas cada worker construye su propia copia de las columnas de texto.
+    """
+
+    def __init__(self, directorio=SNAPSHOT_DIR):
+        self.directorio = directorio
+
+    @property
+    def activo(self):
+        return bool(self.directorio) and pa is not None
+
+    def ruta(self, nombre):
+        return os.path.join(self.directorio, f"{nombre}.arrow")
+
+    def guardar(self, nombre, df, meta=None):
+        """Escribe el DataFrame de forma atómica (archivo temporal + rename)."""
+        if not self.activo:
+            return False
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            metadatos = dict(tabla.schema.metadata or {})
+            metadatos[_CLAVE_META] = json.dumps({**(meta or {}), "guardado_en": time.time()}).encode("utf-8")
+            tabla = tabla.replace_schema_metadata(metadatos)
+
+            temporal = f"{self.ruta(nombre)}.{os.getpid()}.tmp"
+            with pa.OSFile(temporal, "wb") as destino:
+                with pa.ipc.new_file(destino, tabla.schema) as escritor:
+                    escritor.write_table(tabla)
+            os.replace(temporal, self.ruta(nombre))
+            return True
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el espejo local de '{nombre}': {e}")
+            return False
+
+    def cargar(self, nombre):
+        """(DataFrame, meta) desde el espejo, o None si no existe o está dañado."""
+        if not self.activo or not os.path.exists(self.ruta(nombre)):
+            return None
+        try:
+            tabla = pa.ipc.open_file(pa.memory_map(self.ruta(nombre), "r")).read_all()
+            meta = json.loads((tabla.schema.metadata or {}).get(_CLAVE_META, b"{}"))
+            # split_blocks evita la copia extra de consolidar bloques; las columnas de
+            # texto se materializan igual como objetos Python en cada worker
+            return tabla.to_pandas(split_blocks=True), meta
+        except Exception as e:
+            print(f"⚠️ Espejo local de '{nombre}' ilegible, se ignora: {e}")
+            return None
+
+
+# Instancia compartida del proceso
+espejo = EspejoDisco()
@@ -136,86 +136,108 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   // ============================================================
-  // 📄 FUNCIÓN PRINCIPAL PARA CARGAR TABLA
+  // 📄 FUNCIÓN PRINCIPAL PARA CARGAR TABLA (server-side)
   // ============================================================
-  async function cargarTabla(estado) {
-    mostrarLoaderTabla();
-
-    try {
-      const res = await fetch(`/api/tickets?estado=${encodeURIComponent(estado)}`);
-      const data = await res.json();
+  // La tabla pide al servidor solo la página visible (paginación, orden y
+  // búsqueda se resuelven en /api/tickets) y solo las columnas que muestra.
+  let estadoActual = null;
 
-      if (!Array.isArray(data) || data.length === 0) {
-        alert("No hay registros para este estado.");
-        ocultarLoaderTabla();
-        return;
+  const texto = campo => ({ data: campo, defaultContent: "" });
+  const COLUMNAS = [
+    texto("TICKET"),
+    texto("FECHA DE REGISTRO"),
+    texto("DOCUMENTO"),
+    {
+      data: null, orderable: false,
+      render: (_, __, row) => {
+        const infoJSON = encodeURIComponent(JSON.stringify({
+          "NOMBRES Y APELLIDOS": row["NOMBRES Y APELLIDOS"], CELULAR: row.CELULAR, CORREO: row.CORREO
+        }));
+        return `<button class='btn btn-outline-info btn-sm ver-datos' data-info="${infoJSON}" title="Ver datos personales">
+              <i class='fa-solid fa-user'></i> Ver
+            </button>`;
       }
+    },
+    texto("TIPO REQUERIMIENTO"),
+    texto("REQUERIMIENTO"),
+    {
+      data: "DESCRIPCION", orderable: false, defaultContent: "",
+      render: d => `<i class='fa-solid fa-eye text-primary ver-descripcion' data-desc="${d || ''}" style='cursor:pointer;'></i>`
+    },
+    {
+      data: "ENLACE DE RECURSOS", orderable: false, defaultContent: "",
+      render: d => d
+        ? `<span class='enlace-recurso text-primary' data-enlace='${d}' style='cursor:pointer;'>
+                  <i class='fa-solid fa-link'></i> ${String(d).slice(0, 25)}...
+                </span>` : ""
+    },
+    texto("DIRECCION"),
+    texto("AREA"),
+    texto("PROGRAMA"),
+    texto("ESTADO"),
+    {
+      data: "RESPUESTA", orderable: false, defaultContent: "",
+      render: d => `<i class='fa-solid fa-envelope text-success ver-respuesta' data-resp="${d || ''}" style='cursor:pointer;'></i>`
+    },
+    texto("FECHA DE DERIVACIÓN"),
+    texto("HORA DE DERIVACIÓN"),
+    texto("FECHA DE ATENCIÓN"),
+    texto("HORA DE ATENCIÓN"),
+    texto("ÁREA TI"),
+    texto("DNI_ESPECIALISTA FUNCIONAL"),
+    texto("ESPECIALISTA FUNCIONAL TI"),
+    texto("NIVEL DE AVANCE"),
+    texto("ESPECIALISTA APOYO TI"),
+    texto("FECHA DE ASIGNACIÓN AL ESPECIALISTA FUNCIONAL TI"),
+    texto("PRIORIDAD"),
+    texto("FECHA TENTATIVA REALIZACIÓN"),
+    texto("PRODUCTO"),
+    texto("TIPO TICKET"),
+    texto("FECHA_FINAL_ATENCION")
+  ];
+  const CAMPOS = [
+    ...COLUMNAS.map(c => c.data).filter(Boolean),
+    "NOMBRES Y APELLIDOS", "CELULAR", "CORREO"
+  ].join(",");
 
-      document.getElementById("tabla-titulo").style.display = "block";
-      document.getElementById("tabla-titulo").innerHTML =
-        `🧾 Registros filtrados: <span class="text-primary">${estado}</span>`;
-      document.getElementById("tabla-datos").style.display = "table";
+  async function cargarTabla(estado) {
+    estadoActual = estado;
+    mostrarLoaderTabla();
 
-      if (!dataTable) {
-        dataTable = $("#tabla-datos").DataTable({
-          data: [],
-          columns: Array.from(document.querySelectorAll("#tabla-datos thead th")).map(th => ({ title: th.innerText })),
-          pageLength: 25,
-          deferRender: true,
-          scrollX: true,
-          scroller: true,
-          processing: true,
-          language: { url: "https://cdn.datatables.net/plug-ins/1.13.7/i18n/es-ES.json" },
-        });
-      }
+    document.getElementById("tabla-titulo").style.display = "block";
+    document.getElementById("tabla-titulo").innerHTML =
+      `🧾 Registros filtrados: <span class="text-primary">${estado}</span>`;
+    document.getElementById("tabla-datos").style.display = "table";
 
-      dataTable.clear();
-      dataTable.rows.add(
-        data.map(row => {
-          const infoJSON = encodeURIComponent(JSON.stringify(row));
-          return [
-            row.TICKET || "",
-            row["FECHA DE REGISTRO"] || "",
-            row.DOCUMENTO || "",
-            `<button class='btn btn-outline-info btn-sm ver-datos' data-info="${infoJSON}" title="Ver datos personales">
-              <i class='fa-solid fa-user'></i> Ver
-            </button>`,
-            row["TIPO REQUERIMIENTO"] || "",
-            row.REQUERIMIENTO || "",
-            `<i class='fa-solid fa-eye text-primary ver-descripcion' data-desc="${row.DESCRIPCION || ''}" style='cursor:pointer;'></i>`,
-            row["ENLACE DE RECURSOS"]
-              ? `<span class='enlace-recurso text-primary' data-enlace='${row["ENLACE DE RECURSOS"]}' style='cursor:pointer;'>
-                  <i class='fa-solid fa-link'></i> ${row["ENLACE DE RECURSOS"].slice(0, 25)}...
-                </span>` : "",
-            row.DIRECCION || "",
-            row.AREA || "",
-            row.PROGRAMA || "",
-            row.ESTADO || "",
-            `<i class='fa-solid fa-envelope text-success ver-respuesta' data-resp="${row.RESPUESTA || ''}" style='cursor:pointer;'></i>`,
-            row["FECHA DE DERIVACIÓN"] || "",
-            row["HORA DE DERIVACIÓN"] || "",
-            row["FECHA DE ATENCIÓN"] || "",
-            row["HORA DE ATENCIÓN"] || "",
-            row["ÁREA TI"] || "",
-            row["DNI_ESPECIALISTA FUNCIONAL"] || "",
-            row["ESPECIALISTA FUNCIONAL TI"] || "",
-            row["NIVEL DE AVANCE"] || "",
-            row["ESPECIALISTA APOYO TI"] || "",
-            row["FECHA DE ASIGNACIÓN AL ESPECIALISTA FUNCIONAL TI"] || "",
-            row.PRIORIDAD || "",
-            row["FECHA TENTATIVA REALIZACIÓN"] || "",
-            row.PRODUCTO || "",
-            row["TIPO TICKET"] || "",
-            row["FECHA_FINAL_ATENCION"] || ""
-          ];
-        })
-      ).draw();
-    } catch (error) {
-      console.error("Error cargando tabla:", error);
-      alert("Error al cargar los registros.");
-    } finally {
-      ocultarLoaderTabla();
+    if (dataTable) {
+      dataTable.ajax.reload();
+      return;
     }
+
+    dataTable = $("#tabla-datos").DataTable({
+      serverSide: true,
+      processing: true,
+      ajax: {
+        url: "/api/tickets",
+        cache: true,  // sin el parámetro "_" anti-cache: el ETag/304 del servidor hace su trabajo
+        data: d => { d.estado = estadoActual; d.fields = CAMPOS; },
+        dataSrc: json => {
+          ocultarLoaderTabla();
+          if (json.recordsTotal === 0) alert("No hay registros para este estado.");
+          return json.data || [];
+        },
+        error: (xhr, status, error) => {
+          console.error("Error cargando tabla:", error);
+          alert("Error al cargar los registros.");
+          ocultarLoaderTabla();
+        }
+      },
+      columns: COLUMNAS,
+      pageLength: 25,
+      deferRender: true,
+      scrollX: true,
+      language: { url: "https://cdn.datatables.net/plug-ins/1.13.7/i18n/es-ES.json" },
+    });
   }
   
   // ============================
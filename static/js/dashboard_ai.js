@@ -159,19 +159,121 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
 
-  btnAnalizar.addEventListener("click", async () => {
-    const ticketId = document.getElementById("ticketInput").value.trim();
-    const resultDiv = document.getElementById("aiResultado");
+  // === Secciones del resultado (se llenan a medida que llegan) ===
+  function htmlClasificacion(clasificacion) {
+    return `
+      <h5 class="text-success mt-3"><i class="fa-solid fa-brain"></i> Clasificación IA</h5>
+      <div class="ms-3">
+        <p><b>Tipo:</b> ${clasificacion?.tipo_requerimiento || "-"}</p>
+        <p><b>Requerimiento:</b> ${clasificacion?.requerimiento || "-"}</p>
+        <p><b>Área Asignada:</b> ${clasificacion?.area_asignada || "-"}</p>
+        <p><b>Prioridad:</b> ${clasificacion?.prioridad || "-"}</p>
+        <p><b>Resumen:</b> ${clasificacion?.resumen_corto || "-"}</p>
+      </div>
+    `;
+  }
 
-    if (!ticketId) {
-      resultDiv.innerHTML = "<p class='text-danger'>❗ Ingrese un ID de ticket válido.</p>";
-      return;
-    }
+  function htmlEspecialista(especialista) {
+    return `
+      <h5 class="text-info mt-3"><i class="fa-solid fa-user-tie"></i> Especialista Asignado</h5>
+      ${
+        especialista && especialista !== "No encontrado"
+          ? `
+          <div class="ms-3">
+            <p><b>📄 DNI Encargado:</b> ${especialista.dni_encargado_proceso || "-"}</p>
+            <p><b>👤 Encargado:</b> ${especialista.encargado || "-"}</p>
+            <p><b>📄 DNI Coordinador:</b> ${especialista.dni_coordinador || "-"}</p>
+            <p><b>👤 Coordinador:</b> ${especialista.coordinador || "-"}</p>
+            <p><b>💼 Rol del Proceso:</b> ${especialista.rol_proceso || "-"}</p>
+            <p><b>🏢 Equipo:</b> ${especialista.equipo || "-"}</p>
+          </div>
+        `
+          : "<p class='text-muted ms-3'>No se encontró especialista asignado.</p>"
+      }
+    `;
+  }
 
-    mostrarLoaderAI();
+  function htmlTdr(tdrs) {
+    return `
+      <h5 class="text-warning mt-3"><i class="fa-solid fa-file-lines"></i> TDR Asociados</h5>
+      ${
+        Array.isArray(tdrs) && tdrs.length > 0
+          ? `
+          <div class="table-responsive ms-2">
+            <table class="table table-sm table-striped align-middle">
+              <thead class="table-light">
+                <tr>
+                  <th>Especialista</th>
+                  <th>Actividades</th>
+                  <th>Denominación</th>
+                  <th>Entregable</th>
+                  <th>Productos</th>
+                  </tr>
+              </thead>
+              <tbody>
+                ${tdrs
+                  .map(
+                    tdr => `
+                    <tr>
+                      <td>${tdr.CONTRATISTA || "-"}</td>
+                      <td>${tdr.Actividades || "-"}</td>
+                      <td>${tdr.DENOMINACIÓN || "-"}</td>
+                      <td>${tdr.ENTREGABLE || "-"}</td>
+                      <td>${tdr.PRODUCTOS || "-"}</td>
+                    </tr>
+                  `
+                  )
+                  .join("")}
+              </tbody>
+            </table>
+          </div>`
+          : "<p class='text-muted ms-3'>No se encontraron TDR para este especialista.</p>"
+      }
+    `;
+  }
+
+  function pendiente(texto) {
+    return `<p class="text-muted ms-3"><span class="spinner-border spinner-border-sm me-2"></span>${texto}</p>`;
+  }
+
+  // Estructura con marcadores de posición para cada sección
+  function renderEsqueleto(ticket, descripcion) {
+    resultDiv.innerHTML = `
+      <div class="fade-in">
+        <h5 class="fw-bold text-primary mb-2">🎟 Ticket Analizado: ${ticket}</h5>
+        <p><b>📝 Descripción:</b> ${descripcion || "Sin descripción disponible"}</p>
+        <hr>
+        <div id="aiClasificacion">${pendiente("Clasificando con IA...")}</div>
+        <hr>
+        <div id="aiEspecialista">${pendiente("Buscando especialista...")}</div>
+        <hr>
+        <div id="aiTdr">${pendiente("Buscando TDR...")}</div>
+        <hr>
+        <h5 class="text-primary mt-3"><i class="fa-solid fa-envelope-open-text"></i> Respuesta Sugerida</h5>
+        <pre id="aiRespuesta" class="p-3 bg-light border rounded"></pre>
+      </div>
+    `;
+    document.getElementById("aiRespuesta").textContent = "Generando respuesta...";
+  }
+
+  function renderSeccion(id, html) {
+    const seccion = document.getElementById(id);
+    if (seccion) seccion.innerHTML = html;
+  }
+
+  function renderResultado(data) {
+    renderEsqueleto(data.ticket, data.descripcion);
+    renderSeccion("aiClasificacion", htmlClasificacion(data.clasificacion));
+    renderSeccion("aiEspecialista", htmlEspecialista(data.especialista));
+    renderSeccion("aiTdr", htmlTdr(data.tdr));
+    document.getElementById("aiRespuesta").textContent =
+      data.respuesta?.respuesta_sugerida || "No se generó respuesta.";
+  }
 
+  // === Versión en bloque (navegadores sin EventSource) ===
+  async function analizarEnBloque(ticketId) {
+    mostrarLoaderAI();
     try {
-      // 🔹 Nueva versión: método POST con JSON
       const response = await fetch("/api/ai-ticket", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
@@ -185,90 +287,72 @@ document.addEventListener("DOMContentLoaded", () => {
         resultDiv.innerHTML = `<p class='text-danger'>${data.error}</p>`;
         return;
       }
+      renderResultado(data);
+    } catch (error) {
+      console.error("❌ Error IA:", error);
+      resultDiv.innerHTML = `<p class='text-danger'>Error al conectar con el servidor.</p>`;
+    } finally {
+      ocultarLoaderAI();
+    }
+  }
 
-      // 🔹 Renderizado profesional del resultado
-      resultDiv.innerHTML = `
-        <div class="fade-in">
-          <h5 class="fw-bold text-primary mb-2">🎟 Ticket Analizado: ${data.ticket}</h5>
-          <p><b>📝 Descripción:</b> ${data.descripcion || "Sin descripción disponible"}</p>
-          
-          <hr>
+  // === Versión progresiva (Server-Sent Events) ===
+  let fuenteActual = null;
 
-          <h5 class="text-success mt-3"><i class="fa-solid fa-brain"></i> Clasificación IA</h5>
-          <div class="ms-3">
-            <p><b>Tipo:</b> ${data.clasificacion?.tipo_requerimiento || "-"}</p>
-            <p><b>Requerimiento:</b> ${data.clasificacion?.requerimiento || "-"}</p>
-            <p><b>Área Asignada:</b> ${data.clasificacion?.area_asignada || "-"}</p>
-            <p><b>Prioridad:</b> ${data.clasificacion?.prioridad || "-"}</p>
-            <p><b>Resumen:</b> ${data.clasificacion?.resumen_corto || "-"}</p>
-          </div>
+  function analizarEnStream(ticketId) {
+    if (fuenteActual) fuenteActual.close();
+    resultDiv.innerHTML = pendiente("Conectando...");
 
-          <hr>
-
-          <h5 class="text-info mt-3"><i class="fa-solid fa-user-tie"></i> Especialista Asignado</h5>
-          ${
-            data.especialista && data.especialista !== "No encontrado"
-              ? `
-              <div class="ms-3">
-                <p><b>📄 DNI Encargado:</b> ${data.especialista.dni_encargado_proceso || "-"}</p>
-                <p><b>👤 Encargado:</b> ${data.especialista.encargado || "-"}</p>
-                <p><b>📄 DNI Coordinador:</b> ${data.especialista.dni_coordinador || "-"}</p>
-                <p><b>👤 Coordinador:</b> ${data.especialista.coordinador || "-"}</p>
-                <p><b>💼 Rol del Proceso:</b> ${data.especialista.rol_proceso || "-"}</p>
-                <p><b>🏢 Equipo:</b> ${data.especialista.equipo || "-"}</p>
-              </div>
-            `
-              : "<p class='text-muted ms-3'>No se encontró especialista asignado.</p>"
-          }
+    const fuente = new EventSource(`/api/ai-ticket/${encodeURIComponent(ticketId)}/stream`);
+    fuenteActual = fuente;
+    let recibioDatos = false;
+    let respuestaParcial = "";
+    const datos = (evento) => JSON.parse(evento.data);
 
-          <hr>
+    fuente.addEventListener("ticket", (e) => {
+      recibioDatos = true;
+      const data = datos(e);
+      renderEsqueleto(data.ticket, data.descripcion);
+    });
+    fuente.addEventListener("clasificacion", (e) => renderSeccion("aiClasificacion", htmlClasificacion(datos(e))));
+    fuente.addEventListener("especialista", (e) => renderSeccion("aiEspecialista", htmlEspecialista(datos(e))));
+    fuente.addEventListener("tdr", (e) => renderSeccion("aiTdr", htmlTdr(datos(e))));
+    fuente.addEventListener("respuesta_delta", (e) => {
+      respuestaParcial += datos(e).texto;
+      document.getElementById("aiRespuesta").textContent = respuestaParcial;
+    });
+    fuente.addEventListener("respuesta", (e) => {
+      const data = datos(e);
+      document.getElementById("aiRespuesta").textContent =
+        data.respuesta_sugerida || data.error || "No se generó respuesta.";
+    });
+    fuente.addEventListener("error", (e) => {
+      // Evento "error" del servidor (con datos) o fallo de conexión
+      if (e.data) {
+        resultDiv.innerHTML = `<p class='text-danger'>${datos(e).error}</p>`;
+        return;
+      }
+      fuente.close();
+      if (!recibioDatos) {
+        // Ticket inexistente (404) o proxy sin soporte de streaming: se usa la versión en bloque
+        analizarEnBloque(ticketId);
+      }
+    });
+    fuente.addEventListener("fin", () => fuente.close());
+  }
 
-          <h5 class="text-warning mt-3"><i class="fa-solid fa-file-lines"></i> TDR Asociados</h5>
-          ${
-            Array.isArray(data.tdr) && data.tdr.length > 0
-              ? `
-              <div class="table-responsive ms-2">
-                <table class="table table-sm table-striped align-middle">
-                  <thead class="table-light">
-                    <tr>
-                      <th>Especialista</th>
-                      <th>Actividades</th>
-                      <th>Denominación</th>
-                      <th>Entregable</th>
-                      <th>Productos</th>
-                      </tr>
-                  </thead>
-                  <tbody>
-                    ${data.tdr
-                      .map(
-                        tdr => `
-                        <tr>
-                          <td>${tdr.CONTRATISTA || "-"}</td>
-                          <td>${tdr.Actividades || "-"}</td>
-                          <td>${tdr.DENOMINACIÓN || "-"}</td>
-                          <td>${tdr.ENTREGABLE || "-"}</td>
-                          <td>${tdr.PRODUCTOS || "-"}</td>
-                        </tr>
-                      `
-                      )
-                      .join("")}
-                  </tbody>
-                </table>
-              </div>`
-              : "<p class='text-muted ms-3'>No se encontraron TDR para este especialista.</p>"
-          }
+  btnAnalizar.addEventListener("click", () => {
+    const ticketId = document.getElementById("ticketInput").value.trim();
 
-          <hr>
+    if (!ticketId) {
+      resultDiv.innerHTML = "<p class='text-danger'>❗ Ingrese un ID de ticket válido.</p>";
+      return;
+    }
 
-          <h5 class="text-primary mt-3"><i class="fa-solid fa-envelope-open-text"></i> Respuesta Sugerida</h5>
-          <pre class="p-3 bg-light border rounded">${data.respuesta?.respuesta_sugerida || "No se generó respuesta."}</pre>
-        </div>
-      `;
-    } catch (error) {
-      console.error("❌ Error IA:", error);
-      resultDiv.innerHTML = `<p class='text-danger'>Error al conectar con el servidor.</p>`;
-    } finally {
-      ocultarLoaderAI();
+    if (window.EventSource) {
+      analizarEnStream(ticketId);
+    } else {
+      analizarEnBloque(ticketId);
     }
   });
 });
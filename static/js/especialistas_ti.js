@@ -1,4 +1,3 @@
-let dataGlobal = [];
 let dataTable;
 let choicesDireccion, choicesArea, choicesTipo;
 
@@ -45,11 +44,11 @@ document.addEventListener("DOMContentLoaded", async () => {
   document.head.appendChild(styleLoader);
 
   try {
-    const res = await fetch("/api/tickets-completo");
-    dataGlobal = await res.json();
+    // Solo se descargan los valores de los filtros; los agregados se calculan en el servidor
+    const filtros = await obtenerFiltros();
 
-    inicializarFiltros();
-    actualizarTabla();
+    inicializarFiltros(filtros.direcciones);
+    await actualizarTabla();
 
 
 
@@ -103,9 +102,17 @@ document.addEventListener("DOMContentLoaded", async () => {
   }
 });
 
+// === Consultar valores de filtros al servidor ===
+async function obtenerFiltros(direcciones = [], areas = []) {
+  const params = new URLSearchParams();
+  direcciones.forEach(d => params.append("direccion", d));
+  areas.forEach(a => params.append("area", a));
+  const res = await fetch(`/api/especialistas/filtros?${params}`);
+  return res.json();
+}
+
 // === Inicializar filtros dependientes con Choices.js ===
-function inicializarFiltros() {
-  const direcciones = [...new Set(dataGlobal.map(d => d.DIRECCION))].sort();
+function inicializarFiltros(direcciones) {
   llenarSelect("filtroDireccion", direcciones);
 
   // Inicialización Choices.js
@@ -114,12 +121,9 @@ function inicializarFiltros() {
   choicesTipo = crearChoices("#filtroTipo");
 
   // === Eventos ===
-  document.getElementById("filtroDireccion").addEventListener("change", () => {
+  document.getElementById("filtroDireccion").addEventListener("change", async () => {
     const selDir = obtenerSeleccion(choicesDireccion);
-    const base = dataGlobal.filter(d =>
-      selDir.length === 0 || selDir.includes(d.DIRECCION)
-    );
-    const areas = [...new Set(base.map(d => d.AREA))].sort();
+    const { areas } = await obtenerFiltros(selDir);
     llenarSelect("filtroArea", areas);
     choicesArea.destroy();
     choicesArea = crearChoices("#filtroArea");
@@ -127,14 +131,10 @@ function inicializarFiltros() {
     actualizarTabla();
   });
 
-  document.getElementById("filtroArea").addEventListener("change", () => {
+  document.getElementById("filtroArea").addEventListener("change", async () => {
     const selDir = obtenerSeleccion(choicesDireccion);
     const selArea = obtenerSeleccion(choicesArea);
-    const base = dataGlobal.filter(d =>
-      (selDir.length === 0 || selDir.includes(d.DIRECCION)) &&
-      (selArea.length === 0 || selArea.includes(d.AREA))
-    );
-    const tipos = [...new Set(base.map(d => d["TIPO REQUERIMIENTO"]))].sort();
+    const { tipos } = await obtenerFiltros(selDir, selArea);
     llenarSelect("filtroTipo", tipos);
     choicesTipo.destroy();
     choicesTipo = crearChoices("#filtroTipo");
@@ -174,42 +174,25 @@ function obtenerSeleccion(choicesInstance) {
   return choicesInstance.getValue(true);
 }
 
-// === Actualizar tabla según filtros ===
-function actualizarTabla() {
-  const dir = obtenerSeleccion(choicesDireccion);
-  const area = obtenerSeleccion(choicesArea);
-  const tipo = obtenerSeleccion(choicesTipo);
+// === Actualizar tabla según filtros (agregado en el servidor) ===
+async function actualizarTabla() {
+  const params = new URLSearchParams();
+  obtenerSeleccion(choicesDireccion).forEach(d => params.append("direccion", d));
+  obtenerSeleccion(choicesArea).forEach(a => params.append("area", a));
+  obtenerSeleccion(choicesTipo).forEach(t => params.append("tipo", t));
 
-  const filtradas = dataGlobal.filter(d =>
-    (dir.length === 0 || dir.includes(d.DIRECCION)) &&
-    (area.length === 0 || area.includes(d.AREA)) &&
-    (tipo.length === 0 || tipo.includes(d["TIPO REQUERIMIENTO"]))
-  );
-
-  generarTablaResumen(filtradas);
+  const res = await fetch(`/api/especialistas/resumen?${params}`);
+  const resumen = await res.json();
+  generarTablaResumen(resumen.especialistas || []);
 }
 
 // === Generar tabla resumen ===
-function generarTablaResumen(dataFiltrada) {
-  const agrupado = {};
-  dataFiltrada.forEach(r => {
-    const esp = r["ESPECIALISTA FUNCIONAL TI"] || "SIN ASIGNAR";
-    const estado = (r["ESTADO"] || "").toUpperCase();
-
-    if (!agrupado[esp]) agrupado[esp] = { asignado: 0, proceso: 0, pendiente: 0, total: 0 };
-
-    if (estado.includes("ASIGNADO")) agrupado[esp].asignado++;
-    else if (estado.includes("PROCESO")) agrupado[esp].proceso++;
-    else if (estado.includes("PENDIENTE")) agrupado[esp].pendiente++;
-
-    agrupado[esp].total =
-      agrupado[esp].asignado + agrupado[esp].proceso + agrupado[esp].pendiente;
-  });
-
+function generarTablaResumen(especialistas) {
   let totAsig = 0, totProc = 0, totPend = 0, totTot = 0;
   const filas = [];
 
-  Object.entries(agrupado).forEach(([esp, v]) => {
+  especialistas.forEach(v => {
+    const esp = v.especialista;
     if (v.total > 0) {
       totAsig += v.asignado;
       totProc += v.proceso;
@@ -254,78 +237,29 @@ function generarTablaResumen(dataFiltrada) {
   document.getElementById("kpi-especialistas").textContent = filas.length - 1;
 }
 
-function actualizarGrafico(rango = "semana", fechaInicio = null, fechaFin = null) {
+async function actualizarGrafico(rango = "semana", fechaInicio = null, fechaFin = null) {
   const ctx = document.getElementById("graficoAtendidos");
   const hoy = new Date();
+  const iso = d => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
   let inicio, fin;
 
-  // === Determinar rango automático (ajustado para zona horaria local) ===
+  // === Determinar rango automático (fechas locales del navegador) ===
   if (rango === "hoy") {
-    const yyyy = hoy.getFullYear();
-    const mm = hoy.getMonth();
-    const dd = hoy.getDate();
-
-    // Usamos margen de ±12h para cubrir UTC y local
-    inicio = new Date(yyyy, mm, dd, -12, 0, 0);
-    fin = new Date(yyyy, mm, dd, 35, 59, 59); // equivale a 23:59 + 12h
-    
+    inicio = fin = iso(hoy);
   } else if (rango === "semana") {
-    const yyyy = hoy.getFullYear();
-    const mm = hoy.getMonth();
-    const dd = hoy.getDate();
-    inicio = new Date(yyyy, mm, dd - 7, 0, 0, 0);
-    fin = new Date(yyyy, mm, dd, 23, 59, 59);
+    const haceUnaSemana = new Date(hoy.getFullYear(), hoy.getMonth(), hoy.getDate() - 7);
+    inicio = iso(haceUnaSemana);
+    fin = iso(hoy);
   } else if (rango === "rango") {
-    inicio = new Date(`${fechaInicio}T00:00:00`);
-    fin = new Date(`${fechaFin}T23:59:59`);
+    inicio = fechaInicio;
+    fin = fechaFin;
   }
 
-  // === Filtrar data ===
-  const datosFiltrados = dataGlobal.filter(d => {
-    const estado = (d["ESTADO"] || "").toUpperCase().trim();
-    if (!estado.includes("ATENDIDO")) return false;
-
-    const fechaStr = d["FECHA_FINAL_ATENCION"];
-    if (!fechaStr) return false;
-
-    // === Convertir formatos dd/mm/yyyy o yyyy-mm-dd con hora neutra (mediodía local) ===
-    let fecha;
-    if (fechaStr.includes("/")) {
-      const [dia, mes, anio] = fechaStr.split("/");
-      // usar hora 12:00 evita que el desfase UTC reste un día
-      fecha = new Date(parseInt(anio), parseInt(mes) - 1, parseInt(dia), 12, 0, 0);
-    } else {
-      const f = new Date(fechaStr);
-      fecha = new Date(f.getFullYear(), f.getMonth(), f.getDate(), 12, 0, 0);
-    }
-
-    return fecha >= inicio && fecha <= fin;
-  });
-
-  // === Agrupar por fecha normalizada (dd/mm/yyyy) ===
-  const conteo = {};
-  datosFiltrados.forEach(d => {
-    const fechaStr = d["FECHA_FINAL_ATENCION"];
-    if (!fechaStr) return;
-
-    let f;
-    if (fechaStr.includes("/")) {
-      f = fechaStr;
-    } else {
-      const dt = new Date(fechaStr);
-      f = dt.toLocaleDateString("es-PE");
-    }
-
-    conteo[f] = (conteo[f] || 0) + 1;
-  });
-
-  const labels = Object.keys(conteo).sort((a, b) => {
-    const [da, ma, aa] = a.split("/");
-    const [db, mb, ab] = b.split("/");
-    return new Date(aa, ma - 1, da) - new Date(ab, mb - 1, db);
-  });
-
-  const valores = labels.map(f => conteo[f]);
+  // === Serie diaria de atendidos calculada en el servidor ===
+  const res = await fetch(`/api/especialistas/resumen?inicio=${inicio}&fin=${fin}`);
+  const { serie } = await res.json();
+  const labels = serie.labels;
+  const valores = serie.valores;
 
   // === Destruir gráfico anterior si existe ===
   if (window.graficoAtendidosChart) window.graficoAtendidosChart.destroy();
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Antes de importar los servicios: nada de estado en .cache/ ni en models/
+_TMP = tempfile.mkdtemp(prefix="tests-")
+os.environ.update({
+    "LLM_CACHE_PATH": "",
+    "SNAPSHOT_DIR": "",
+    "CLASIFICADOR_PATH": "",
+    "MODELO_SLA_PATH": os.path.join(_TMP, "sin_modelo.joblib"),
+    "JOBS_DB_PATH": os.path.join(_TMP, "trabajos.sqlite3"),
+    "LOTE_CHECKPOINT_DIR": os.path.join(_TMP, "lotes"),
+    "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+})
@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks.sinteticos import generar_tickets
+from services.analitica_service import analitica_tickets
+from services.google_sheets_service import TicketsSnapshot, _tipar_columnas
+from services.sheet_sync_service import DiffFilas
+
+HOY = "2026-01-01"
+
+
+def _snapshot(filas, semilla):
+    df = _tipar_columnas(generar_tickets(filas, semilla))
+    return TicketsSnapshot(df=df, diff=DiffFilas(completo=True), hash=str(semilla))
+
+
+@pytest.fixture(scope="module")
+def snapshots():
+    return _snapshot(2_000, 1), _snapshot(3_000, 2)
+
+
+def test_cada_snapshot_conserva_su_vista(snapshots):
+    viejo, nuevo = snapshots
+    vista_vieja = viejo.vista_analitica
+    # Construir la vista del snapshot nuevo no desaloja la del anterior
+    assert nuevo.vista_analitica["filas"] == 3_000
+    assert viejo.vista_analitica is vista_vieja
+    assert vista_vieja["filas"] == 2_000
+
+
+def test_analitica_por_snapshot(snapshots):
+    viejo, nuevo = snapshots
+    assert analitica_tickets(viejo, HOY)["tickets"] != analitica_tickets(nuevo, HOY)["tickets"]
+    assert analitica_tickets(viejo, HOY) is analitica_tickets(viejo, HOY)
@@ -0,0 +1,185 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as aplicacion
+from benchmarks.sinteticos import generar_tickets
+from services import batch_service, google_sheets_service
+from services.google_sheets_service import TicketsSnapshot, _tipar_columnas
+from services.llm_cache_service import clave_cache
+from services.sheet_sync_service import DiffFilas
+
+
+def _snapshot(filas, semilla):
+    df = _tipar_columnas(generar_tickets(filas, semilla))
+    df["TICKET"] = [f"{semilla}-{i}" for i in range(filas)]
+    return TicketsSnapshot(df=df, diff=DiffFilas(completo=True), hash=f"hash-{semilla}").construir_indices()
+
+
+@pytest.fixture
+def cliente():
+    return aplicacion.app.test_client()
+
+
+@pytest.fixture
+def snapshot_cambiado(monkeypatch):
+    """La ruta toma el snapshot A y el cache ya cambió a B durante la petición."""
+    tomado, nuevo = _snapshot(50, 1), _snapshot(60, 2)
+    monkeypatch.setattr(aplicacion, "get_tickets_snapshot", lambda: tomado)
+    monkeypatch.setattr(google_sheets_service, "get_tickets_snapshot", lambda: nuevo)
+    return tomado
+
+
+def test_pagina_usa_el_snapshot_del_etag(cliente, snapshot_cambiado):
+    cuerpo = cliente.get("/api/tickets?limit=5").get_json()
+    assert cuerpo["total"] == 50
+    assert all(fila["TICKET"].startswith("1-") for fila in cuerpo["data"])
+
+
+def test_lista_en_bloque_usa_el_snapshot_del_etag(cliente, snapshot_cambiado):
+    estado = str(snapshot_cambiado.df["ESTADO"].iloc[0])
+    filas = cliente.get(f"/api/tickets?stream=0&estado={estado}").get_json()
+    assert filas and all(fila["TICKET"].startswith("1-") for fila in filas)
+
+
+def test_filtro_por_area_con_coma(cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, "get_tickets_snapshot", lambda: _snapshot(300, 3))
+    with aplicacion.app.test_request_context("/", query_string=[("area", "Monitoreo, seguimiento y evaluación"),
+                                                                ("area", "planificación")]):
+        assert aplicacion._lista_param("area") == ("MONITOREO, SEGUIMIENTO Y EVALUACIÓN", "PLANIFICACIÓN")
+
+    def tickets(consulta):
+        cuerpo = cliente.get(f"/api/analitica/sla?hoy=2100-01-01{consulta}").get_json()
+        return cuerpo["tickets"]["resueltos"] + cuerpo["tickets"]["abiertos"]
+
+    filtrados = tickets("&area=MONITOREO%2C%20SEGUIMIENTO%20Y%20EVALUACI%C3%93N")
+    assert 0 < filtrados < tickets("")
+
+
+@pytest.mark.parametrize("consulta", ["draw=abc", "draw=1&start=x"])
+def test_parametros_de_datatables_invalidos_dan_400(cliente, snapshot_cambiado, consulta):
+    respuesta = cliente.get(f"/api/tickets?{consulta}")
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.get_json()
+
+
+@pytest.mark.parametrize("body", [{"limite": "x"}, {"trabajadores": "muchos"}, {"limite": 0}, {"trabajadores": [2]}])
+def test_lote_rechaza_parametros_invalidos(cliente, body):
+    respuesta = cliente.post("/api/ai-clasificar/lote", json={"ticket_ids": ["1"], **body})
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.get_json()
+
+
+def test_lote_acepta_enteros_como_texto(cliente, monkeypatch):
+    pedidos = {}
+
+    def seleccionar(ids, filtros, limite):
+        pedidos["limite"] = limite
+        return []
+
+    monkeypatch.setattr(aplicacion, "seleccionar_tickets", seleccionar)
+    monkeypatch.setattr(batch_service, "obtener_referencias", lambda: None)
+    respuesta = cliente.post("/api/ai-clasificar/lote", json={"ticket_ids": ["1"], "limite": "2", "trabajadores": "3"})
+    assert respuesta.status_code == 200
+    assert pedidos["limite"] == 2
+
+
+@pytest.mark.parametrize("body", [
+    {"ticket_ids": "T-1"},
+    {"ticket_ids": 7},
+    {"filtros": ["ESTADO"]},
+    {"filtros": {"ESTADO": {"es": "Pendiente"}}},
+    {"filtros": {"ESTADO": None}},
+])
+def test_lote_rechaza_ids_y_filtros_de_otro_tipo(cliente, monkeypatch, body):
+    # Se valida antes de leer la hoja: un 400, nunca el 502 de hoja caída
+    monkeypatch.setattr(batch_service, "get_tickets_snapshot", _hoja_caida)
+    respuesta = cliente.post("/api/ai-clasificar/lote", json=body)
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.get_json()
+
+
+def test_lote_responde_json_si_fallan_las_referencias(cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, "seleccionar_tickets", lambda ids, filtros, limite: [])
+    monkeypatch.setattr(batch_service, "obtener_referencias", _hoja_caida)
+    respuesta = cliente.post("/api/ai-clasificar/lote", json={"ticket_ids": ["1"]})
+    assert respuesta.status_code == 502
+    assert "hojas de referencia" in respuesta.get_json()["error"]
+
+
+def _hoja_caida(*args):
+    raise RuntimeError("URL de la hoja no configurada")
+
+
+def test_predict_responde_502_si_falla_la_hoja(cliente, monkeypatch):
+    monkeypatch.setattr(google_sheets_service, "get_tickets_snapshot", _hoja_caida)
+    respuesta = cliente.get("/api/predict")
+    assert respuesta.status_code == 502
+    assert "No se pudo leer la hoja" in respuesta.get_json()["error"]
+
+
+def test_stream_responde_json_si_falla_la_hoja(cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, "buscar_ticket", _hoja_caida)
+    respuesta = cliente.get("/api/ai-ticket/1/stream")
+    assert respuesta.status_code == 502
+    assert "No se pudo leer la hoja" in respuesta.get_json()["error"]
+
+
+def test_trabajo_responde_json_si_falla_la_hoja(cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, "buscar_ticket", _hoja_caida)
+    respuesta = cliente.post("/api/ai-ticket/trabajos", json={"ticket_id": "1"})
+    assert respuesta.status_code == 502
+    assert "No se pudo leer la hoja" in respuesta.get_json()["error"]
+
+
+def test_clave_del_trabajo_incluye_modelo_y_version_de_prompts(cliente, monkeypatch):
+    ticket = {"TICKET": "7", "DESCRIPCION": "No puedo ingresar al aula"}
+    claves = []
+
+    def encolar(tipo, clave, fn, *args):
+        claves.append(clave)
+        return {"id": str(len(claves))}, True
+
+    monkeypatch.setattr(aplicacion, "buscar_ticket", lambda ticket_id: ticket)
+    monkeypatch.setattr(aplicacion.cola_trabajos, "encolar", encolar)
+    assert cliente.post("/api/ai-ticket/trabajos", json={"ticket_id": "7"}).status_code == 202
+    version = f"{aplicacion.VERSION_PROMPT_CLASIFICACION}-{aplicacion.VERSION_PROMPT_RESPUESTA}"
+    assert claves[0] == clave_cache("ai-ticket", aplicacion.MODELO_OPENAI, version, "7", ticket["DESCRIPCION"])
+
+    # Cambiar un prompt no debe deduplicar contra trabajos de la versión anterior
+    monkeypatch.setattr(aplicacion, "VERSION_PROMPT_RESPUESTA", "otra")
+    cliente.post("/api/ai-ticket/trabajos", json={"ticket_id": "7"})
+    assert claves[1] != claves[0]
+
+
+@pytest.fixture
+def perfilador(monkeypatch):
+    from services.metrics_service import PerfiladorMuestreo
+
+    nuevo = PerfiladorMuestreo()
+    monkeypatch.setattr(aplicacion.metricas, "PERFILADOR_HABILITADO", True)
+    monkeypatch.setattr(aplicacion.metricas, "perfilador", nuevo)
+    yield nuevo
+    nuevo.detener()
+
+
+def test_perfil_corre_en_segundo_plano(cliente, perfilador):
+    inicio = time.perf_counter()
+    respuesta = cliente.get("/debug/perfil?segundos=0.3")
+    assert respuesta.status_code == 202
+    assert time.perf_counter() - inicio < 0.2
+    assert cliente.get("/debug/perfil?segundos=0.3").status_code == 409
+    assert cliente.get("/debug/perfil/resultado").status_code == 202
+
+    time.sleep(0.5)
+    resultado = cliente.get("/debug/perfil/resultado")
+    assert resultado.status_code == 200
+    assert resultado.get_data(as_text=True).strip()
+    assert not perfilador.activo
+
+
+def test_perfil_un_solo_inicio_concurrente(perfilador):
+    with ThreadPoolExecutor(8) as pool:
+        iniciados = list(pool.map(lambda _: perfilador.iniciar(0.2), range(8)))
+    assert iniciados.count(True) == 1
@@ -0,0 +1,76 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services import batch_service, openai_service
+from services.batch_service import TokenBucket, clasificar_lote
+
+
+class _LimitadorContado:
+    def __init__(self):
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def adquirir(self, tokens=1):
+        with self._lock:
+            self.tokens += tokens
+
+
+def test_token_bucket_respeta_la_tasa_entre_hilos():
+    limitador = TokenBucket(20, capacidad=2)
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=lambda: [limitador.adquirir() for _ in range(3)]) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    # 12 tokens: 2 de la ráfaga inicial y 10 a 20/s
+    assert 0.45 <= time.perf_counter() - inicio < 1.5
+
+
+def test_token_bucket_permite_la_rafaga_inicial():
+    limitador = TokenBucket(1, capacidad=5)
+    inicio = time.perf_counter()
+    for _ in range(5):
+        limitador.adquirir()
+    assert time.perf_counter() - inicio < 0.1
+
+
+@pytest.fixture
+def lote_falso(monkeypatch):
+    """Clasificación que llama a la API solo para tickets sin 'cache' en la descripción."""
+    limitador = _LimitadorContado()
+    respuesta = SimpleNamespace(output_text="{}", usage=None)
+    cliente = SimpleNamespace(responses=SimpleNamespace(create=lambda **_: respuesta))
+
+    def clasificar(descripcion, referencias):
+        if "cache" not in descripcion:
+            openai_service.llamar_llm_sync("tipo", "tipo")
+            openai_service.llamar_llm_sync("clasificacion", "clasificacion")
+        return {"tipo_requerimiento": "X"}
+
+    monkeypatch.setattr(openai_service, "cliente_openai", lambda: cliente)
+    monkeypatch.setattr(batch_service, "clasificar_ticket", clasificar)
+    monkeypatch.setattr(batch_service, "obtener_referencias", lambda: None)
+    monkeypatch.setattr(batch_service, "limitador_lote", limitador)
+    return limitador
+
+
+def _tickets(*descripciones):
+    return [{"TICKET": str(i), "DESCRIPCION": d} for i, d in enumerate(descripciones)]
+
+
+def test_solo_las_llamadas_reales_toman_tokens(lote_falso):
+    *registros, resumen = clasificar_lote(_tickets("nuevo", "en cache", "otro nuevo", "en cache"), trabajadores=2)
+    assert resumen["resumen"]["ok"] == 4
+    assert lote_falso.tokens == 4
+
+
+def test_lotes_comparten_el_limitador_del_proceso(lote_falso):
+    for _ in range(2):
+        list(clasificar_lote(_tickets("nuevo"), trabajadores=1))
+    assert lote_falso.tokens == 4
+    # Fuera de un lote no hay limitador
+    assert openai_service.limitador_llm.get() is None
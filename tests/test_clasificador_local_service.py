@@ -0,0 +1,38 @@
+import joblib
+import pytest
+
+from benchmarks.bench_clasificador import generar_historico
+from benchmarks.sinteticos import AREAS, EQUIPOS, generar_asignacion, generar_tdr
+from services import clasificador_local_service as local
+from services.openai_service import construir_referencias
+
+
+@pytest.fixture
+def clasificador(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "clasificador.joblib")
+    historico = generar_historico(3_000, ambiguos=0.0)
+    # El AREA del solicitante nunca coincide con el nombre de un equipo TI
+    assert not set(historico["AREA"]) & set(historico["ÁREA TI"])
+    local.entrenar_clasificador(historico, ruta)
+    monkeypatch.setattr(local, "CLASIFICADOR_UMBRAL", 0.0)
+    yield local.recargar_clasificador(ruta), ruta
+    local.recargar_clasificador("")
+
+
+def test_area_asignada_es_el_equipo_ti(clasificador):
+    referencias = construir_referencias(generar_asignacion(), generar_tdr())
+    clasificacion = local.prediccion_local("el aula virtual no carga desde el celular en el curso 12")["clasificacion"]
+    assert clasificacion["area_asignada"] in EQUIPOS
+    assert clasificacion["area_asignada"] not in AREAS
+    # Con el equipo predicho la hoja de asignación encuentra al encargado exacto
+    clave = tuple(str(clasificacion[s]).lower() for s in ("tipo_requerimiento", "requerimiento", "area_asignada"))
+    assert clave in referencias.especialistas
+
+
+def test_artefacto_con_otras_salidas_se_descarta(clasificador, tmp_path):
+    _, ruta = clasificador
+    artefacto = joblib.load(ruta)
+    del artefacto["salidas"]
+    viejo = str(tmp_path / "viejo.joblib")
+    joblib.dump(artefacto, viejo)
+    assert local.cargar_clasificador(viejo) is None
@@ -0,0 +1,91 @@
+import gc
+import threading
+import weakref
+
+import pandas as pd
+
+from services.etl_service import memo_por_snapshot
+
+
+def _contador():
+    llamadas = []
+
+    @memo_por_snapshot
+    def fn(df, *args):
+        llamadas.append((id(df), args))
+        return (len(df), args)
+
+    return fn, llamadas
+
+
+def test_memo_reutiliza_mientras_el_df_es_el_mismo():
+    fn, llamadas = _contador()
+    df = pd.DataFrame({"a": [1, 2]})
+    assert fn(df, "x") == (2, ("x",))
+    assert fn(df, "x") == (2, ("x",))
+    assert fn(df, "y") == (2, ("y",))
+    assert len(llamadas) == 2
+
+
+def test_memo_se_invalida_con_un_df_nuevo():
+    fn, llamadas = _contador()
+    viejo, nuevo = pd.DataFrame({"a": [1]}), pd.DataFrame({"a": [1, 2, 3]})
+    assert fn(viejo) == (1, ())
+    assert fn(nuevo) == (3, ())
+    # Los dos snapshots conviven: volver al anterior no lo recalcula
+    assert fn(viejo) == (1, ())
+    assert len(llamadas) == 2
+
+
+def test_memo_no_retiene_snapshots_viejos():
+    fn, _ = _contador()
+    df = pd.DataFrame({"a": [1]})
+    fn(df)
+    ref = weakref.ref(df)
+    del df
+    gc.collect()
+    assert ref() is None
+
+
+def test_consulta_lenta_sobre_snapshot_anterior_no_contamina_el_nuevo():
+    en_curso, liberar = threading.Event(), threading.Event()
+
+    @memo_por_snapshot
+    def fn(df):
+        if df.attrs.get("lento"):
+            en_curso.set()
+            liberar.wait(5)
+        return int(df["a"].sum())
+
+    viejo, nuevo = pd.DataFrame({"a": [1]}), pd.DataFrame({"a": [10]})
+    viejo.attrs["lento"] = True
+    resultados = {}
+    hilo = threading.Thread(target=lambda: resultados.setdefault("viejo", fn(viejo)))
+    hilo.start()
+    assert en_curso.wait(5)
+    # Llega el snapshot nuevo mientras la consulta sobre el anterior sigue corriendo
+    assert fn(nuevo) == 10
+    liberar.set()
+    hilo.join(5)
+    assert resultados["viejo"] == 1
+    assert fn(nuevo) == 10
+    assert fn(viejo) == 1
+
+
+def test_memo_concurrente_devuelve_un_solo_resultado_por_clave():
+    fn, _ = _contador()
+    df = pd.DataFrame({"a": range(100)})
+    barrera = threading.Barrier(8)
+    vistos = []
+
+    def consultar():
+        barrera.wait()
+        vistos.append(fn(df, "k"))
+
+    hilos = [threading.Thread(target=consultar) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert len(vistos) == 8
+    assert all(v is vistos[0] for v in vistos)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.sinteticos import ESTADOS, generar_tickets
+from services.etl_service import materializar_kpis
+from services.google_sheets_service import TicketsSnapshot, _tipar_columnas
+from services.sheet_sync_service import DiffFilas, diff_por_clave
+
+
+def _snapshot(crudo, anterior=None):
+    df = _tipar_columnas(crudo.copy())
+    diff = diff_por_clave(anterior.df if anterior else None, df)
+    return TicketsSnapshot(df=df, diff=diff, hash="test").construir_indices().heredar_kpis(anterior)
+
+
+def _sin_ceros(conteo):
+    return {k: v for k, v in conteo.items() if v}
+
+
+def test_kpis_incrementales_igual_a_recalculo_completo():
+    crudo = generar_tickets(2_000, 5)
+    anterior = _snapshot(crudo)
+    assert not anterior.kpis.incremental
+
+    rng = np.random.default_rng(7)
+    nuevo = crudo.drop(index=rng.choice(len(crudo), 20, replace=False))
+    cambiados = rng.choice(nuevo.index, 30, replace=False)
+    nuevo.loc[cambiados, "ESTADO"] = rng.choice(ESTADOS, 30)
+    nuevo.loc[cambiados[:10], "FECHA_FINAL_ATENCION"] = "15/03/2025"
+    agregados = generar_tickets(25, 9).assign(TICKET=np.arange(10_001, 10_026))
+    nuevo = pd.concat([nuevo, agregados], ignore_index=True)
+
+    snapshot = _snapshot(nuevo, anterior)
+    assert snapshot.diff.agregados and snapshot.diff.eliminados and snapshot.diff.modificados
+    assert snapshot.kpis.incremental
+
+    completo = materializar_kpis(snapshot.df)
+    assert _sin_ceros(snapshot.kpis.cubo) == _sin_ceros(completo.cubo)
+    assert _sin_ceros(snapshot.kpis.registrados) == _sin_ceros(completo.registrados)
+    assert _sin_ceros(snapshot.kpis.atendidos) == _sin_ceros(completo.atendidos)
+    assert snapshot.kpis.resumen() == completo.resumen()
+
+
+def test_diff_completo_recalcula_los_kpis():
+    df = _tipar_columnas(generar_tickets(100, 1))
+    anterior = TicketsSnapshot(df=df, diff=DiffFilas(completo=True), hash="a").construir_indices()
+    snapshot = TicketsSnapshot(df=df.copy(), diff=DiffFilas(completo=True), hash="b").construir_indices()
+    assert not snapshot.heredar_kpis(anterior).kpis.incremental
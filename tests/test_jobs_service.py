@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from services.jobs_service import ColaLlena, ColaTrabajos
+
+
+@pytest.fixture
+def cola(tmp_path):
+    return ColaTrabajos(str(tmp_path / "trabajos.sqlite3"), trabajadores=2, max_pendientes=2)
+
+
+def _esperar_fin(cola, trabajo_id):
+    for _ in range(300):
+        trabajo = cola.obtener(trabajo_id)
+        if trabajo["estado"] not in ("en_cola", "en_proceso"):
+            return trabajo
+        time.sleep(0.01)
+    raise AssertionError("el trabajo no terminó")
+
+
+def test_misma_clave_activa_se_deduplica(cola):
+    liberar = threading.Event()
+    ejecuciones = []
+
+    def trabajo(x):
+        liberar.wait(5)
+        ejecuciones.append(x)
+        return {"x": x}
+
+    primero, nuevo = cola.encolar("test", "clave", trabajo, 1)
+    repetido, nuevo_repetido = cola.encolar("test", "clave", trabajo, 1)
+    assert nuevo and not nuevo_repetido
+    assert repetido["id"] == primero["id"]
+
+    liberar.set()
+    assert _esperar_fin(cola, primero["id"])["resultado"] == {"x": 1}
+    assert ejecuciones == [1]
+
+    # Terminado el trabajo, la misma clave vuelve a encolarse
+    _, otra_vez = cola.encolar("test", "clave", trabajo, 1)
+    assert otra_vez
+
+
+def test_deduplicacion_concurrente(cola):
+    liberar = threading.Event()
+    barrera = threading.Barrier(6)
+    resultados = []
+
+    def enviar():
+        barrera.wait()
+        resultados.append(cola.encolar("test", "misma", lambda: liberar.wait(5)))
+
+    hilos = [threading.Thread(target=enviar) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    liberar.set()
+    assert sum(nuevo for _, nuevo in resultados) == 1
+    assert len({trabajo["id"] for trabajo, _ in resultados}) == 1
+
+
+def test_cola_llena_rechaza(cola):
+    liberar = threading.Event()
+    cola.encolar("test", "a", liberar.wait, 5)
+    cola.encolar("test", "b", liberar.wait, 5)
+    with pytest.raises(ColaLlena):
+        cola.encolar("test", "c", liberar.wait, 5)
+    liberar.set()
+
+
+def test_error_del_trabajo_queda_registrado(cola):
+    def falla():
+        raise ValueError("sin descripción")
+
+    trabajo, _ = cola.encolar("test", "falla", falla)
+    terminado = _esperar_fin(cola, trabajo["id"])
+    assert terminado["estado"] == "error"
+    assert terminado["error"] == "sin descripción"
@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+from services.llm_cache_service import LLMCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(str(tmp_path / "llm.sqlite3"), max_entradas=2, volcado_segundos=3600)
+
+
+def test_lecturas_no_escriben_hasta_el_volcado(cache):
+    cache.guardar("a", "clasificacion", {"x": 1}, llamadas=2)
+    con = cache._conexion()
+    escrituras = con.total_changes
+    for _ in range(50):
+        assert cache.obtener("a") == {"x": 1}
+    assert cache.obtener("no existe") is None
+    assert con.total_changes == escrituras
+
+    stats = cache.estadisticas()
+    assert (stats["hits"], stats["misses"], stats["llamadas_ahorradas"]) == (50, 1, 100)
+
+
+def test_volcado_periodico(cache):
+    cache.volcado_segundos = 0
+    cache.guardar("a", "clasificacion", {"x": 1})
+    cache.obtener("a")
+    hits = cache._conexion().execute("SELECT valor FROM llm_cache_stats WHERE nombre = 'hits'").fetchone()
+    assert hits == (1,)
+
+
+def test_desalojo_ve_los_accesos_pendientes(cache):
+    cache.guardar("a", "respuesta", "A")
+    time.sleep(0.01)
+    cache.guardar("b", "respuesta", "B")
+    time.sleep(0.01)
+    cache.obtener("a")  # solo en memoria: "b" pasa a ser la menos usada
+    cache.guardar("c", "respuesta", "C")
+    assert cache.obtener("a") == "A"
+    assert cache.obtener("b") is None
@@ -0,0 +1,35 @@
+from datetime import date
+
+import pandas as pd
+
+from services import model_predict_service
+
+
+class _Dia(date):
+    actual = date(2026, 1, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.actual
+
+
+def test_riesgo_se_recalcula_al_cambiar_el_dia(monkeypatch):
+    monkeypatch.setattr(model_predict_service, "date", _Dia)
+    # Tickets abiertos (sin atención final) registrados el 30/12/2025
+    df = pd.DataFrame({
+        "TICKET": ["1", "2", "3"],
+        "FECHA DE REGISTRO": ["30/12/2025"] * 3,
+        "PRIORIDAD": ["ALTA", "MEDIA", "BAJA"],
+        "ESTADO": ["ASIGNADO", "PROCESO", "PENDIENTE"],
+        "FECHA_FINAL_ATENCION": pd.NaT,
+    })
+
+    _Dia.actual = date(2026, 1, 1)
+    primero = model_predict_service.predict_sla_risk(df)
+    assert model_predict_service.predict_sla_risk(df) is primero
+
+    # Mismo snapshot, otro día: las edades de los abiertos cambian
+    _Dia.actual = date(2026, 1, 4)
+    despues = model_predict_service.predict_sla_risk(df)
+    assert despues is not primero
+    assert [f["riesgo_sla"] for f in despues] != [f["riesgo_sla"] for f in primero]
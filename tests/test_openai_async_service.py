@@ -0,0 +1,97 @@
+import asyncio
+import math
+import time
+
+import openai
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from services import openai_async_service
+from services.openai_async_service import _LoopCompartido, ejecutar, llamar_llm
+
+LATENCIA = 0.2
+LIMITE = 4
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    servidor = FakeOpenAIServer(0, LATENCIA).iniciar()
+    monkeypatch.setenv("OPENAI_BASE_URL", servidor.base_url)
+    monkeypatch.setattr(openai_async_service, "OPENAI_MAX_CONCURRENCIA", LIMITE)
+    monkeypatch.setattr(openai_async_service, "OPENAI_MAX_RETRIES", 2)
+    monkeypatch.setattr(openai_async_service, "OPENAI_RETRY_BASE", 0.05)
+    # Loop, cliente y semáforo nuevos con esta configuración
+    compartido = _LoopCompartido()
+    monkeypatch.setattr(openai_async_service, "_compartido", compartido)
+    yield servidor
+    if compartido.loop is not None:
+        compartido.loop.call_soon_threadsafe(compartido.loop.stop)
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _en_paralelo(n):
+    async def todas():
+        return await asyncio.gather(*(llamar_llm(f"ticket {i}", "test") for i in range(n)))
+    return ejecutar(todas())
+
+
+def test_semaforo_acota_la_concurrencia(fake):
+    assert len(_en_paralelo(10)) == 10
+    assert fake.max_en_curso == LIMITE
+
+
+@pytest.mark.parametrize("n", [4, 10])
+def test_tiempo_total_es_latencia_por_tandas(fake, n):
+    _en_paralelo(1)  # conexión y SDK ya inicializados
+    inicio = time.perf_counter()
+    _en_paralelo(n)
+    esperado = LATENCIA * math.ceil(n / LIMITE)
+    assert esperado * 0.9 <= time.perf_counter() - inicio < esperado + 0.3
+
+
+@pytest.mark.parametrize("codigo", [429, 500, 503])
+def test_reintenta_errores_transitorios(fake, codigo):
+    fake.fallos = [codigo, codigo]
+    assert ejecutar(llamar_llm("ticket", "test"))
+    assert fake.llamadas == 3
+
+
+def test_agota_los_reintentos(fake):
+    fake.fallos = [429] * 3
+    with pytest.raises(openai.RateLimitError):
+        ejecutar(llamar_llm("ticket", "test"))
+    assert fake.llamadas == 3
+
+
+def test_no_reintenta_errores_del_cliente(fake):
+    fake.fallos = [400]
+    with pytest.raises(openai.BadRequestError):
+        ejecutar(llamar_llm("ticket", "test"))
+    assert fake.llamadas == 1
+
+
+def test_analisis_completo_contra_el_servidor_falso(fake, monkeypatch):
+    import pandas as pd
+    from benchmarks.sinteticos import generar_asignacion, generar_tdr
+    from services.openai_service import construir_referencias
+
+    # Fila de asignación para la clasificación que devuelve el servidor falso
+    asignacion = generar_asignacion()
+    fila = asignacion.iloc[[0]].assign(CATEGORIA_REQUERIMIENTO="Aula virtual", REQUERIMIENTO="Crear aula",
+                                       EQUIPO="Plataforma")
+    dni = fila["DNI_ENCARGO_PROCESO"].iloc[0]
+    referencias = construir_referencias(pd.concat([fila, asignacion]), generar_tdr(), "test")
+    monkeypatch.setattr(openai_async_service, "obtener_referencias", lambda: referencias)
+
+    inicio = time.perf_counter()
+    resultado = openai_async_service.analizar_ticket("No puedo crear el aula virtual del curso")
+    segundos = time.perf_counter() - inicio
+
+    assert resultado["clasificacion"]["area_asignada"] == "Plataforma"
+    assert resultado["especialista"]["dni_encargado_proceso"] == dni
+    assert [t["DNI"] for t in resultado["tdr"]] == [dni] * 5
+    assert resultado["respuesta"]["respuesta_sugerida"].startswith("Estimado usuario")
+    # tipo, clasificación y respuesta: tres llamadas en secuencia
+    assert fake.llamadas == 3
+    assert segundos < 3 * LATENCIA + 1.0
@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.servidor_hojas import ServidorHojas
+from benchmarks.sinteticos import escribir_hojas
+from services import openai_service
+
+
+@pytest.fixture
+def hojas(tmp_path, monkeypatch):
+    rutas = escribir_hojas(str(tmp_path), 10)
+    servidor = ServidorHojas(str(tmp_path)).iniciar()
+    for sync, nombre in ((openai_service._sync_asignacion, "asignacion.csv"), (openai_service._sync_tdr, "tdr.csv")):
+        monkeypatch.setattr(sync, "url", servidor.url(nombre))
+        sync.olvidar()
+    yield rutas
+    servidor.shutdown()
+    servidor.server_close()
+    openai_service._sync_asignacion.olvidar()
+    openai_service._sync_tdr.olvidar()
+
+
+def test_falla_de_una_hoja_no_pierde_el_cambio_de_la_otra(hojas):
+    anterior = openai_service._cargar_referencias()
+    filas = len(anterior.asignacion)
+
+    # Cambia la asignación y la TDR no responde (404): el refresco falla
+    asignacion = pd.read_csv(hojas["asignacion"], dtype=str)
+    pd.concat([asignacion, asignacion.tail(1)]).to_csv(hojas["asignacion"], index=False)
+    tdr = hojas["tdr"] + ".bak"
+    os.rename(hojas["tdr"], tdr)
+    with pytest.raises(Exception):
+        openai_service._cargar_referencias(anterior)
+    for sync in (openai_service._sync_asignacion, openai_service._sync_tdr):
+        assert sync.hash is None and sync.etag is None and sync.last_modified is None
+
+    # En el siguiente refresco la asignación nueva sí llega
+    os.rename(tdr, hojas["tdr"])
+    nuevas = openai_service._cargar_referencias(anterior)
+    assert nuevas is not anterior
+    assert len(nuevas.asignacion) == filas + 1
+
+
+def test_sin_cambios_devuelve_el_snapshot_anterior(hojas):
+    anterior = openai_service._cargar_referencias()
+    assert openai_service._cargar_referencias(anterior) is anterior
+
+
+@pytest.mark.parametrize("tipo_local, llamadas", [(None, 2), ("SOPORTE", 1)])
+def test_cache_registra_las_llamadas_realmente_hechas(hojas, tmp_path, monkeypatch, tipo_local, llamadas):
+    from types import SimpleNamespace
+    from services.llm_cache_service import LLMCache
+
+    cache = LLMCache(str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(openai_service, "llm_cache", cache)
+    monkeypatch.setattr(openai_service, "prediccion_local",
+                        lambda _: {"clasificacion": None, "tipo_requerimiento": tipo_local})
+    hechas = []
+
+    def llm_falso(prompt, operacion):
+        hechas.append(operacion)
+        if operacion == "tipo":
+            return SimpleNamespace(output_text='{"tipo_requerimiento": "SOPORTE"}')
+        return SimpleNamespace(output_text='{"tipo_requerimiento": "SOPORTE", "requerimiento": "x"}')
+
+    monkeypatch.setattr(openai_service, "llamar_llm_sync", llm_falso)
+    referencias = openai_service._cargar_referencias()
+    openai_service.clasificar_ticket("No puedo ingresar a la plataforma", referencias)
+    assert len(hechas) == llamadas
+
+    # El acierto evita exactamente las llamadas que se hicieron
+    openai_service.clasificar_ticket("No puedo ingresar a la plataforma", referencias)
+    assert len(hechas) == llamadas
+    assert cache.estadisticas()["llamadas_ahorradas"] == llamadas
@@ -0,0 +1,140 @@
+import io
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from services.sheet_sync_service import SheetSync, diff_por_clave
+
+
+class _HojaLocal(ThreadingHTTPServer):
+    """
+    Export CSV de prueba servido desde memoria: cada `publicar` es una
+    nueva revisión con su propio ETag / Last-Modified (aunque el contenido
+    sea el mismo) y responde 304 a If-None-Match de la revisión vigente.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        self.datos, self.revision, self.publicada = b"", 0, time.time()
+        self.descargas = 0
+        self.no_modificadas = 0
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/tickets.csv"
+
+    @property
+    def etag(self):
+        return f'"r{self.revision}"'
+
+    def publicar(self, filas):
+        buffer = io.StringIO()
+        pd.DataFrame(filas, columns=["TICKET", "ESTADO"]).to_csv(buffer, index=False)
+        with self._lock:
+            self.datos = buffer.getvalue().encode("utf-8")
+            self.revision += 1
+            self.publicada += 1  # segundos distintos para Last-Modified
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        hoja = self.server
+        with hoja._lock:
+            datos, etag, publicada = hoja.datos, hoja.etag, hoja.publicada
+            modificada = self.headers.get("If-None-Match") != etag
+            if modificada:
+                hoja.descargas += 1
+            else:
+                hoja.no_modificadas += 1
+        if not modificada:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(publicada, usegmt=True))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+@pytest.fixture
+def servidor():
+    servidor = _HojaLocal()
+    servidor.publicar([("1", "ASIGNADO"), ("2", "PENDIENTE")])
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _leer(contenido):
+    return pd.read_csv(io.BytesIO(contenido), dtype=str)
+
+
+def test_respuesta_304_no_descarga_de_nuevo(servidor):
+    sync = SheetSync(servidor.url, nombre="tickets")
+    assert sync.descargar() is not None
+    assert sync.etag and sync.last_modified
+    assert sync.descargar() is None
+    assert (servidor.descargas, servidor.no_modificadas) == (1, 1)
+
+
+def test_mismo_contenido_con_otro_etag_se_descarta_por_hash(servidor):
+    sync = SheetSync(servidor.url, nombre="tickets")
+    sync.descargar()
+    # Se vuelve a publicar igual: cambia el ETag, no el contenido
+    servidor.publicar([("1", "ASIGNADO"), ("2", "PENDIENTE")])
+    assert sync.descargar() is None
+    assert sync.etag == servidor.etag
+    assert servidor.descargas == 2
+
+
+def test_hoja_modificada_se_descarga_y_se_compara_por_fila(servidor):
+    sync = SheetSync(servidor.url, nombre="tickets")
+    anterior = _leer(sync.descargar())
+    hash_anterior = sync.hash
+    servidor.publicar([("1", "ATENDIDO"), ("2", "PENDIENTE"), ("3", "ASIGNADO")])
+    nuevo = _leer(sync.descargar())
+    assert sync.hash != hash_anterior
+    diff = diff_por_clave(anterior, nuevo)
+    assert (diff.agregados, diff.eliminados, diff.modificados) == ({"3"}, set(), {"1"})
+
+
+def test_olvidar_fuerza_descarga_completa(servidor):
+    sync = SheetSync(servidor.url, nombre="tickets")
+    sync.descargar()
+    sync.olvidar()
+    assert sync.descargar() is not None
+    assert servidor.no_modificadas == 0
+
+
+def test_diff_por_clave():
+    anterior = pd.DataFrame({"TICKET": ["1", "2", "3"], "ESTADO": ["ASIGNADO", "PENDIENTE", "PROCESO"]})
+    nuevo = pd.DataFrame({"TICKET": ["2", "3", "4"], "ESTADO": ["ATENDIDO", "PROCESO", "ASIGNADO"]})
+    diff = diff_por_clave(anterior, nuevo)
+    assert diff.agregados == {"4"}
+    assert diff.eliminados == {"1"}
+    assert diff.modificados == {"2"}
+    assert not diff.completo
+
+
+def test_diff_por_clave_sin_anterior_o_con_otro_esquema():
+    df = pd.DataFrame({"TICKET": ["1"], "ESTADO": ["ASIGNADO"]})
+    assert diff_por_clave(None, df).completo
+    assert diff_por_clave(df, df.assign(OTRA="x")).completo
+    assert diff_por_clave(df, df.copy()).vacio
@@ -0,0 +1,111 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from services.snapshot_cache import SnapshotCache
+
+_nombres = itertools.count()
+
+
+def _cache(cargar, ttl=60.0, **kwargs):
+    return SnapshotCache(f"test-{next(_nombres)}", cargar, ttl=ttl, **kwargs)
+
+
+class _Fuente:
+    """cargar(anterior) contando llamadas; `demora` simula la descarga."""
+
+    def __init__(self, demora=0.0):
+        self.demora = demora
+        self.cargas = 0
+        self.fallar = False
+        self._lock = threading.Lock()
+
+    def __call__(self, anterior):
+        time.sleep(self.demora)
+        if self.fallar:
+            raise RuntimeError("fuente caída")
+        with self._lock:
+            self.cargas += 1
+            return self.cargas
+
+
+def _esperar(condicion, timeout=3.0):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        if time.monotonic() > limite:
+            raise AssertionError("condición no alcanzada")
+        time.sleep(0.01)
+
+
+def test_primera_carga_es_single_flight():
+    fuente = _Fuente(demora=0.2)
+    cache = _cache(fuente)
+    barrera = threading.Barrier(8)
+    valores = []
+
+    def leer():
+        barrera.wait()
+        valores.append(cache.valor())
+
+    hilos = [threading.Thread(target=leer) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert valores == [1] * 8
+    assert fuente.cargas == 1
+    assert cache.estadisticas()["misses"] >= 1
+
+
+def test_vencido_se_sirve_mientras_se_revalida():
+    fuente = _Fuente()
+    cache = _cache(fuente, ttl=0.1)
+    assert cache.valor() == 1
+    fuente.demora = 0.3
+    time.sleep(0.15)
+
+    inicio = time.perf_counter()
+    assert cache.valor() == 1  # vencido: no espera la recarga
+    assert time.perf_counter() - inicio < 0.1
+    assert cache.estadisticas()["stale_hits"] == 1
+
+    _esperar(lambda: cache.actual().valor == 2)
+    assert cache.obtener().version == 2
+
+
+def test_error_al_refrescar_conserva_el_snapshot_anterior():
+    fuente = _Fuente()
+    cache = _cache(fuente)
+    cache.valor()
+    fuente.fallar = True
+    assert cache.refrescar().valor == 1
+    stats = cache.estadisticas()
+    assert stats["errores"] == 1
+    assert stats["ultimo_error"] == "fuente caída"
+
+
+def test_primera_carga_fallida_propaga_el_error():
+    fuente = _Fuente()
+    fuente.fallar = True
+    with pytest.raises(RuntimeError):
+        _cache(fuente).valor()
+
+
+def test_mismo_objeto_cuenta_como_sin_cambios():
+    valor = object()
+    cache = _cache(lambda anterior: valor)
+    primero = cache.obtener()
+    segundo = cache.refrescar()
+    assert segundo.valor is primero.valor
+    assert segundo.version == primero.version
+    assert cache.estadisticas()["sin_cambios"] == 1
+
+
+def test_respaldo_precargado_se_sirve_y_se_reemplaza():
+    fuente = _Fuente(demora=0.2)
+    cache = _cache(fuente, precargar=lambda: "espejo")
+    assert cache.valor() == "espejo"
+    _esperar(lambda: cache.actual().valor == 1)
+    assert cache.estadisticas()["precargas"] == 1